@@ -7,5 +7,8 @@ python manage.py migrate
 # Создаём суперпользователя и загружаем мок-данные из CSV
 python manage.py start
 
-# Запускаем сервер
-exec python manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# Собираем статику в STATIC_ROOT: под gunicorn ее отдает WhiteNoise
+python manage.py collectstatic --noinput
+
+# Запускаем сервер: gunicorn с несколькими воркерами (настройки - SERVER_*)
+exec python manage.py serve
\ No newline at end of file
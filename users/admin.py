@@ -6,6 +6,7 @@ from .models import (
     AccessRoleRule,
     BusinessElement,
     Item,
+    ItemChange,
     RefreshToken,
     RevokedAccessToken,
     Role,
@@ -130,6 +131,13 @@ class ItemAdmin(admin.ModelAdmin):
     ordering = ("id",)
 
 
+@admin.register(ItemChange)
+class ItemChangeAdmin(admin.ModelAdmin):
+    list_display = ("id", "op", "item_id", "title", "owner", "changed_at")
+    list_filter = ("op",)
+    ordering = ("-id",)
+
+
 @admin.register(RefreshToken)
 class RefreshTokenAdmin(admin.ModelAdmin):
     list_display = ("jti", "user", "revoked", "expires_at", "created_at")
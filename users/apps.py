@@ -6,4 +6,6 @@ class UsersConfig(AppConfig):
     name = 'users'
 
     def ready(self):
-        import users.schema_extensions
\ No newline at end of file
+        import users.schema_extensions
+
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""Нативные async-версии эндпоинтов аутентификации для ASGI.
+
+DRF APIView синхронный, поэтому под ASGI каждый запрос уходит в поток
+через sync_to_async. Здесь те же эндпоинты реализованы на async ORM и
+включаются в ``users/urls.py`` настройкой ``ASYNC_AUTH_VIEWS``. Формат
+запросов, ответов и ошибок совпадает с синхронными представлениями.
+"""
+
+import json
+from datetime import datetime, timezone
+
+import jwt
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+    ParseError,
+)
+
+from .authentication import (
+    AsyncRequestUserAuthentication,
+    aget_active_user,
+    atoken_version_is_current,
+)
+from .conditional import conditional_response, set_validators, user_etag
+from .models import RefreshToken, RevokedAccessToken
+from .revocation import revoked_access_tokens
+from .serializers import (
+    LoginCredentialsSerializer,
+    MeUpdateSerializer,
+    UserOutSerializer,
+)
+from .tokens import decode_token, generate_access_token, generate_refresh_token
+from .views import rotate_refresh_token
+
+User = get_user_model()
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAPIView(View):
+    """JSON-тело, bearer-аутентификация и ошибки в формате DRF."""
+
+    authentication_required = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            request.data = self.parse_body(request)
+            if self.authentication_required:
+                result = await AsyncRequestUserAuthentication().authenticate(request)
+                if result is None:
+                    raise NotAuthenticated()
+                request.user, request.auth = result
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(exc)
+
+    def parse_body(self, request) -> dict:
+        if request.method not in ("POST", "PATCH", "PUT"):
+            return {}
+        if request.content_type != "application/json":
+            return request.POST
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+    def handle_exception(self, exc: APIException) -> JsonResponse:
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {"detail": exc.detail}
+        status_code = exc.status_code
+        if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+            status_code = status.HTTP_401_UNAUTHORIZED
+        response = JsonResponse(data, status=status_code, safe=False)
+        if getattr(exc, "wait", None):
+            response["Retry-After"] = str(exc.wait)
+        return response
+
+
+class AsyncLoginView(AsyncAPIView):
+    authentication_required = False
+
+    async def post(self, request):
+        serializer = LoginCredentialsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = await LoginCredentialsSerializer.aauthenticate(
+            serializer.validated_data["email"], serializer.validated_data["password"]
+        )
+        data = {
+            "user": UserOutSerializer(user).data,
+            "access": generate_access_token(user.id, user.token_version),
+            "refresh": generate_refresh_token(user.id, user.token_version),
+        }
+        payload = decode_token(data["refresh"], expected_type="refresh")
+        await RefreshToken.objects.aupdate_or_create(
+            jti=payload.get("jti"),
+            defaults={
+                "user": user,
+                "expires_at": datetime.fromtimestamp(
+                    payload.get("exp"), tz=timezone.utc
+                ),
+                "revoked": False,
+            },
+        )
+        return JsonResponse(data)
+
+
+class AsyncRefreshView(AsyncAPIView):
+    authentication_required = False
+
+    async def post(self, request):
+        token = request.data.get("refresh")
+        if not token:
+            return JsonResponse({"detail": "refresh token required"}, status=400)
+        try:
+            payload = decode_token(token, expected_type="refresh")
+        except jwt.PyJWTError:
+            return JsonResponse({"detail": "invalid refresh token"}, status=401)
+
+        jti = payload.get("jti")
+        if not jti:
+            return JsonResponse({"detail": "invalid refresh token"}, status=401)
+        rotate = settings.JWT_ROTATE_REFRESH_TOKENS
+        if (
+            not rotate
+            and await RefreshToken.objects.filter(jti=jti, revoked=True).aexists()
+        ):
+            return JsonResponse({"detail": "invalid refresh token"}, status=401)
+
+        try:
+            user = await aget_active_user(payload.get("sub"))
+        except User.DoesNotExist:
+            return JsonResponse({"detail": "user inactive or not found"}, status=401)
+        if not await atoken_version_is_current(payload, user):
+            return JsonResponse({"detail": "invalid refresh token"}, status=401)
+
+        data = {"access": generate_access_token(user.id, user.token_version)}
+        if rotate:
+            # Ротации нужна транзакция, а async ORM транзакций не поддерживает
+            data["refresh"] = await sync_to_async(rotate_refresh_token)(user, jti)
+            if data["refresh"] is None:
+                return JsonResponse({"detail": "invalid refresh token"}, status=401)
+        return JsonResponse(data)
+
+
+class AsyncMeView(AsyncAPIView):
+    async def get(self, request):
+        etag = user_etag(request.user)
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(JsonResponse(UserOutSerializer(request.user).data), etag)
+
+    async def patch(self, request):
+        serializer = MeUpdateSerializer(request.user, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        user = request.user
+        for field, value in serializer.validated_data.items():
+            setattr(user, field, value)
+        await user.asave(update_fields=list(serializer.validated_data))
+        await user.arefresh_from_db(fields=["profile_version", *User.PROFILE_FIELDS])
+        response = JsonResponse(UserOutSerializer(user).data)
+        return set_validators(response, user_etag(user))
+
+    async def delete(self, request):
+        # Смена поколения отзывает все access/refresh токены пользователя
+        await request.user.arevoke_all_tokens(deactivate=True)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncLogoutView(AsyncAPIView):
+    async def post(self, request):
+        token = request.data.get("refresh")
+        if not token:
+            await request.user.arevoke_all_tokens()
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+        access_payload = decode_token(request.auth, expected_type="access")
+        jti = access_payload.get("jti")
+        exp = access_payload.get("exp")
+        if jti and exp:
+            expires_at = datetime.fromtimestamp(exp, tz=timezone.utc)
+            await RevokedAccessToken.objects.aget_or_create(
+                jti=jti,
+                defaults={"user": request.user, "expires_at": expires_at},
+            )
+            revoked_access_tokens.add(jti, expires_at)
+
+        try:
+            payload = decode_token(token, expected_type="refresh")
+            jti = payload.get("jti")
+            if jti:
+                await RefreshToken.objects.filter(
+                    jti=jti, user=request.user, revoked=False
+                ).aupdate(revoked=True)
+        except jwt.PyJWTError:
+            pass
+
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
@@ -1,35 +1,286 @@
+import copy
+import uuid
+from typing import Optional
+
 import jwt
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache as shared_cache
+from django.db import DEFAULT_DB_ALIAS, transaction
 from rest_framework.authentication import BaseAuthentication, get_authorization_header
 from rest_framework.exceptions import AuthenticationFailed
 
-from .models import RevokedAccessToken
+from .cache import TTLCache, is_shared_cache
+from .revocation import revoked_access_tokens
 from .tokens import decode_token
 
+# Поколения записей кеша пользователей в общем кеше (CACHE_URL): по ним
+# копия в памяти процесса узнает об изменениях, сделанных в других воркерах
+USER_GENERATION_KEY = "users:auth:user-generation:{}"
+ALL_USERS_GENERATION_KEY = "users:auth:user-generation"
+# Ключ поколения должен пережить копии в процессах; если он все же
+# вытеснен, новое значение лишь заставит перечитать пользователя
+GENERATION_TIMEOUT_SEC = 24 * 3600
+
+_user_cache: Optional[TTLCache] = None
+
+
+def _get_user_cache() -> TTLCache:
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = TTLCache(maxsize=settings.AUTH_USER_CACHE_MAX_SIZE)
+    return _user_cache
+
+
+def _generation_keys(user_id) -> list[str]:
+    return [ALL_USERS_GENERATION_KEY, USER_GENERATION_KEY.format(user_id)]
+
+
+def _generation(user_id) -> Optional[str]:
+    """Поколение записи пользователя; None - общего кеша нет."""
+    if not is_shared_cache():
+        return None
+    keys = _generation_keys(user_id)
+    values = shared_cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            shared_cache.add(key, uuid.uuid4().hex, timeout=GENERATION_TIMEOUT_SEC)
+            values[key] = shared_cache.get(key)
+    return ":".join(str(values[key]) for key in keys)
+
+
+async def _ageneration(user_id) -> Optional[str]:
+    """Асинхронный вариант _generation: Redis/Memcached не блокируют цикл."""
+    if not is_shared_cache():
+        return None
+    keys = _generation_keys(user_id)
+    values = await shared_cache.aget_many(keys)
+    for key in keys:
+        if key not in values:
+            await shared_cache.aadd(
+                key, uuid.uuid4().hex, timeout=GENERATION_TIMEOUT_SEC
+            )
+            values[key] = await shared_cache.aget(key)
+    return ":".join(str(values[key]) for key in keys)
+
+
+def _cached_copy(user_id, generation):
+    user = _get_user_cache().get(str(user_id))
+    if user is not None and generation is not None:
+        if user._cache_generation != generation:
+            user = None
+    return user
+
+
+def _cached_user(user_id):
+    """Копия из кеша процесса и поколение для новой записи.
+
+    Без общего кеша копия живет до ``AUTH_USER_CACHE_TTL_SEC``: сброс по
+    сигналам виден только процессу, который изменил пользователя.
+    """
+    if settings.AUTH_USER_CACHE_TTL_SEC <= 0:
+        return None, None
+    # Поколение читается до пользователя: изменение между чтениями даст
+    # несовпадение при следующем обращении, а не устаревшую запись
+    generation = _generation(user_id)
+    return _cached_copy(user_id, generation), generation
+
+
+async def _acached_user(user_id):
+    if settings.AUTH_USER_CACHE_TTL_SEC <= 0:
+        return None, None
+    generation = await _ageneration(user_id)
+    return _cached_copy(user_id, generation), generation
+
+
+def _store_user(user, generation):
+    user._cache_generation = generation
+    _get_user_cache().set(str(user.pk), user, settings.AUTH_USER_CACHE_TTL_SEC)
+
+
+def _request_copy(user, is_current: bool):
+    user = copy.copy(user)
+    user._is_current = is_current
+    return user
+
+
+def get_active_user(user_id):
+    """Активный пользователь по id с кешем в памяти процесса.
+
+    Вместе с пользователем кешируются id его ролей (для RBAC). Каждый вызов
+    возвращает копию, чтобы изменения в запросе не попадали в кеш. У копии
+    ``_is_current`` - соответствует ли она БД на момент запроса: прочитана
+    сейчас или сверена с поколением в общем кеше.
+    """
+    user, generation = _cached_user(user_id)
+    if user is not None:
+        return _request_copy(user, is_current=generation is not None)
+    User = get_user_model()
+    user = User.objects.get(pk=user_id, is_active=True)
+    user._rbac_role_ids = frozenset(user.roles.values_list("id", flat=True))
+    _store_user(user, generation)
+    return _request_copy(user, is_current=True)
+
+
+async def aget_active_user(user_id):
+    """Асинхронный вариант get_active_user на async ORM и async API кеша."""
+    user, generation = await _acached_user(user_id)
+    if user is not None:
+        return _request_copy(user, is_current=generation is not None)
+    User = get_user_model()
+    user = await User.objects.aget(pk=user_id, is_active=True)
+    user._rbac_role_ids = frozenset(
+        [role_id async for role_id in user.roles.values_list("id", flat=True)]
+    )
+    _store_user(user, generation)
+    return _request_copy(user, is_current=True)
+
+
+def _bump_generation(key: str) -> None:
+    if not is_shared_cache():
+        return
+
+    def _bump():
+        shared_cache.set(key, uuid.uuid4().hex, timeout=GENERATION_TIMEOUT_SEC)
+
+    # Повторно после коммита: воркер, перечитавший пользователя до коммита,
+    # получил старые данные с новым поколением
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Сбрасывает копии пользователя в этом процессе и (через общий кеш) в других."""
+    _get_user_cache().delete(str(user_id))
+    _bump_generation(USER_GENERATION_KEY.format(user_id))
+
+
+async def ainvalidate_cached_user(user_id) -> None:
+    """Сброс из async-кода без записи: повтор после коммита не нужен."""
+    _get_user_cache().delete(str(user_id))
+    if is_shared_cache():
+        await shared_cache.aset(
+            USER_GENERATION_KEY.format(user_id),
+            uuid.uuid4().hex,
+            timeout=GENERATION_TIMEOUT_SEC,
+        )
+
+
+def invalidate_cached_user_all() -> None:
+    _get_user_cache().clear()
+    _bump_generation(ALL_USERS_GENERATION_KEY)
+
+
+def decode_bearer_token(request) -> Optional[tuple[str, dict]]:
+    """Токен и payload из заголовка Authorization (None - заголовка нет)."""
+    auth_header = get_authorization_header(request).decode("utf-8")
+    if not auth_header:
+        return None
+
+    parts = auth_header.split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        raise AuthenticationFailed("Invalid Authorization header")
+
+    token = parts[1]
+    try:
+        payload = decode_token(token, expected_type="access")
+    except jwt.PyJWTError:
+        raise AuthenticationFailed("Invalid or expired token")
+    return token, payload
+
+
+def _stored_token_version(user):
+    return (
+        type(user)
+        .objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk=user.pk)
+        .values_list("token_version", flat=True)
+    )
+
+
+def _is_stale(user, current) -> bool:
+    # Копия в кеше процесса отстала (отзыв или вход в другом воркере)
+    return current is not None and current != user.token_version
+
+
+def token_version_is_current(payload: dict, user) -> bool:
+    """Совпадает ли claim ver с поколением токенов пользователя в БД.
+
+    Копию из кеша процесса (до ``AUTH_USER_CACHE_TTL_SEC``) сравнивать нельзя:
+    отзыв в другом воркере она не видит, а токены свежего входа отвергала
+    бы. Поэтому без чтения из БД принимается только копия, прочитанная в
+    этом же запросе или сверенная с поколением в общем кеше.
+    """
+    ver = payload.get("ver", 0)
+    if getattr(user, "_is_current", False) and ver == user.token_version:
+        return True
+    current = _stored_token_version(user).first()
+    if _is_stale(user, current):
+        invalidate_cached_user(user.pk)
+        user.token_version = current
+    return ver == current
+
+
+async def atoken_version_is_current(payload: dict, user) -> bool:
+    ver = payload.get("ver", 0)
+    if getattr(user, "_is_current", False) and ver == user.token_version:
+        return True
+    current = await _stored_token_version(user).afirst()
+    if _is_stale(user, current):
+        await ainvalidate_cached_user(user.pk)
+        user.token_version = current
+    return ver == current
+
+
+def check_token_version(payload: dict, user) -> None:
+    if not token_version_is_current(payload, user):
+        raise AuthenticationFailed("Token revoked")
+
+
+async def acheck_token_version(payload: dict, user) -> None:
+    if not await atoken_version_is_current(payload, user):
+        raise AuthenticationFailed("Token revoked")
+
 
 class RequestUserAuthentication(BaseAuthentication):
     def authenticate(self, request):
-        auth_header = get_authorization_header(request).decode("utf-8")
-        if not auth_header:
+        decoded = decode_bearer_token(request)
+        if decoded is None:
             return None
+        token, payload = decoded
 
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != "bearer":
-            raise AuthenticationFailed("Invalid Authorization header")
+        jti = payload.get("jti")
+        if jti and revoked_access_tokens.is_revoked(jti):
+            raise AuthenticationFailed("Token revoked")
 
-        token = parts[1]
+        User = get_user_model()
         try:
-            payload = decode_token(token, expected_type="access")
-        except jwt.PyJWTError:
-            raise AuthenticationFailed("Invalid or expired token")
+            user = get_active_user(payload.get("sub"))
+        except User.DoesNotExist:
+            raise AuthenticationFailed("User not found or inactive")
+        check_token_version(payload, user)
+
+        return (user, token)
+
+
+class AsyncRequestUserAuthentication:
+    """Аутентификация для нативных async-представлений (ASGI)."""
+
+    async def authenticate(self, request):
+        decoded = decode_bearer_token(request)
+        if decoded is None:
+            return None
+        token, payload = decoded
+
         jti = payload.get("jti")
-        if jti and RevokedAccessToken.objects.filter(jti=jti).exists():
+        if jti and await revoked_access_tokens.ais_revoked(jti):
             raise AuthenticationFailed("Token revoked")
 
         User = get_user_model()
         try:
-            user = User.objects.get(pk=payload.get("sub"), is_active=True)
+            user = await aget_active_user(payload.get("sub"))
         except User.DoesNotExist:
             raise AuthenticationFailed("User not found or inactive")
+        await acheck_token_version(payload, user)
 
         return (user, token)
@@ -0,0 +1,250 @@
+"""Утилиты нагрузочных замеров для management-команд бенчмарков."""
+
+import http.client
+import importlib.util
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient
+
+
+def split_csv(value: str) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+@dataclass
+class LoadResult:
+    name: str
+    concurrency: int
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    queries: Optional[int] = None
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies)
+
+    def summary(self) -> dict:
+        data = {
+            "endpoint": self.name,
+            "requests": self.requests,
+            "errors": self.errors,
+            "concurrency": self.concurrency,
+            "rps": round(self.requests / self.duration, 1) if self.duration else 0.0,
+            "p50_ms": round(percentile(self.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.latencies, 99) * 1000, 2),
+        }
+        if self.queries is not None:
+            data["queries_per_request"] = round(
+                self.queries / max(self.requests, 1), 2
+            )
+        return data
+
+
+def run_load(
+    name: str,
+    make_worker: Callable[[], Callable[[int], bool]],
+    total: int,
+    concurrency: int,
+) -> LoadResult:
+    """Выполняет total вызовов в concurrency потоках.
+
+    make_worker вызывается один раз на поток и возвращает функцию запроса
+    (номер запроса -> успех), что позволяет держать keep-alive соединение
+    на поток.
+    """
+    result = LoadResult(name=name, concurrency=concurrency)
+    counter = iter(range(total))
+    lock = threading.Lock()
+
+    def worker():
+        send = make_worker()
+        latencies, errors = [], 0
+        while True:
+            with lock:
+                number = next(counter, None)
+            if number is None:
+                break
+            started = time.perf_counter()
+            try:
+                ok = send(number)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+        return latencies, errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+        for future in futures:
+            latencies, errors = future.result()
+            result.latencies.extend(latencies)
+            result.errors += errors
+    result.duration = time.perf_counter() - started
+    return result
+
+
+class HTTPJSONClient:
+    """Минимальный keep-alive JSON-клиент поверх http.client."""
+
+    def __init__(self, host: str, port: int, timeout: float = 30):
+        self.host, self.port, self.timeout = host, port, timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, data=None, token: str = None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = json.dumps(data) if data is not None else None
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout
+                )
+            try:
+                self._conn.request(method, path, body=body, headers=headers)
+                response = self._conn.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Сервер закрыл keep-alive соединение - переподключаемся
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+        content = json.loads(payload) if payload else None
+        return response.status, content
+
+
+class InProcessJSONClient:
+    """Интерфейс HTTPJSONClient поверх тестового клиента DRF: без сети и сервера.
+
+    Запрос проходит весь стек Django (middleware, аутентификация, RBAC) в
+    текущем процессе, поэтому замер показывает стоимость кода, а не сети.
+    """
+
+    def __init__(self):
+        host = next(
+            (h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")),
+            "localhost",
+        )
+        self._client = APIClient(SERVER_NAME=host)
+
+    def request(self, method: str, path: str, data=None, token: str = None):
+        extra = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        body = json.dumps(data) if data is not None else ""
+        response = self._client.generic(
+            method, path, body, content_type="application/json", **extra
+        )
+        content = json.loads(response.content) if response.content else None
+        return response.status_code, content
+
+
+def require_uvicorn() -> None:
+    if importlib.util.find_spec("uvicorn") is None:
+        raise CommandError(
+            "Нужен uvicorn: pip install -e .[server] (или pip install uvicorn)"
+        )
+
+
+def start_uvicorn(
+    host: str, port: int, workers: int = 1, env: Optional[dict] = None
+) -> subprocess.Popen:
+    """Запускает config.asgi под uvicorn и ждет, пока порт начнет принимать."""
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "config.asgi:application",
+            "--host",
+            host,
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **(env or {})},
+    )
+    if not wait_for_port(host, port):
+        server.kill()
+        raise CommandError("uvicorn не запустился за 30 секунд")
+    return server
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    server.wait(timeout=10)
+
+
+def git_revision() -> Optional[str]:
+    """Текущий коммит для сопоставления результатов замеров."""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def wait_for_port(host: str, port: int, timeout: float = 30) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def format_table(rows: list[dict], columns: list[str]) -> str:
+    widths = {
+        column: max([len(column), *(len(str(row.get(column, ""))) for row in rows)])
+        for column in columns
+    }
+    lines = ["  ".join(column.ljust(widths[column]) for column in columns)]
+    for row in rows:
+        cells = (str(row.get(column, "")).ljust(widths[column]) for column in columns)
+        lines.append("  ".join(cells))
+    return "\n".join(lines)
+
+
+def write_json_report(command, path: str, data) -> None:
+    """Сохраняет результаты замера в JSON (опция --json) и сообщает путь."""
+    Path(path).write_text(
+        json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    command.stdout.write(command.style.SUCCESS(f"✅ Результаты сохранены: {path}"))
@@ -0,0 +1,47 @@
+"""Условные GET (ETag / Last-Modified) для DRF-представлений.
+
+Валидаторы объекта вычисляются до сериализации, списка - по выбранной
+странице: если ``If-None-Match`` или ``If-Modified-Since`` совпали,
+представление возвращает 304 без тела.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def make_etag(*parts, weak: bool = False) -> str:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def user_etag(user) -> str:
+    return make_etag("user", user.pk, user.profile_version)
+
+
+def _timestamp(last_modified: Optional[datetime]) -> Optional[int]:
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def set_validators(response, etag: str, last_modified: Optional[datetime] = None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(_timestamp(last_modified))
+    # Ответ зависит от пользователя: кешировать только у клиента с ревалидацией
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_response(
+    request, etag: str, last_modified: Optional[datetime] = None
+):
+    """304 (или 412 для If-Match) по заголовкам запроса, иначе None."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=_timestamp(last_modified)
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
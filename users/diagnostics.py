@@ -0,0 +1,32 @@
+"""Сведения о соединениях с БД текущего процесса для диагностики.
+
+Пул (psycopg 3) и постоянные соединения живут в памяти воркера, поэтому
+ответ описывает только процесс, который обработал запрос (см. ``pid``).
+"""
+
+import os
+
+from django.db import connections
+
+
+def connection_stats(alias: str) -> dict:
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    # pool есть только у бэкенда postgresql с OPTIONS["pool"]
+    pool = getattr(connection, "pool", None)
+    return {
+        "alias": alias,
+        "vendor": connection.vendor,
+        "conn_max_age": settings_dict["CONN_MAX_AGE"],
+        "conn_health_checks": settings_dict["CONN_HEALTH_CHECKS"],
+        # Соединение потока, обработавшего запрос
+        "connected": connection.connection is not None,
+        "pool": pool.get_stats() if pool is not None else None,
+    }
+
+
+def database_diagnostics() -> dict:
+    return {
+        "pid": os.getpid(),
+        "databases": [connection_stats(alias) for alias in connections],
+    }
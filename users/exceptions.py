@@ -1,7 +1,20 @@
-from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    AuthenticationFailed,
+    NotAuthenticated,
+)
 from rest_framework.views import exception_handler
 
 
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Сервис перегружен, повторите попытку позже"
+    default_code = "password_hashing_busy"
+    # DRF выставит заголовок Retry-After
+    wait = 1
+
+
 def custom_exception_handler(exc, context):
     response = exception_handler(exc, context)
 
@@ -0,0 +1,45 @@
+"""Потоковая выгрузка строк в NDJSON/CSV.
+
+Функции принимают итератор словарей (обычно ``values().iterator()``) и
+отдают байтовые куски для ``StreamingHttpResponse``; в памяти одновременно
+находится только текущая пачка строк.
+"""
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+# Строк в одном куске ответа: меньше системных вызовов, чем по строке
+ROWS_PER_CHUNK = 500
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def ndjson_stream(rows: Iterable[dict], fields: list[str]) -> Iterator[bytes]:
+    for batch in _batches(rows, ROWS_PER_CHUNK):
+        yield "".join(
+            json.dumps({field: row[field] for field in fields}, ensure_ascii=False)
+            + "\n"
+            for row in batch
+        ).encode("utf-8")
+
+
+class _Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку, а не пишет."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def csv_stream(rows: Iterable[dict], fields: list[str]) -> Iterator[bytes]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields).encode("utf-8")
+    for batch in _batches(rows, ROWS_PER_CHUNK):
+        yield "".join(
+            writer.writerow([row[field] for field in fields]) for row in batch
+        ).encode("utf-8")
@@ -0,0 +1,18 @@
+import django_filters
+
+from .models import Item
+from .search import filter_items_by_title
+
+
+class ItemFilter(django_filters.FilterSet):
+    search = django_filters.CharFilter(
+        method="filter_search",
+        label="Поиск по названию: слова запроса - начала слов названия",
+    )
+
+    class Meta:
+        model = Item
+        fields = ["search"]
+
+    def filter_search(self, queryset, name, value):
+        return filter_items_by_title(queryset, value)
@@ -0,0 +1,194 @@
+"""Хеширование паролей в ограниченном пуле воркеров.
+
+bcrypt намеренно дорогой, поэтому логин/регистрация выполняют его не в
+потоке запроса, а в отдельном пуле (потоки - bcrypt отпускает GIL, либо
+процессы). Число одновременно принятых задач ограничено: если пул и его
+очередь заняты, запрос сразу получает 503, а дешевые эндпоинты не ждут.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections.abc import Iterator, Sequence
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Optional
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from .exceptions import PasswordHashingBusy
+
+
+class PasswordHashingPool:
+    def __init__(self, executor: str, workers: int, max_queue: int):
+        self.executor_type = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_type == "process":
+                        # spawn: безопасно для многопоточных серверов
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                            initializer=django.setup,
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers,
+                            thread_name_prefix="password-hashing",
+                        )
+        return self._executor
+
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_pool: Optional[PasswordHashingPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool() -> PasswordHashingPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashingPool(
+                    executor=settings.PASSWORD_HASHING_EXECUTOR,
+                    workers=settings.PASSWORD_HASHING_WORKERS or os.cpu_count() or 1,
+                    max_queue=settings.PASSWORD_HASHING_MAX_QUEUE,
+                )
+    return _pool
+
+
+def reset_hashing_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+
+
+# Меньше паролей дешевле посчитать в текущем процессе, чем запустить пул:
+# каждый spawn-процесс импортирует Django и выполняет django.setup()
+BATCH_POOL_MIN_PASSWORDS = 64
+
+
+class BatchPasswordHasher:
+    """Пакетное хеширование для загрузчиков данных (``load_mock_data``).
+
+    В отличие от пула запросов очередь не ограничена: ``submit`` сразу
+    ставит в процессы всю пачку и возвращает ленивый итератор хешей, так что
+    вызывающий код может писать в БД предыдущую пачку, пока считается
+    следующая. Каждый пароль хешируется отдельно со своей солью, даже если
+    значения совпадают. Пул создается при первой пачке не меньше
+    ``min_pool_passwords``; при ``workers=1`` не создается вовсе.
+    """
+
+    def __init__(
+        self, workers: int = 0, min_pool_passwords: int = BATCH_POOL_MIN_PASSWORDS
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_pool_passwords = min_pool_passwords
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "BatchPasswordHasher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def submit(self, raw_passwords: Sequence[str]) -> Iterator[str]:
+        if self._executor is None:
+            if self.workers <= 1 or len(raw_passwords) < self.min_pool_passwords:
+                return map(hashers.make_password, raw_passwords)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        # Куски по нескольку паролей на воркер: меньше накладных на IPC
+        chunksize = max(1, len(raw_passwords) // (self.workers * 4))
+        return self._executor.map(
+            hashers.make_password, raw_passwords, chunksize=chunksize
+        )
+
+
+def make_password(raw_password: str) -> str:
+    return get_hashing_pool().run(hashers.make_password, raw_password)
+
+
+def check_password(raw_password: str, encoded: str) -> bool:
+    return get_hashing_pool().run(hashers.check_password, raw_password, encoded)
+
+
+def verify_user_password(user, raw_password: str) -> bool:
+    """Аналог user.check_password с хешированием в пуле.
+
+    Как и в Django, хеш устаревшего формата пересчитывается после успешной
+    проверки.
+    """
+    if not check_password(raw_password, user.password):
+        return False
+    preferred = hashers.get_hasher()
+    hasher = hashers.identify_hasher(user.password)
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(
+        user.password
+    ):
+        user.password = make_password(raw_password)
+        user.save(update_fields=["password"])
+    return True
+
+
+async def amake_password(raw_password: str) -> str:
+    future = get_hashing_pool().submit(hashers.make_password, raw_password)
+    return await asyncio.wrap_future(future)
+
+
+async def acheck_password(raw_password: str, encoded: str) -> bool:
+    future = get_hashing_pool().submit(hashers.check_password, raw_password, encoded)
+    return await asyncio.wrap_future(future)
+
+
+async def averify_user_password(user, raw_password: str) -> bool:
+    if not await acheck_password(raw_password, user.password):
+        return False
+    preferred = hashers.get_hasher()
+    hasher = hashers.identify_hasher(user.password)
+    if hasher.algorithm != preferred.algorithm or preferred.must_update(
+        user.password
+    ):
+        user.password = await amake_password(raw_password)
+        await user.asave(update_fields=["password"])
+    return True
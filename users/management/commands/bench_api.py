@@ -0,0 +1,322 @@
+import json
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.benchmark import (
+    HTTPJSONClient,
+    InProcessJSONClient,
+    format_table,
+    git_revision,
+    require_uvicorn,
+    run_load,
+    split_csv,
+    start_uvicorn,
+    stop_server,
+    write_json_report,
+)
+from users.hashing import make_password
+from users.models import AccessRoleRule, BusinessElement, Item, ItemChange, Role
+
+ENDPOINTS = (
+    "register",
+    "login",
+    "refresh",
+    "me",
+    "items_list",
+    "items_retrieve",
+    "items_update",
+)
+# Эндпоинтам с токеном каждый клиент получает свою пару токенов заранее
+TOKEN_FREE_ENDPOINTS = {"register", "login"}
+COLUMNS = [
+    "endpoint",
+    "requests",
+    "errors",
+    "concurrency",
+    "rps",
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "queries_per_request",
+]
+COMPARE_COLUMNS = ["endpoint", "rps", "base_rps", "rps_diff", "p95_ms", "base_p95_ms"]
+
+BENCH_EMAIL = "bench-api@example.com"
+BENCH_PASSWORD = "Bench-Passw0rd!"
+BENCH_ROLE = "bench"
+
+
+def percent_diff(value: float, base: float) -> str:
+    return f"{(value - base) / base * 100:+.1f}%" if base else "-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочный замер эндпоинтов auth и items: req/s, p50/p95/p99 и "
+        "SQL-запросов на запрос; в процессе (тестовый клиент) или под uvicorn"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            choices=["inprocess", "server"],
+            default="inprocess",
+            help="inprocess - тестовый клиент без сети, server - локальный "
+            "uvicorn (по умолчанию inprocess)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Число запросов на эндпоинт (по умолчанию 500)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Число параллельных клиентов (по умолчанию 8)",
+        )
+        parser.add_argument(
+            "--endpoints",
+            default=",".join(ENDPOINTS),
+            help=f"Эндпоинты через запятую: {', '.join(ENDPOINTS)}",
+        )
+        parser.add_argument(
+            "--items",
+            type=int,
+            default=200,
+            help="Сколько items создать тестовому пользователю (по умолчанию 200)",
+        )
+        parser.add_argument(
+            "--query-sample",
+            type=int,
+            default=20,
+            help="Запросов для подсчета SQL на запрос (по умолчанию 20)",
+        )
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8766)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Число воркеров uvicorn в режиме server (по умолчанию 1)",
+        )
+        parser.add_argument("--json", help="Сохранить результаты в JSON файл")
+        parser.add_argument(
+            "--compare", help="JSON прошлого запуска для сравнения req/s и p95"
+        )
+
+    def handle(self, *args, **options):
+        endpoints = split_csv(options["endpoints"])
+        unknown = set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Неизвестные эндпоинты: {', '.join(sorted(unknown))}")
+        if min(options["requests"], options["concurrency"], options["items"]) < 1:
+            raise CommandError("--requests, --concurrency и --items должны быть > 0")
+        baseline = self._read_baseline(options["compare"])
+
+        item_ids = self._seed(options["items"])
+        run_id = uuid.uuid4().hex[:8]
+        server = None
+        if options["mode"] == "server":
+            require_uvicorn()
+            server = start_uvicorn(options["host"], options["port"], options["workers"])
+            host, port = options["host"], options["port"]
+
+            def client_factory():
+                return HTTPJSONClient(host, port)
+
+        else:
+            client_factory = InProcessJSONClient
+
+        rows = []
+        try:
+            for endpoint in endpoints:
+                result = self._run_endpoint(
+                    endpoint, client_factory, item_ids, run_id, options
+                )
+                row = result.summary()
+                # SQL считается в этом процессе на выборке тех же запросов:
+                # в режиме server запросы выполняет uvicorn
+                row["queries_per_request"] = self._count_queries(
+                    endpoint, item_ids, run_id, options["query_sample"]
+                )
+                rows.append(row)
+                self.stdout.write(
+                    f"  ✔ {endpoint}: {row['rps']} req/s, p99 {row['p99_ms']} ms, "
+                    f"{row['queries_per_request']} SQL/запрос"
+                )
+        finally:
+            if server is not None:
+                stop_server(server)
+            get_user_model().objects.filter(
+                email__startswith=f"bench-reg-{run_id}-"
+            ).delete()
+
+        self.stdout.write(format_table(rows, COLUMNS))
+        if baseline is not None:
+            self._print_comparison(rows, baseline)
+        if options["json"]:
+            report = {
+                "revision": git_revision(),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "mode": options["mode"],
+                "requests": options["requests"],
+                "concurrency": options["concurrency"],
+                "workers": options["workers"] if server else None,
+                "results": rows,
+            }
+            write_json_report(self, options["json"], report)
+
+    def _read_baseline(self, path):
+        if not path:
+            return None
+        try:
+            report = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Не удалось прочитать {path}: {exc}")
+        return {row["endpoint"]: row for row in report.get("results", [])}
+
+    def _print_comparison(self, rows: list[dict], baseline: dict) -> None:
+        compared = []
+        for row in rows:
+            base = baseline.get(row["endpoint"])
+            if base is None:
+                continue
+            compared.append(
+                {
+                    "endpoint": row["endpoint"],
+                    "rps": row["rps"],
+                    "base_rps": base["rps"],
+                    "rps_diff": percent_diff(row["rps"], base["rps"]),
+                    "p95_ms": row["p95_ms"],
+                    "base_p95_ms": base["p95_ms"],
+                }
+            )
+        self.stdout.write("\nСравнение с базовым запуском:")
+        self.stdout.write(format_table(compared, COMPARE_COLUMNS))
+
+    def _seed(self, item_count: int) -> list[int]:
+        """Тестовый пользователь с правами на свои items и item_count items."""
+        element, _ = BusinessElement.objects.get_or_create(
+            code="items", defaults={"name": "Items"}
+        )
+        role, _ = Role.objects.get_or_create(name=BENCH_ROLE)
+        AccessRoleRule.objects.update_or_create(
+            role=role,
+            element=element,
+            defaults={"read": True, "create": True, "update": True, "delete": True},
+        )
+        User = get_user_model()
+        user, _ = User.objects.get_or_create(
+            email=BENCH_EMAIL,
+            defaults={"first_name": "Bench", "last_name": "API"},
+        )
+        user.password = make_password(BENCH_PASSWORD)
+        user.is_active = True
+        user.save(update_fields=["password", "is_active"])
+        user.roles.add(role)
+
+        missing = item_count - user.items.count()
+        if missing > 0:
+            items = Item.objects.bulk_create(
+                Item(title=f"Bench item {i}", owner=user) for i in range(missing)
+            )
+            ItemChange.objects.bulk_create(
+                ItemChange.for_items(items, ItemChange.OP_UPSERT)
+            )
+        return list(user.items.order_by("id").values_list("id", flat=True)[:item_count])
+
+    def _login(self, client) -> dict:
+        status, tokens = client.request(
+            "POST",
+            "/api/auth/login/",
+            {"email": BENCH_EMAIL, "password": BENCH_PASSWORD},
+        )
+        if status != 200:
+            raise CommandError(f"Логин тестового пользователя: HTTP {status}")
+        return tokens
+
+    def _make_sender(self, endpoint: str, client, tokens, item_ids, run_id: str):
+        state = dict(tokens or {})
+
+        def send(number: int) -> bool:
+            item_id = item_ids[number % len(item_ids)]
+            if endpoint == "register":
+                data = {
+                    "email": f"bench-reg-{run_id}-{number}@example.com",
+                    "first_name": "Bench",
+                    "last_name": "Register",
+                    "password": BENCH_PASSWORD,
+                    "password2": BENCH_PASSWORD,
+                }
+                status, _ = client.request("POST", "/api/auth/register/", data)
+                return status == 201
+            if endpoint == "login":
+                data = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+                status, _ = client.request("POST", "/api/auth/login/", data)
+            elif endpoint == "refresh":
+                data = {"refresh": state["refresh"]}
+                status, body = client.request("POST", "/api/auth/refresh/", data)
+                # При ротации клиент продолжает цепочку новым refresh-токеном
+                if status == 200 and body.get("refresh"):
+                    state["refresh"] = body["refresh"]
+            elif endpoint == "me":
+                status, _ = client.request(
+                    "GET", "/api/auth/me/", token=state["access"]
+                )
+            elif endpoint == "items_list":
+                status, _ = client.request("GET", "/api/items/", token=state["access"])
+            elif endpoint == "items_retrieve":
+                status, _ = client.request(
+                    "GET", f"/api/items/{item_id}/", token=state["access"]
+                )
+            else:
+                status, _ = client.request(
+                    "PATCH",
+                    f"/api/items/{item_id}/",
+                    {"title": f"Bench item {number}"},
+                    token=state["access"],
+                )
+            return status == 200
+
+        return send
+
+    def _run_endpoint(self, endpoint, client_factory, item_ids, run_id, options):
+        concurrency = options["concurrency"]
+        tokens = []
+        if endpoint not in TOKEN_FREE_ENDPOINTS:
+            # Логины до замера: bcrypt не должен попадать в задержки
+            login_client = client_factory()
+            tokens = [self._login(login_client) for _ in range(concurrency)]
+
+        def make_worker():
+            return self._make_sender(
+                endpoint,
+                client_factory(),
+                tokens.pop() if tokens else None,
+                item_ids,
+                run_id,
+            )
+
+        return run_load(endpoint, make_worker, options["requests"], concurrency)
+
+    def _count_queries(
+        self, endpoint, item_ids, run_id: str, sample: int
+    ) -> Optional[float]:
+        if sample < 1:
+            return None
+        client = InProcessJSONClient()
+        tokens = None if endpoint in TOKEN_FREE_ENDPOINTS else self._login(client)
+        send = self._make_sender(endpoint, client, tokens, item_ids, f"{run_id}-q")
+        with CaptureQueriesContext(connection) as queries:
+            for number in range(sample):
+                send(number)
+        return round(len(queries) / sample, 2)
@@ -0,0 +1,150 @@
+import subprocess
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from users.benchmark import (
+    HTTPJSONClient,
+    format_table,
+    require_uvicorn,
+    run_load,
+    split_csv,
+    start_uvicorn,
+    stop_server,
+    write_json_report,
+)
+from users.hashing import make_password
+
+STACKS = {"sync": False, "async": True}
+ENDPOINTS = ("me", "refresh", "login")
+COLUMNS = [
+    "stack",
+    "endpoint",
+    "requests",
+    "errors",
+    "concurrency",
+    "rps",
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+]
+
+BENCH_EMAIL = "bench-auth@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает req/s и задержки sync (DRF) и async эндпоинтов "
+        "аутентификации под uvicorn"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Число запросов на эндпоинт (по умолчанию 2000)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=32,
+            help="Число параллельных клиентов (по умолчанию 32)",
+        )
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Число воркеров uvicorn (по умолчанию 1)",
+        )
+        parser.add_argument(
+            "--stacks",
+            default="sync,async",
+            help="Сравниваемые стеки через запятую: sync, async",
+        )
+        parser.add_argument(
+            "--endpoints",
+            default=",".join(ENDPOINTS),
+            help="Эндпоинты через запятую: me, refresh, login",
+        )
+        parser.add_argument("--json", help="Сохранить результаты в JSON файл")
+
+    def handle(self, *args, **options):
+        require_uvicorn()
+        stacks = split_csv(options["stacks"])
+        endpoints = split_csv(options["endpoints"])
+        unknown = set(stacks) - set(STACKS) | set(endpoints) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Неизвестные значения: {', '.join(sorted(unknown))}")
+
+        self._seed_user()
+        rows = []
+        for stack in stacks:
+            self.stdout.write(f"▶ Стек {stack}: запуск uvicorn")
+            server = self._start_server(stack, options)
+            try:
+                for endpoint in endpoints:
+                    result = self._run_endpoint(endpoint, options)
+                    rows.append({"stack": stack, **result.summary()})
+                    self.stdout.write(
+                        f"  ✔ {endpoint}: {rows[-1]['rps']} req/s, "
+                        f"p99 {rows[-1]['p99_ms']} ms"
+                    )
+            finally:
+                stop_server(server)
+
+        self.stdout.write(format_table(rows, COLUMNS))
+        if options["json"]:
+            write_json_report(self, options["json"], rows)
+
+    def _seed_user(self) -> None:
+        User = get_user_model()
+        user, _ = User.objects.get_or_create(
+            email=BENCH_EMAIL,
+            defaults={"first_name": "Bench", "last_name": "Auth"},
+        )
+        user.password = make_password(BENCH_PASSWORD)
+        user.is_active = True
+        user.save(update_fields=["password", "is_active"])
+
+    def _start_server(self, stack: str, options) -> subprocess.Popen:
+        env = {
+            "ASYNC_AUTH_VIEWS": str(STACKS[stack]),
+            # Без ротации один refresh-токен переиспользуется всеми клиентами
+            "JWT_ROTATE_REFRESH_TOKENS": "False",
+        }
+        return start_uvicorn(
+            options["host"], options["port"], options["workers"], env=env
+        )
+
+    def _run_endpoint(self, endpoint: str, options):
+        host, port = options["host"], options["port"]
+        credentials = {"email": BENCH_EMAIL, "password": BENCH_PASSWORD}
+        status, tokens = HTTPJSONClient(host, port).request(
+            "POST", "/api/auth/login/", credentials
+        )
+        if status != 200:
+            raise CommandError(f"Логин тестового пользователя: HTTP {status}")
+
+        def make_worker():
+            client = HTTPJSONClient(host, port)
+            if endpoint == "me":
+                request = ("GET", "/api/auth/me/", None, tokens["access"])
+            elif endpoint == "refresh":
+                data = {"refresh": tokens["refresh"]}
+                request = ("POST", "/api/auth/refresh/", data, None)
+            else:
+                request = ("POST", "/api/auth/login/", credentials, None)
+
+            def send(_number: int) -> bool:
+                status, _ = client.request(*request)
+                return status == 200
+
+            return send
+
+        return run_load(
+            endpoint, make_worker, options["requests"], options["concurrency"]
+        )
@@ -0,0 +1,104 @@
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from users.benchmark import format_table, write_json_report
+from users.models import Item
+from users.serializers import ItemSerializer
+from users.views import ItemViewSet
+
+COLUMNS = ["path", "rows", "median_ms", "min_ms", "peak_mem_kb", "bytes"]
+
+
+def serializer_page(size: int) -> list:
+    queryset = Item.objects.select_related("owner").order_by("id")[:size]
+    return ItemSerializer(queryset, many=True).data
+
+
+def values_page(size: int, fields: list[str]) -> list:
+    queryset = Item.objects.order_by("id")
+    rows = ItemViewSet.values_for_fields(queryset, fields)[:size]
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает время и память сериализации страницы items: ItemSerializer "
+        "против values() и ?fields=id,title"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10000,
+            help="Размер страницы (по умолчанию 10000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="Число повторов каждого варианта (по умолчанию 5)",
+        )
+        parser.add_argument("--json", help="Сохранить результаты в JSON файл")
+
+    def handle(self, *args, **options):
+        size = options["rows"]
+        with transaction.atomic():
+            # Недостающие строки создаются только на время замера
+            self._ensure_rows(size)
+            all_fields = list(ItemViewSet.list_field_sources)
+            variants = {
+                "serializer": lambda: serializer_page(size),
+                "values": lambda: values_page(size, all_fields),
+                "values ?fields=id,title": lambda: values_page(size, ["id", "title"]),
+            }
+            rows = [
+                self._measure(name, build, options["repeat"])
+                for name, build in variants.items()
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write(format_table(rows, COLUMNS))
+        if options["json"]:
+            write_json_report(self, options["json"], rows)
+
+    def _ensure_rows(self, size: int) -> None:
+        missing = size - Item.objects.count()
+        if missing <= 0:
+            return
+        User = get_user_model()
+        owner, _ = User.objects.get_or_create(
+            email="bench-items@example.com",
+            defaults={"first_name": "Bench", "last_name": "Items"},
+        )
+        Item.objects.bulk_create(
+            (Item(title=f"Bench item {i}", owner=owner) for i in range(missing)),
+            batch_size=1000,
+        )
+        self.stdout.write(f"ℹ️ Временно создано items: {missing}")
+
+    def _measure(self, name: str, build, repeat: int) -> dict:
+        renderer = JSONRenderer()
+        timings, peak, body = [], 0, b""
+        for _ in range(repeat):
+            tracemalloc.start()
+            started = time.perf_counter()
+            data = build()
+            body = renderer.render(data)
+            timings.append(time.perf_counter() - started)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return {
+            "path": name,
+            "rows": len(data),
+            "median_ms": round(statistics.median(timings) * 1000, 1),
+            "min_ms": round(min(timings) * 1000, 1),
+            "peak_mem_kb": round(peak / 1024),
+            "bytes": len(body),
+        }
@@ -0,0 +1,275 @@
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from users.benchmark import format_table, write_json_report
+from users.models import RefreshToken, RevokedAccessToken
+from users.purge import expired_tokens
+
+COLUMNS = ["query", "rows", "before_ms", "after_ms", "speedup"]
+BENCH_EMAIL_PREFIX = "bench-tokens-"
+
+# Распределение как у живой системы: refresh-токены за 8 дней при сроке жизни
+# 7 дней, 90% отозваны ротацией; отозванные access-токены - за последний час
+REFRESH_SPAN_SEC = 8 * 24 * 3600
+REFRESH_LIFETIME_SEC = 7 * 24 * 3600
+ACCESS_SPAN_SEC = 3600
+ACCESS_LIFETIME_SEC = 15 * 60
+POLL_WINDOW_SEC = 30
+
+# {span} и {lifetime} подставляет format(), %(...)s - параметры запроса.
+# Строки генерирует сама СУБД: g - номер строки, created_at равномерно
+# распределен по последним span секундам, владелец - g по модулю числа
+# пользователей, у каждого пользователя активен каждый десятый токен
+PG_FILL_SQL = {
+    "refresh": (
+        "INSERT INTO users_refreshtoken "
+        "(jti, user_id, created_at, expires_at, revoked, replaced_by) "
+        "SELECT 'bt-' || g, u.user_id, "
+        "%(now)s - (g * {span} / %(count)s) * interval '1 second', "
+        "%(now)s + ({lifetime} - g * {span} / %(count)s) * interval '1 second', "
+        "(g / %(users)s) %% 10 <> 0, NULL "
+        "FROM generate_series(1::bigint, %(count)s) AS g "
+        "JOIN bench_token_users u ON u.n = g %% %(users)s"
+    ),
+    "access": (
+        "INSERT INTO users_revokedaccesstoken (jti, user_id, created_at, expires_at) "
+        "SELECT 'bta-' || g, u.user_id, "
+        "%(now)s - (g * {span} / %(count)s) * interval '1 second', "
+        "%(now)s + ({lifetime} - g * {span} / %(count)s) * interval '1 second' "
+        "FROM generate_series(1::bigint, %(count)s) AS g "
+        "JOIN bench_token_users u ON u.n = g %% %(users)s"
+    ),
+}
+SQLITE_FILL_SQL = {
+    "refresh": (
+        "WITH RECURSIVE seq(g) AS "
+        "(SELECT 1 UNION ALL SELECT g + 1 FROM seq WHERE g < %(count)s) "
+        "INSERT INTO users_refreshtoken "
+        "(jti, user_id, created_at, expires_at, revoked, replaced_by) "
+        "SELECT 'bt-' || g, u.user_id, "
+        "datetime(%(now)s, -(g * {span} / %(count)s) || ' seconds'), "
+        "datetime(%(now)s, ({lifetime} - g * {span} / %(count)s) || ' seconds'), "
+        "(g / %(users)s) %% 10 <> 0, NULL "
+        "FROM seq JOIN bench_token_users u ON u.n = g %% %(users)s"
+    ),
+    "access": (
+        "WITH RECURSIVE seq(g) AS "
+        "(SELECT 1 UNION ALL SELECT g + 1 FROM seq WHERE g < %(count)s) "
+        "INSERT INTO users_revokedaccesstoken (jti, user_id, created_at, expires_at) "
+        "SELECT 'bta-' || g, u.user_id, "
+        "datetime(%(now)s, -(g * {span} / %(count)s) || ' seconds'), "
+        "datetime(%(now)s, ({lifetime} - g * {span} / %(count)s) || ' seconds') "
+        "FROM seq JOIN bench_token_users u ON u.n = g %% %(users)s"
+    ),
+}
+FILL_SQL = {"postgresql": PG_FILL_SQL, "sqlite": SQLITE_FILL_SQL}
+
+
+def token_queries(user_id, jti: str, now: datetime) -> dict:
+    """Запросы к таблицам токенов из кода API и очистки."""
+    refresh = RefreshToken.objects
+    revoked = RevokedAccessToken.objects
+    poll_since = now - timedelta(seconds=POLL_WINDOW_SEC)
+    batch = settings.TOKEN_PURGE_BATCH_SIZE
+    return {
+        # Контроль: уникальный индекс по jti был и до миграции
+        "refresh_by_jti": refresh.filter(jti=jti, revoked=False),
+        "active_sessions": refresh.filter(user_id=user_id, revoked=False),
+        "revoked_by_user": refresh.filter(user_id=user_id, revoked=True),
+        # Пачка purge_tokens
+        "expired_refresh": expired_tokens(RefreshToken, now).values_list(
+            "id", "expires_at"
+        )[:batch],
+        "revocation_poll": revoked.filter(
+            expires_at__gt=now, created_at__gte=poll_since
+        ).values_list("jti", "expires_at", "created_at"),
+        "expired_revoked": expired_tokens(RevokedAccessToken, now).values_list(
+            "id", "expires_at"
+        )[:batch],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает планы и задержки запросов к таблицам токенов до и после "
+        "индексов миграции 0010_token_indexes. Данные и удаление индексов "
+        "откатываются; таблицы блокируются на время замера - не запускайте "
+        "на рабочей БД"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=200000,
+            help="Refresh-токенов (по умолчанию 200000; для Postgres "
+            "показательно от 50000000)",
+        )
+        parser.add_argument(
+            "--revoked-rows",
+            type=int,
+            help="Отозванных access-токенов (по умолчанию --rows / 10)",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=1000,
+            help="Пользователей, между которыми делятся токены (по умолчанию 1000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Число повторов каждого запроса (по умолчанию 20)",
+        )
+        parser.add_argument(
+            "--plans", action="store_true", help="Напечатать полные планы EXPLAIN"
+        )
+        parser.add_argument("--json", help="Сохранить результаты в JSON файл")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in FILL_SQL:
+            raise CommandError(f"Поддерживаются Postgres и SQLite, а не {vendor}")
+        if min(options["rows"], options["users"], options["repeat"]) < 1:
+            raise CommandError("--rows, --users и --repeat должны быть > 0")
+        revoked_rows = options["revoked_rows"]
+        if revoked_rows is None:
+            revoked_rows = max(1, options["rows"] // 10)
+
+        with transaction.atomic():
+            now = datetime.now(timezone.utc)
+            samples = self._fill(vendor, now, options, revoked_rows)
+            after = self._measure_all(samples, now)
+            self._restore_old_indexes()
+            before = self._measure_all(samples, now)
+            transaction.set_rollback(True)
+
+        rows = []
+        for name, new in after.items():
+            old = before[name]
+            speedup = old["median_ms"] / new["median_ms"] if new["median_ms"] else 0
+            rows.append(
+                {
+                    "query": name,
+                    "rows": new["rows"],
+                    "before_ms": old["median_ms"],
+                    "after_ms": new["median_ms"],
+                    "speedup": f"{speedup:.1f}x" if speedup else "-",
+                    "before_plan": old["plan"],
+                    "after_plan": new["plan"],
+                }
+            )
+
+        self.stdout.write(format_table(rows, COLUMNS))
+        for row in rows:
+            before_plan, after_plan = row["before_plan"], row["after_plan"]
+            if not options["plans"]:
+                before_plan = before_plan.splitlines()[0]
+                after_plan = after_plan.splitlines()[0]
+            self.stdout.write(f"\n{row['query']}:")
+            self.stdout.write(f"  до:    {before_plan}")
+            self.stdout.write(f"  после: {after_plan}")
+        if options["json"]:
+            report = {
+                "vendor": vendor,
+                "refresh_rows": options["rows"],
+                "revoked_rows": revoked_rows,
+                "users": options["users"],
+                "results": rows,
+            }
+            write_json_report(self, options["json"], report)
+
+    def _fill(self, vendor, now, options, revoked_rows) -> list[tuple]:
+        """Временные пользователи и токены; возвращает пары (user_id, jti).
+
+        Строки генерирует сама СУБД, Python не участвует в их передаче.
+        """
+        user_count, repeat = options["users"], options["repeat"]
+        User = get_user_model()
+        User.objects.bulk_create(
+            (
+                User(
+                    email=f"{BENCH_EMAIL_PREFIX}{i}@example.com",
+                    first_name="Bench",
+                    last_name="Tokens",
+                )
+                for i in range(user_count)
+            ),
+            batch_size=1000,
+        )
+        if vendor == "sqlite":
+            # datetime() SQLite не разбирает микросекунды и смещение
+            now = now.strftime("%Y-%m-%d %H:%M:%S")
+        params = {"now": now, "users": user_count}
+        with connection.cursor() as cursor:
+            # Номер -> id пользователя: генератор строк соединяется по n
+            cursor.execute(
+                "CREATE TEMPORARY TABLE bench_token_users AS "
+                "SELECT ROW_NUMBER() OVER (ORDER BY id) - 1 AS n, id AS user_id "
+                "FROM users_user WHERE email LIKE %s",
+                [f"{BENCH_EMAIL_PREFIX}%"],
+            )
+            cursor.execute("CREATE INDEX bench_token_users_n ON bench_token_users (n)")
+            fill = FILL_SQL[vendor]
+            for kind, count, span, lifetime in (
+                ("refresh", options["rows"], REFRESH_SPAN_SEC, REFRESH_LIFETIME_SEC),
+                ("access", revoked_rows, ACCESS_SPAN_SEC, ACCESS_LIFETIME_SEC),
+            ):
+                started = time.perf_counter()
+                sql = fill[kind].format(span=span, lifetime=lifetime)
+                cursor.execute(sql, {**params, "count": count})
+                self.stdout.write(
+                    f"ℹ️ {kind}: {count} строк за {time.perf_counter() - started:.1f} с"
+                )
+            # Свежая статистика, иначе планировщик не видит новых строк
+            cursor.execute("ANALYZE")
+            cursor.execute("SELECT user_id FROM bench_token_users ORDER BY n")
+            user_ids = [row[0] for row in cursor.fetchall()]
+        jtis = list(
+            RefreshToken.objects.filter(jti__startswith="bt-", revoked=False)
+            .order_by("?")
+            .values_list("jti", flat=True)[:repeat]
+        )
+        # Разные пользователи и jti, чтобы не мерить один закешированный лист
+        return [
+            (user_ids[attempt * 7919 % len(user_ids)], jtis[attempt % len(jtis)])
+            for attempt in range(repeat)
+        ]
+
+    def _restore_old_indexes(self) -> None:
+        """Схема до 0010: без новых индексов, с одиночным индексом по FK user."""
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model in (RefreshToken, RevokedAccessToken):
+                for index in model._meta.indexes:
+                    cursor.execute(f"DROP INDEX {quote(index.name)}")
+            cursor.execute(
+                f"CREATE INDEX bench_refreshtoken_user_id ON "
+                f"{quote(RefreshToken._meta.db_table)} ({quote('user_id')})"
+            )
+            cursor.execute("ANALYZE")
+
+    def _measure_all(self, samples: list[tuple], now: datetime) -> dict:
+        results = {}
+        for name in token_queries(*samples[0], now):
+            timings, rows, plan = [], 0, ""
+            for user_id, jti in samples:
+                queryset = token_queries(user_id, jti, now)[name]
+                if not plan:
+                    plan = queryset.explain()
+                started = time.perf_counter()
+                rows = len(list(queryset))
+                timings.append(time.perf_counter() - started)
+            results[name] = {
+                "rows": rows,
+                "median_ms": round(statistics.median(timings) * 1000, 3),
+                "plan": plan,
+            }
+        return results
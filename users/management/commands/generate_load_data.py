@@ -0,0 +1,207 @@
+import csv
+import random
+import tempfile
+from itertools import accumulate
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from users.management.commands.load_mock_data import DEFAULT_PASSWORD, RULE_COLUMNS
+from users.models import PERMISSION_FIELDS
+
+# Элементы, на которые завязан код (RBAC items/users), есть всегда
+BASE_ELEMENTS = [("items", "Items"), ("users", "Users")]
+TITLE_WORDS = [
+    "report",
+    "draft",
+    "plan",
+    "budget",
+    "invoice",
+    "summary",
+    "review",
+    "roadmap",
+    "contract",
+    "memo",
+    "public",
+    "quarterly",
+]
+ROWS_PER_WRITE = 10000
+
+
+def owner_weights(count: int, skew: float) -> list[float]:
+    """Накопленные веса закона Ципфа: владелец ранга r получает ~1/r^skew."""
+    return list(accumulate(1 / rank**skew for rank in range(1, count + 1)))
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует синтетические данные масштаба продакшена: пользователей, "
+        "роли, бизнес-элементы, матрицу правил и items с перекосом по "
+        "владельцам. Пишет CSV для load_mock_data и/или загружает их в БД"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--roles", type=int, default=10)
+        parser.add_argument(
+            "--elements",
+            type=int,
+            default=len(BASE_ELEMENTS),
+            help="Число бизнес-элементов, включая items и users",
+        )
+        parser.add_argument("--items", type=int, default=10000)
+        parser.add_argument(
+            "--rule-density",
+            type=float,
+            default=1.0,
+            help="Доля заполненных ячеек роль × элемент: 1 - плотная матрица, "
+            "например 0.1 - разреженная (по умолчанию 1)",
+        )
+        parser.add_argument(
+            "--roles-per-user",
+            type=int,
+            default=2,
+            help="Максимум ролей у пользователя (по умолчанию 2)",
+        )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Показатель Ципфа для items на владельца; 0 - равномерно "
+            "(по умолчанию 1.1)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output-dir", help="Каталог для CSV")
+        parser.add_argument(
+            "--load",
+            action="store_true",
+            help="Загрузить данные в БД через load_mock_data --bulk",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Размер пачки загрузки (по умолчанию 5000)",
+        )
+        parser.add_argument(
+            "--hash-workers",
+            type=int,
+            default=0,
+            help="Процессов для хеширования паролей (0 - по числу CPU)",
+        )
+
+    def handle(self, *args, **options):
+        if not options["output_dir"] and not options["load"]:
+            raise CommandError("Укажите --output-dir и/или --load")
+        if options["roles"] < 1 or options["users"] < 1:
+            raise CommandError("--roles и --users должны быть положительными")
+        if options["elements"] < len(BASE_ELEMENTS):
+            raise CommandError(f"--elements не меньше {len(BASE_ELEMENTS)}")
+        if not 0 <= options["rule_density"] <= 1:
+            raise CommandError("--rule-density должен быть в диапазоне [0, 1]")
+        if options["items"] < 0 or options["roles_per_user"] < 1:
+            raise CommandError("--items >= 0, --roles-per-user >= 1")
+
+        if options["output_dir"]:
+            data_dir = Path(options["output_dir"])
+            data_dir.mkdir(parents=True, exist_ok=True)
+            self._generate(data_dir, options)
+            if options["load"]:
+                self._load(data_dir, options)
+        else:
+            with tempfile.TemporaryDirectory(prefix="load-data-") as tmp:
+                self._generate(Path(tmp), options)
+                self._load(Path(tmp), options)
+
+    def _load(self, data_dir: Path, options) -> None:
+        call_command(
+            "load_mock_data",
+            "--bulk",
+            f"--data-dir={data_dir}",
+            f"--chunk-size={options['chunk_size']}",
+            f"--hash-workers={options['hash_workers']}",
+            stdout=self.stdout,
+            stderr=self.stderr,
+        )
+
+    def _generate(self, data_dir: Path, options) -> None:
+        rnd = random.Random(options["seed"])
+        roles = [f"role-{i:04d}" for i in range(1, options["roles"] + 1)]
+        elements = BASE_ELEMENTS + [
+            (f"element-{i:04d}", f"Element {i}")
+            for i in range(len(BASE_ELEMENTS) + 1, options["elements"] + 1)
+        ]
+        emails = [
+            f"load-user-{i:07d}@example.com" for i in range(1, options["users"] + 1)
+        ]
+
+        self._write(data_dir / "roles.csv", ["name"], ([name] for name in roles))
+        self._write(data_dir / "business_elements.csv", ["code", "name"], elements)
+        rules = self._write(
+            data_dir / "access_role_rules.csv",
+            RULE_COLUMNS,
+            self._rules(rnd, roles, elements, options["rule_density"]),
+        )
+        self._write(
+            data_dir / "demo_users.csv",
+            ["email", "first_name", "last_name", "password", "roles"],
+            self._users(rnd, emails, roles, options["roles_per_user"]),
+        )
+        self._write(
+            data_dir / "demo_items.csv",
+            ["title", "owner_email"],
+            self._items(rnd, emails, options["items"], options["skew"]),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✔ CSV в {data_dir}: ролей {len(roles)}, элементов "
+                f"{len(elements)}, правил {rules}, пользователей {len(emails)}, "
+                f"items {options['items']}"
+            )
+        )
+
+    def _write(self, path: Path, header: list[str], rows) -> int:
+        count = 0
+        with path.open("w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= ROWS_PER_WRITE:
+                    writer.writerows(batch)
+                    count += len(batch)
+                    batch.clear()
+            writer.writerows(batch)
+            count += len(batch)
+        return count
+
+    def _rules(self, rnd: random.Random, roles, elements, density: float):
+        for role in roles:
+            for code, _ in elements:
+                if rnd.random() >= density:
+                    continue
+                flags = [rnd.random() < 0.5 for _ in PERMISSION_FIELDS]
+                yield [role, code, *(int(flag) for flag in flags)]
+
+    def _users(self, rnd: random.Random, emails, roles, roles_per_user: int):
+        for i, email in enumerate(emails, start=1):
+            count = rnd.randint(1, min(roles_per_user, len(roles)))
+            user_roles = ",".join(rnd.sample(roles, count))
+            yield [email, "Load", f"User {i}", DEFAULT_PASSWORD, user_roles]
+
+    def _items(self, rnd: random.Random, emails, count: int, skew: float):
+        if not count:
+            return
+        weights = owner_weights(len(emails), skew)
+        # Ранги перемешаны, чтобы "тяжелые" владельцы не шли подряд по email
+        ranked = emails[:]
+        rnd.shuffle(ranked)
+        for start in range(0, count, ROWS_PER_WRITE):
+            size = min(ROWS_PER_WRITE, count - start)
+            owners = rnd.choices(ranked, cum_weights=weights, k=size)
+            for n, owner in enumerate(owners, start=start + 1):
+                words = " ".join(rnd.sample(TITLE_WORDS, 2)).capitalize()
+                # Номер в названии делает пару (владелец, название) уникальной
+                yield [f"{words} {n}", owner]
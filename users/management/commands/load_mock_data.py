@@ -1,21 +1,37 @@
 import csv
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
+from typing import Optional
 
-from django.contrib.auth import get_user_model
+from django.contrib.auth import get_user_model, hashers
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from users.models import AccessRoleRule, BusinessElement, Item, Role
+from users.authentication import invalidate_cached_user_all
+from users.hashing import BatchPasswordHasher
+from users.models import (
+    PERMISSION_FIELDS,
+    AccessRoleRule,
+    BusinessElement,
+    Item,
+    ItemChange,
+    Role,
+)
+
+RULE_COLUMNS = ["role", "element", *PERMISSION_FIELDS]
+DEFAULT_PASSWORD = "Passw0rd!"
 
 
 def to_bool(v: str) -> bool:
     return str(v).strip().lower() in {"1", "true", "yes", "on", "y"}
 
 
-def load_csv(path: Path, required_cols: list[str]) -> list[dict]:
+def iter_csv(path: Path, required_cols: list[str]) -> Iterator[dict]:
     if not path.exists():
         raise CommandError(f"CSV файл не найден: {path}")
-    rows: list[dict] = []
     with path.open("r", encoding="utf-8", newline="") as f:
         reader = csv.DictReader(f)
         if not reader.fieldnames:
@@ -23,11 +39,39 @@ def load_csv(path: Path, required_cols: list[str]) -> list[dict]:
         missing = [c for c in required_cols if c not in reader.fieldnames]
         if missing:
             raise CommandError(f"{path.name}: отсутствуют колонки: {missing}")
-        for i, row in enumerate(reader, start=2):
-            rows.append({
-                k: (v.strip() if isinstance(v, str) else v) for k, v in row.items()
-            })
-    return rows
+        for row in reader:
+            yield {k: (v.strip() if isinstance(v, str) else v) for k, v in row.items()}
+
+
+def load_csv(path: Path, required_cols: list[str]) -> list[dict]:
+    return list(iter_csv(path, required_cols))
+
+
+def iter_csv_chunks(
+    path: Path, required_cols: list[str], size: int
+) -> Iterator[list[dict]]:
+    """Читает CSV пачками по size строк, не загружая файл целиком."""
+    rows = iter_csv(path, required_cols)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def parse_role_names(row: dict) -> list[str]:
+    return [name.strip() for name in row["roles"].split(",") if name.strip()]
+
+
+def raw_password(row: dict) -> str:
+    return row.get("password") or DEFAULT_PASSWORD
+
+
+@dataclass
+class UserBatch:
+    """Пачка пользователей --bulk, хеши которой считаются в пуле."""
+
+    rows: dict[str, dict]
+    role_ids: dict[str, set[int]]
+    hashes: Iterator[str]
+    hashed_emails: list[str]
 
 
 class Command(BaseCommand):
@@ -45,22 +89,64 @@ class Command(BaseCommand):
             action="store_true",
             help="Принудительно сбрасывать пароли демо-пользователей из CSV",
         )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Пакетная загрузка больших CSV: bulk_create пачками, "
+            "транзакция на пачку",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Строк CSV в одной пачке режима --bulk (по умолчанию 5000)",
+        )
+        parser.add_argument(
+            "--hash-workers",
+            type=int,
+            default=0,
+            help="Процессов для хеширования паролей (по умолчанию 0 - по числу CPU)",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
         data_dir = Path(options["data_dir"])
         reset_passwords = options["reset_passwords"]
         User = get_user_model()
 
+        if options["hash_workers"] < 0:
+            raise CommandError("--hash-workers не может быть отрицательным")
+        with BatchPasswordHasher(options["hash_workers"]) as hasher:
+            if options["bulk"]:
+                if options["chunk_size"] < 1:
+                    raise CommandError("--chunk-size должен быть положительным")
+                self._handle_bulk(
+                    data_dir, User, reset_passwords, options["chunk_size"], hasher
+                )
+            else:
+                with transaction.atomic():
+                    users_by_email = self._handle_rows(
+                        data_dir, User, reset_passwords, hasher
+                    )
+                # Items - вне общей транзакции: каждая запись ItemChange
+                # коммитится сразу, а не после всей загрузки, иначе лента
+                # изменений пропустила бы номера дольше ITEMS_CHANGES_SETTLE_SEC
+                self._load_demo_items(data_dir, User, users_by_email)
+
+        self.stdout.write(self.style.SUCCESS("✅ Загрузка мок-данных завершена"))
+
+    def _handle_rows(
+        self,
+        data_dir: Path,
+        User,
+        reset_passwords: bool,
+        hasher: BatchPasswordHasher,
+    ) -> dict[str, any]:
         roles_by_name = self._load_roles(data_dir)
         elements_by_code = self._load_elements(data_dir)
         self._load_access_rules(data_dir, roles_by_name, elements_by_code)
-        users_by_email = self._load_demo_users(
-            data_dir, User, roles_by_name, reset_passwords
+        return self._load_demo_users(
+            data_dir, User, roles_by_name, reset_passwords, hasher
         )
-        self._load_demo_items(data_dir, User, users_by_email)
-
-        self.stdout.write(self.style.SUCCESS("✅ Загрузка мок-данных завершена"))
 
     def _load_roles(self, data_dir: Path) -> dict[str, Role]:
         roles_csv = load_csv(data_dir / "roles.csv", ["name"])
@@ -95,17 +181,7 @@ class Command(BaseCommand):
     ) -> None:
         rules_csv = load_csv(
             data_dir / "access_role_rules.csv",
-            [
-                "role",
-                "element",
-                "read",
-                "read_all",
-                "create",
-                "update",
-                "update_all",
-                "delete",
-                "delete_all",
-            ],
+            RULE_COLUMNS,
         )
         for row in rules_csv:
             role_name = row["role"]
@@ -117,15 +193,7 @@ class Command(BaseCommand):
             AccessRoleRule.objects.update_or_create(
                 role=roles_by_name[role_name],
                 element=elements_by_code[element_code],
-                defaults={
-                    "read": to_bool(row["read"]),
-                    "read_all": to_bool(row["read_all"]),
-                    "create": to_bool(row["create"]),
-                    "update": to_bool(row["update"]),
-                    "update_all": to_bool(row["update_all"]),
-                    "delete": to_bool(row["delete"]),
-                    "delete_all": to_bool(row["delete_all"]),
-                },
+                defaults={field: to_bool(row[field]) for field in PERMISSION_FIELDS},
             )
         self.stdout.write(self.style.SUCCESS("✔ Правила доступа созданы/обновлены"))
 
@@ -135,13 +203,28 @@ class Command(BaseCommand):
         User,
         roles_by_name: dict[str, Role],
         reset_passwords: bool,
+        hasher: BatchPasswordHasher,
     ) -> dict[str, any]:
         users_csv = load_csv(
             data_dir / "demo_users.csv",
             ["email", "first_name", "last_name", "roles"],
         )
+        existing = set(
+            User.objects.filter(
+                email__in=[row["email"] for row in users_csv]
+            ).values_list("email", flat=True)
+        )
+        # Пароли новых (или всех при --reset-passwords) пользователей хешируются
+        # в пуле, пока цикл ниже пишет строки в БД
+        needs_hash = [
+            reset_passwords or row["email"] not in existing for row in users_csv
+        ]
+        hashes = hasher.submit(
+            [raw_password(row) for row, needed in zip(users_csv, needs_hash) if needed]
+        )
         users_by_email: dict[str, any] = {}
-        for row in users_csv:
+        for row, needed in zip(users_csv, needs_hash):
+            password_hash = next(hashes) if needed else None
             email = row["email"]
             user, created = User.objects.get_or_create(
                 email=email,
@@ -152,15 +235,12 @@ class Command(BaseCommand):
                 },
             )
             if created or reset_passwords:
-                pwd = row.get("password") or "Passw0rd!"
-                user.set_password(pwd)
+                user.password = password_hash or hashers.make_password(
+                    raw_password(row)
+                )
                 user.save(update_fields=["password"] if not created else None)
 
-            role_names = [
-                role_name.strip()
-                for role_name in row["roles"].split(",")
-                if role_name.strip()
-            ]
+            role_names = parse_role_names(row)
             unknown = [
                 role_name for role_name in role_names if role_name not in roles_by_name
             ]
@@ -189,3 +269,258 @@ class Command(BaseCommand):
                 raise CommandError(f"Не найден владелец для item: {owner_email}")
             Item.objects.get_or_create(title=row["title"], owner=owner)
         self.stdout.write(self.style.SUCCESS(f"✔ Демо-items: {len(items_csv)}"))
+
+    # --- Режим --bulk -----------------------------------------------------
+    #
+    # Семантика та же, что у построчного режима: существующие пользователи и
+    # items не дублируются, имена существующих пользователей не меняются,
+    # роли пользователя заменяются списком из CSV. bulk_create не шлет
+    # сигналы, поэтому версия RBAC, кеш пользователей и лента ItemChange
+    # обновляются явно.
+
+    def _handle_bulk(
+        self,
+        data_dir: Path,
+        User,
+        reset_passwords: bool,
+        chunk_size: int,
+        hasher: BatchPasswordHasher,
+    ) -> None:
+        with transaction.atomic():
+            role_ids = self._bulk_load_roles(data_dir)
+            element_ids = self._bulk_load_elements(data_dir)
+            self._bulk_load_access_rules(data_dir, role_ids, element_ids)
+        # Каждая пачка - отдельная транзакция: прерванную загрузку можно
+        # просто перезапустить, уже загруженные строки будут пропущены
+        user_ids = self._bulk_load_users(
+            data_dir, User, role_ids, reset_passwords, chunk_size, hasher
+        )
+        invalidate_cached_user_all()
+        self._bulk_load_items(data_dir, User, user_ids, chunk_size)
+
+    def _report(self, label: str, rows: int, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed > 0 else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✔ {label}: {rows} за {elapsed:.2f} с ({rate:.0f} строк/с)"
+            )
+        )
+
+    def _bulk_load_roles(self, data_dir: Path) -> dict[str, int]:
+        started = time.perf_counter()
+        rows = load_csv(data_dir / "roles.csv", ["name"])
+        names = list(dict.fromkeys(row["name"] for row in rows))
+        Role.objects.bulk_create(
+            [Role(name=name) for name in names], ignore_conflicts=True
+        )
+        role_ids = dict(Role.objects.filter(name__in=names).values_list("name", "id"))
+        self._report("Ролей", len(role_ids), started)
+        return role_ids
+
+    def _bulk_load_elements(self, data_dir: Path) -> dict[str, int]:
+        started = time.perf_counter()
+        names_by_code = {
+            row["code"]: row["name"]
+            for row in load_csv(data_dir / "business_elements.csv", ["code", "name"])
+        }
+        BusinessElement.objects.bulk_create(
+            [
+                BusinessElement(code=code, name=name)
+                for code, name in names_by_code.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["code"],
+            update_fields=["name"],
+        )
+        element_ids = dict(
+            BusinessElement.objects.filter(code__in=names_by_code).values_list(
+                "code", "id"
+            )
+        )
+        self._report("Элементов", len(element_ids), started)
+        return element_ids
+
+    def _bulk_load_access_rules(
+        self, data_dir: Path, role_ids: dict[str, int], element_ids: dict[str, int]
+    ) -> None:
+        started = time.perf_counter()
+        rules: dict[tuple[int, int], AccessRoleRule] = {}
+        for row in load_csv(data_dir / "access_role_rules.csv", RULE_COLUMNS):
+            role_name, element_code = row["role"], row["element"]
+            if role_name not in role_ids:
+                raise CommandError(f"Правило для неизвестной роли: {role_name}")
+            if element_code not in element_ids:
+                raise CommandError(f"Правило для неизвестного элемента: {element_code}")
+            flags = {field: to_bool(row[field]) for field in PERMISSION_FIELDS}
+            key = (role_ids[role_name], element_ids[element_code])
+            # Маску пересчитывает bulk_create менеджера (flags_to_mask)
+            rules[key] = AccessRoleRule(role_id=key[0], element_id=key[1], **flags)
+        AccessRoleRule.objects.bulk_create(
+            rules.values(),
+            update_conflicts=True,
+            unique_fields=["role", "element"],
+            update_fields=list(PERMISSION_FIELDS),
+        )
+        self._report("Правил доступа", len(rules), started)
+
+    def _bulk_load_users(
+        self,
+        data_dir: Path,
+        User,
+        role_ids: dict[str, int],
+        reset_passwords: bool,
+        chunk_size: int,
+        hasher: BatchPasswordHasher,
+    ) -> dict[str, object]:
+        """Загружает пользователей пачками; возвращает карту email -> id.
+
+        Конвейер: пока пишется пачка N, пул уже хеширует пароли пачки N+1.
+        """
+        started = time.perf_counter()
+        user_ids: dict[str, object] = {}
+        pending: Optional[UserBatch] = None
+        for chunk in iter_csv_chunks(
+            data_dir / "demo_users.csv",
+            ["email", "first_name", "last_name", "roles"],
+            chunk_size,
+        ):
+            batch = self._prepare_user_batch(
+                chunk, User, role_ids, reset_passwords, hasher
+            )
+            if pending is not None:
+                user_ids.update(self._write_user_batch(pending, User, reset_passwords))
+            pending = batch
+        if pending is not None:
+            user_ids.update(self._write_user_batch(pending, User, reset_passwords))
+        self._report("Демо-пользователей", len(user_ids), started)
+        return user_ids
+
+    def _prepare_user_batch(
+        self,
+        chunk: list[dict],
+        User,
+        role_ids: dict[str, int],
+        reset_passwords: bool,
+        hasher: BatchPasswordHasher,
+    ) -> UserBatch:
+        rows = {row["email"]: row for row in chunk}
+        batch_role_ids = {}
+        for email, row in rows.items():
+            role_names = parse_role_names(row)
+            unknown = [name for name in role_names if name not in role_ids]
+            if unknown:
+                raise CommandError(
+                    f"Для пользователя {email} не найдены роли: {unknown}"
+                )
+            batch_role_ids[email] = {role_ids[name] for name in role_names}
+        if reset_passwords:
+            hashed_emails = list(rows)
+        else:
+            existing = set(
+                User.objects.filter(email__in=rows).values_list("email", flat=True)
+            )
+            hashed_emails = [email for email in rows if email not in existing]
+        return UserBatch(
+            rows=rows,
+            role_ids=batch_role_ids,
+            hashes=hasher.submit([raw_password(rows[e]) for e in hashed_emails]),
+            hashed_emails=hashed_emails,
+        )
+
+    def _write_user_batch(
+        self, batch: UserBatch, User, reset_passwords: bool
+    ) -> dict[str, object]:
+        rows = batch.rows
+        # Ждем хеши пачки; ее набор существующих пользователей мог измениться,
+        # пока писалась предыдущая пачка, поэтому он перечитывается ниже
+        hashed = dict(zip(batch.hashed_emails, batch.hashes))
+
+        def password_for(email: str) -> str:
+            return hashed.get(email) or hashers.make_password(raw_password(rows[email]))
+
+        through = User.roles.through
+        with transaction.atomic():
+            existing = dict(
+                User.objects.filter(email__in=rows).values_list("email", "id")
+            )
+            User.objects.bulk_create(
+                [
+                    User(
+                        email=email,
+                        first_name=row["first_name"],
+                        last_name=row["last_name"],
+                        is_active=True,
+                        password=password_for(email),
+                    )
+                    for email, row in rows.items()
+                    if email not in existing
+                ],
+                ignore_conflicts=True,
+            )
+            if reset_passwords and existing:
+                User.objects.bulk_update(
+                    [
+                        User(id=user_id, password=password_for(email))
+                        for email, user_id in existing.items()
+                    ],
+                    ["password"],
+                )
+            # Перечитываем: при ignore_conflicts id из Python может не совпасть
+            # с id строки, вставленной параллельным процессом
+            batch_ids = dict(
+                User.objects.filter(email__in=rows).values_list("email", "id")
+            )
+            # Аналог roles.set(): связи пачки заменяются целиком
+            through.objects.filter(user_id__in=batch_ids.values()).delete()
+            through.objects.bulk_create(
+                [
+                    through(user_id=batch_ids[email], role_id=role_id)
+                    for email, ids in batch.role_ids.items()
+                    for role_id in ids
+                ]
+            )
+        return batch_ids
+
+    def _bulk_load_items(
+        self, data_dir: Path, User, user_ids: dict[str, object], chunk_size: int
+    ) -> None:
+        started = time.perf_counter()
+        total = created = 0
+        for chunk in iter_csv_chunks(
+            data_dir / "demo_items.csv", ["title", "owner_email"], chunk_size
+        ):
+            total += len(chunk)
+            unknown = {row["owner_email"] for row in chunk} - user_ids.keys()
+            if unknown:
+                # Владельцы вне demo_users.csv дополняют ту же карту email -> id
+                user_ids.update(
+                    User.objects.filter(email__in=unknown).values_list("email", "id")
+                )
+            pairs: dict[tuple, None] = {}
+            for row in chunk:
+                owner_id = user_ids.get(row["owner_email"])
+                if owner_id is None:
+                    raise CommandError(
+                        f"Не найден владелец для item: {row['owner_email']}"
+                    )
+                pairs[(owner_id, row["title"])] = None
+
+            with transaction.atomic():
+                existing = set(
+                    Item.objects.filter(
+                        owner_id__in={owner_id for owner_id, _ in pairs},
+                        title__in={title for _, title in pairs},
+                    ).values_list("owner_id", "title")
+                )
+                items = Item.objects.bulk_create(
+                    Item(owner_id=owner_id, title=title)
+                    for owner_id, title in pairs
+                    if (owner_id, title) not in existing
+                )
+                ItemChange.objects.bulk_create(
+                    ItemChange.for_items(items, ItemChange.OP_UPSERT)
+                )
+            created += len(items)
+        self._report("Демо-items", total, started)
+        self.stdout.write(f"ℹ️ Новых items: {created}")
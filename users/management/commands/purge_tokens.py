@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from users.benchmark import format_table
+from users.purge import PURGED_MODELS, expired_tokens, purge_cutoff, purge_expired
+
+COLUMNS = ["table", "deleted", "batches", "seconds", "rows_per_sec"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет истекшие refresh-токены и отозванные access-токены пачками "
+        "по expires_at с паузой между пачками; печатает число строк и время"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TOKEN_PURGE_BATCH_SIZE,
+            help="Строк в одном DELETE "
+            f"(по умолчанию {settings.TOKEN_PURGE_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.TOKEN_PURGE_SLEEP_SEC,
+            help="Пауза между пачками в секундах "
+            f"(по умолчанию {settings.TOKEN_PURGE_SLEEP_SEC})",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            help="Не больше стольких пачек на таблицу за запуск",
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=settings.TOKEN_PURGE_INTERVAL_SEC,
+            help="Повторять очистку каждые N секунд, не завершаясь (0 - один "
+            f"запуск; по умолчанию {settings.TOKEN_PURGE_INTERVAL_SEC})",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать истекшие строки",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть > 0")
+        if options["sleep"] < 0 or options["every"] < 0:
+            raise CommandError("--sleep и --every не могут быть отрицательными")
+        if options["max_batches"] is not None and options["max_batches"] < 1:
+            raise CommandError("--max-batches должен быть > 0")
+
+        if options["dry_run"]:
+            cutoff = purge_cutoff()
+            for model in PURGED_MODELS:
+                count = expired_tokens(model, cutoff).count()
+                self.stdout.write(f"ℹ️ {model._meta.db_table}: истекло {count}")
+            return
+
+        while True:
+            self._purge(options)
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
+            # Долгоживущий процесс: соединение могло устареть за паузу
+            close_old_connections()
+
+    def _purge(self, options) -> None:
+        rows = [
+            purge_expired(
+                model,
+                options["batch_size"],
+                options["sleep"],
+                max_batches=options["max_batches"],
+            ).summary()
+            for model in PURGED_MODELS
+        ]
+        self.stdout.write(format_table(rows, COLUMNS))
+        total = sum(row["deleted"] for row in rows)
+        self.stdout.write(self.style.SUCCESS(f"✅ Удалено строк: {total}"))
+        self.stdout.flush()
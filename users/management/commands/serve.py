@@ -0,0 +1,159 @@
+import importlib.util
+import os
+import shlex
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+APPLICATIONS = {
+    "wsgi": "config.wsgi:application",
+    "asgi": "config.asgi:application",
+}
+
+
+def default_workers() -> int:
+    return 2 * (os.cpu_count() or 1) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Запускает production-сервер gunicorn: несколько воркеров с "
+        "предзагруженным приложением, плавный перезапуск по SIGHUP и "
+        "перезапуск воркеров после --max-requests запросов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bind",
+            default=settings.SERVER_BIND,
+            help=f"Адрес:порт (по умолчанию {settings.SERVER_BIND})",
+        )
+        parser.add_argument(
+            "--interface",
+            choices=sorted(APPLICATIONS),
+            default=settings.SERVER_INTERFACE,
+            help="wsgi - sync/gthread-воркеры, asgi - воркеры uvicorn",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.SERVER_WORKERS,
+            help="Число процессов-воркеров (0 - 2 × CPU + 1)",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=settings.SERVER_THREADS,
+            help="Потоков на воркер для wsgi (больше 1 - воркеры gthread)",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=settings.SERVER_MAX_REQUESTS,
+            help="Перезапускать воркер после стольких запросов (0 - никогда)",
+        )
+        parser.add_argument(
+            "--max-requests-jitter",
+            type=int,
+            default=settings.SERVER_MAX_REQUESTS_JITTER,
+            help="Случайная добавка к --max-requests для каждого воркера",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=settings.SERVER_TIMEOUT,
+            help="Воркер, молчащий дольше стольких секунд, перезапускается",
+        )
+        parser.add_argument(
+            "--graceful-timeout",
+            type=int,
+            default=settings.SERVER_GRACEFUL_TIMEOUT,
+            help="Сколько секунд воркер дорабатывает запросы при остановке",
+        )
+        parser.add_argument(
+            "--no-preload",
+            action="store_true",
+            help="Не загружать приложение в мастере до форка воркеров",
+        )
+        parser.add_argument("--pid", help="Файл для PID мастера (для kill -HUP)")
+        parser.add_argument(
+            "--print-command",
+            action="store_true",
+            help="Только напечатать команду запуска",
+        )
+
+    def handle(self, *args, **options):
+        argv = self.build_argv(options)
+        if options["print_command"]:
+            self.stdout.write(shlex.join(argv))
+            return
+
+        # whitenoise отдает статику (админка, Swagger UI) без runserver
+        required = ["gunicorn", "whitenoise"]
+        if options["interface"] == "asgi":
+            required.append("uvicorn")
+        missing = [name for name in required if importlib.util.find_spec(name) is None]
+        if missing:
+            raise CommandError(
+                f"Не установлены: {', '.join(missing)}. "
+                "Установите pip install -e .[server]"
+            )
+
+        self.stdout.write(f"🚀 {shlex.join(argv)}")
+        self.stdout.flush()
+        # Мастер наследует только код: соединения с БД воркеры откроют сами
+        connections.close_all()
+        # Настройки gunicorn читает заново: от интерфейса зависят умолчания
+        # (DB_CONN_MAX_AGE под asgi - 0)
+        os.environ["SERVER_INTERFACE"] = options["interface"]
+        # exec, а не subprocess: сигналы (HUP - плавный перезапуск воркеров,
+        # TERM - остановка) приходят напрямую мастеру gunicorn
+        os.execv(sys.executable, argv)
+
+    def build_argv(self, options) -> list[str]:
+        workers = options["workers"] or default_workers()
+        if workers < 1 or options["threads"] < 1:
+            raise CommandError("--workers и --threads должны быть положительными")
+        if options["interface"] == "asgi":
+            worker_class = "uvicorn.workers.UvicornWorker"
+            if options["threads"] > 1:
+                self.stderr.write("⚠️ --threads игнорируется для asgi")
+        else:
+            worker_class = "gthread" if options["threads"] > 1 else "sync"
+
+        argv = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            APPLICATIONS[options["interface"]],
+            "--bind",
+            options["bind"],
+            "--workers",
+            str(workers),
+            "--worker-class",
+            worker_class,
+            "--timeout",
+            str(options["timeout"]),
+            "--graceful-timeout",
+            str(options["graceful_timeout"]),
+            "--access-logfile",
+            "-",
+        ]
+        if worker_class == "gthread":
+            argv += ["--threads", str(options["threads"])]
+        if options["max_requests"] > 0:
+            argv += [
+                "--max-requests",
+                str(options["max_requests"]),
+                "--max-requests-jitter",
+                str(options["max_requests_jitter"]),
+            ]
+        if not options["no_preload"]:
+            # Код импортируется один раз в мастере, воркеры делят его
+            # страницы памяти copy-on-write
+            argv.append("--preload")
+        if options["pid"]:
+            argv += ["--pid", options["pid"]]
+        return argv
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:30
+
+from django.db import migrations, models
+
+PERMISSION_FIELDS = (
+    'read', 'read_all', 'create', 'update', 'update_all', 'delete', 'delete_all',
+)
+
+
+def fill_permissions(apps, schema_editor):
+    AccessRoleRule = apps.get_model('users', 'AccessRoleRule')
+    rules = list(AccessRoleRule.objects.all())
+    for rule in rules:
+        rule.permissions = sum(
+            1 << i for i, field in enumerate(PERMISSION_FIELDS) if getattr(rule, field)
+        )
+    AccessRoleRule.objects.bulk_update(rules, ['permissions'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_accessrolerule_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accessrolerule',
+            name='permissions',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Битовая маска флагов правила, пересчитывается при сохранении', verbose_name='Маска прав'),
+        ),
+        migrations.RunPython(fill_permissions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_token_version'),
+    ]
+
+    operations = [
+        # Сначала составной индекс, затем удаление одиночного индекса по owner
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['owner', 'id'], name='item_owner_id_idx'),
+        ),
+        migrations.AlterField(
+            model_name='item',
+            name='owner',
+            field=models.ForeignKey(db_index=False, help_text='Пользователь, которому принадлежит элемент', on_delete=django.db.models.deletion.CASCADE, related_name='items', to=settings.AUTH_USER_MODEL, verbose_name='Владелец'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:00
+
+from django.db import migrations
+
+# DDL записан здесь, а не импортирован из users.search: история миграций не
+# должна меняться вместе с кодом приложения
+PG_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS item_title_tsv_idx "
+    "ON users_item USING GIN (to_tsvector('simple', title))"
+)
+PG_DROP_INDEX_SQL = "DROP INDEX IF EXISTS item_title_tsv_idx"
+
+SQLITE_FTS_TABLE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_item_fts USING fts5("
+    "title, content='users_item', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+SQLITE_FTS_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS users_item_fts_ai AFTER INSERT ON users_item "
+    "BEGIN INSERT INTO users_item_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS users_item_fts_ad AFTER DELETE ON users_item "
+    "BEGIN INSERT INTO users_item_fts(users_item_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS users_item_fts_au AFTER UPDATE OF title "
+    "ON users_item BEGIN "
+    "INSERT INTO users_item_fts(users_item_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); "
+    "INSERT INTO users_item_fts(rowid, title) VALUES (new.id, new.title); END",
+]
+SQLITE_FTS_REBUILD_SQL = "INSERT INTO users_item_fts(users_item_fts) VALUES ('rebuild')"
+SQLITE_FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS users_item_fts_ai",
+    "DROP TRIGGER IF EXISTS users_item_fts_ad",
+    "DROP TRIGGER IF EXISTS users_item_fts_au",
+    "DROP TABLE IF EXISTS users_item_fts",
+]
+
+
+def install_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(PG_INDEX_SQL)
+    elif vendor == "sqlite":
+        schema_editor.execute(SQLITE_FTS_TABLE_SQL)
+        for sql in SQLITE_FTS_TRIGGERS_SQL:
+            schema_editor.execute(sql)
+        schema_editor.execute(SQLITE_FTS_REBUILD_SQL)
+
+
+def uninstall_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        schema_editor.execute(PG_DROP_INDEX_SQL)
+    elif vendor == "sqlite":
+        for sql in SQLITE_FTS_DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_item_owner_id_idx'),
+    ]
+
+    operations = [
+        # Postgres: GIN по to_tsvector('simple', title); SQLite: FTS5 + триггеры
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:02
+
+from django.db import migrations, models
+
+# Копия триггеров FTS5 из 0007_item_title_search (SQL не импортируется из кода
+# приложения, чтобы история миграций не менялась вместе с ним)
+SQLITE_FTS_TRIGGERS_SQL = [
+    "CREATE TRIGGER IF NOT EXISTS users_item_fts_ai AFTER INSERT ON users_item "
+    "BEGIN INSERT INTO users_item_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS users_item_fts_ad AFTER DELETE ON users_item "
+    "BEGIN INSERT INTO users_item_fts(users_item_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS users_item_fts_au AFTER UPDATE OF title "
+    "ON users_item BEGIN "
+    "INSERT INTO users_item_fts(users_item_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); "
+    "INSERT INTO users_item_fts(rowid, title) VALUES (new.id, new.title); END",
+]
+SQLITE_FTS_REBUILD_SQL = "INSERT INTO users_item_fts(users_item_fts) VALUES ('rebuild')"
+
+
+def reinstall_sqlite_triggers(apps, schema_editor):
+    # Индекс Postgres переживает AddField, пересоздавать нечего
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_FTS_TRIGGERS_SQL:
+            schema_editor.execute(sql)
+        schema_editor.execute(SQLITE_FTS_REBUILD_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_item_title_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Дата и время последнего изменения элемента', verbose_name='Дата изменения'),
+        ),
+        # На SQLite AddField пересоздает users_item вместе с триггерами FTS5
+        migrations.RunPython(reinstall_sqlite_triggers, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='user',
+            name='profile_version',
+            field=models.PositiveIntegerField(default=0, help_text='Увеличивается при изменении профиля; основа ETag /auth/me/', verbose_name='Версия профиля'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['updated_at'], name='item_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['owner', 'updated_at'], name='item_owner_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_changes(apps, schema_editor):
+    # Существующие items попадают в ленту как upsert, чтобы since=0 давал
+    # полный снимок
+    schema_editor.execute(
+        "INSERT INTO users_itemchange (item_id, owner_id, op, title, changed_at) "
+        "SELECT id, owner_id, 'upsert', title, updated_at FROM users_item ORDER BY id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_item_updated_at_user_profile_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemChange',
+            fields=[
+                ('id', models.BigAutoField(help_text='Монотонно растущий номер изменения', primary_key=True, serialize=False, verbose_name='Номер изменения')),
+                ('item_id', models.BigIntegerField(help_text='Идентификатор измененного элемента', verbose_name='ID элемента')),
+                ('op', models.CharField(choices=[('upsert', 'Создание/изменение'), ('delete', 'Удаление')], help_text='upsert - элемент создан или изменен, delete - удален', max_length=6, verbose_name='Операция')),
+                ('title', models.CharField(blank=True, help_text='Название элемента после изменения (пусто для удаления)', max_length=200, verbose_name='Название')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Дата и время записи изменения', verbose_name='Дата изменения')),
+                ('owner', models.ForeignKey(db_constraint=False, db_index=False, help_text='Владелец элемента на момент изменения', null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Владелец')),
+            ],
+            options={
+                'verbose_name': 'Изменение элемента',
+                'verbose_name_plural': 'Изменения элементов',
+                'indexes': [models.Index(fields=['owner', 'id'], name='itemchange_owner_seq_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_changes, migrations.RunPython.noop),
+    ]
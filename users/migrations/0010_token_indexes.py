@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_itemchange'),
+    ]
+
+    operations = [
+        # Сначала составной индекс, затем удаление одиночного индекса по user
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(fields=['user', 'revoked'], name='refreshtoken_user_revoked_idx'),
+        ),
+        migrations.AlterField(
+            model_name='refreshtoken',
+            name='user',
+            field=models.ForeignKey(db_index=False, help_text='Пользователь, которому принадлежит токен', on_delete=django.db.models.deletion.CASCADE, related_name='refresh_tokens', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(condition=models.Q(('revoked', False)), fields=['user'], name='refreshtoken_active_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtoken',
+            index=models.Index(fields=['expires_at'], name='refreshtoken_expires_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='revokedaccesstoken',
+            index=models.Index(fields=['created_at'], name='revokedaccess_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='revokedaccesstoken',
+            index=models.Index(fields=['expires_at'], name='revokedaccess_expires_at_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:20
+
+import uuid
+
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    RBACVersion = apps.get_model("users", "RBACVersion")
+    RBACVersion.objects.using(schema_editor.connection.alias).create(
+        pk=1, version=uuid.uuid4().hex
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_token_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RBACVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(help_text='Случайное значение, меняется при каждом изменении RBAC', max_length=32, verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия RBAC',
+                'verbose_name_plural': 'Версии RBAC',
+            },
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
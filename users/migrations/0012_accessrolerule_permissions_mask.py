@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:37
+
+import operator
+from functools import reduce
+
+from django.db import migrations, models
+
+# Биты флагов на момент миграции (копия users.models.PERMISSION_BITS)
+PERMISSION_BITS = {
+    "read": 1,
+    "read_all": 2,
+    "create": 4,
+    "update": 8,
+    "update_all": 16,
+    "delete": 32,
+    "delete_all": 64,
+}
+
+
+def mask_expression():
+    return reduce(
+        operator.add,
+        [
+            models.Case(
+                models.When(models.Q((field, True)), then=models.Value(bit)),
+                default=models.Value(0),
+            )
+            for field, bit in PERMISSION_BITS.items()
+        ],
+    )
+
+
+def sync_permissions(apps, schema_editor):
+    # Маска могла разойтись с флагами после QuerySet.update()/bulk_update()
+    AccessRoleRule = apps.get_model("users", "AccessRoleRule")
+    AccessRoleRule.objects.using(schema_editor.connection.alias).update(
+        permissions=mask_expression()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_rbacversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(sync_permissions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='accessrolerule',
+            constraint=models.CheckConstraint(
+                condition=models.Q(('permissions', mask_expression())),
+                name='accessrolerule_permissions_mask',
+            ),
+        ),
+    ]
@@ -1,8 +1,37 @@
+import operator
 import uuid
+from functools import reduce
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, connections, models, router
+from django.db.models.lookups import Exact
+from django.dispatch import Signal
+from django.utils import timezone
+
+
+class RBACQuerySet(models.QuerySet):
+    """Пакетные записи в роли/элементы/правила меняют версию RBAC-матрицы.
+
+    update/bulk_create/bulk_update не шлют post_save, поэтому версию меняют
+    сами; QuerySet.delete шлет post_delete (на них подписан users/signals.py).
+    """
+
+    def update(self, **kwargs):
+        updated = super().update(**kwargs)
+        RBACVersion.bump()
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        RBACVersion.bump()
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        RBACVersion.bump()
+        return updated
 
 
 class Role(models.Model):
@@ -13,6 +42,8 @@ class Role(models.Model):
         help_text="Уникальное название роли пользователя в системе",
     )
 
+    objects = RBACQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Роль"
         verbose_name_plural = "Роли"
@@ -34,6 +65,8 @@ class BusinessElement(models.Model):
         help_text="Название бизнес-элемента",
     )
 
+    objects = RBACQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Бизнес-элемент"
         verbose_name_plural = "Бизнес-элементы"
@@ -92,9 +125,21 @@ class User(AbstractUser):
         verbose_name="Роли",
         help_text="Роли пользователя для управления доступом",
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Поколение токенов",
+        help_text="Токены с другим значением claim ver считаются отозванными",
+    )
+    profile_version = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Версия профиля",
+        help_text="Увеличивается при изменении профиля; основа ETag /auth/me/",
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS: list[str] = []
+    # Поля ответа /auth/me/ (UserOutSerializer): их изменение меняет версию профиля
+    PROFILE_FIELDS = ("email", "first_name", "middle_name", "last_name", "is_active")
 
     objects = UserManager()
 
@@ -105,6 +150,140 @@ class User(AbstractUser):
     def __str__(self) -> str:
         return self.email
 
+    def save(self, *args, **kwargs):
+        # Любое сохранение полей профиля (PATCH /auth/me/, админка, команды)
+        # меняет ETag /auth/me/. Инкремент в БД, а не на экземпляре: копия из
+        # кеша пользователей может отставать, и два воркера записали бы одну
+        # версию для разного содержимого
+        update_fields = kwargs.get("update_fields")
+        bump = not self._state.adding and (
+            update_fields is None
+            or not set(update_fields).isdisjoint(self.PROFILE_FIELDS)
+        )
+        if bump:
+            self.profile_version = models.F("profile_version") + 1
+            if update_fields is not None:
+                kwargs["update_fields"] = [*update_fields, "profile_version"]
+        super().save(*args, **kwargs)
+        if bump:
+            # Поле становится отложенным: при обращении Django перечитает его
+            self.__dict__.pop("profile_version", None)
+
+    def _revoke_changes(self, deactivate: bool) -> dict:
+        # Инкремент считает БД: экземпляр может быть устаревшей копией из кеша
+        # процесса, и запись его token_version + 1 не сдвинула бы поколение
+        changes = {"token_version": models.F("token_version") + 1}
+        if deactivate:
+            changes["is_active"] = False
+            changes["profile_version"] = models.F("profile_version") + 1
+        return changes
+
+    def revoke_all_tokens(self, deactivate: bool = False) -> None:
+        """Отзывает все выданные токены ("выйти везде") одним UPDATE."""
+        changes = self._revoke_changes(deactivate)
+        type(self).objects.filter(pk=self.pk).update(**changes)
+        self._after_revoke(changes)
+
+    async def arevoke_all_tokens(self, deactivate: bool = False) -> None:
+        changes = self._revoke_changes(deactivate)
+        await type(self).objects.filter(pk=self.pk).aupdate(**changes)
+        # Получатели сигнала синхронные (кеш, transaction.on_commit) - в поток
+        await sync_to_async(self._after_revoke)(changes)
+
+    def _after_revoke(self, changes: dict) -> None:
+        # Поля становятся отложенными: при обращении Django перечитает их из БД
+        for field in changes:
+            self.__dict__.pop(field, None)
+        tokens_revoked.send(sender=type(self), instance=self)
+
+
+# UPDATE без save() не шлет post_save: кеш пользователей сбрасывается по этому
+# сигналу (users/signals.py)
+tokens_revoked = Signal()
+
+
+PERMISSION_FIELDS = (
+    "read",
+    "read_all",
+    "create",
+    "update",
+    "update_all",
+    "delete",
+    "delete_all",
+)
+PERMISSION_BITS = {field: 1 << i for i, field in enumerate(PERMISSION_FIELDS)}
+
+
+def flags_to_mask(flags) -> int:
+    """Упаковывает флаги правила (dict или объект) в битовую маску."""
+    mask = 0
+    for field, bit in PERMISSION_BITS.items():
+        value = flags.get(field) if isinstance(flags, dict) else getattr(flags, field)
+        if value:
+            mask |= bit
+    return mask
+
+
+def mask_to_flags(mask: int) -> dict:
+    return {field: bool(mask & bit) for field, bit in PERMISSION_BITS.items()}
+
+
+def mask_expression(overrides=None):
+    """Маска из флагов правила как SQL-выражение (аналог flags_to_mask).
+
+    ``overrides`` - новые значения флагов из ``update()``: в SET справа
+    видны старые значения столбцов, поэтому измененные флаги берутся отсюда.
+    """
+    overrides = overrides or {}
+    terms = []
+    for field, bit in PERMISSION_BITS.items():
+        if field not in overrides:
+            condition = models.Q(**{field: True})
+        elif hasattr(overrides[field], "resolve_expression"):
+            condition = Exact(overrides[field], True)
+        else:
+            terms.append(models.Value(bit if overrides[field] else 0))
+            continue
+        terms.append(
+            models.Case(
+                models.When(condition, then=models.Value(bit)),
+                default=models.Value(0),
+            )
+        )
+    return reduce(operator.add, terms)
+
+
+class AccessRoleRuleQuerySet(RBACQuerySet):
+    """Пакетные записи пересчитывают маску, как AccessRoleRule.save().
+
+    Матрица RBAC и BIT_OR читают только ``permissions``, поэтому флаги и
+    маска не должны расходиться ни при каком пути записи (в БД это
+    дополнительно проверяет ограничение ``accessrolerule_permissions_mask``).
+    """
+
+    def update(self, **kwargs):
+        flags = {field: kwargs[field] for field in PERMISSION_FIELDS if field in kwargs}
+        if flags and "permissions" not in kwargs:
+            kwargs["permissions"] = mask_expression(flags)
+        return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.permissions = flags_to_mask(obj)
+        update_fields = kwargs.get("update_fields")
+        if update_fields and "permissions" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "permissions"]
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.permissions = flags_to_mask(obj)
+        if "permissions" not in fields:
+            fields = [*fields, "permissions"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
 
 class AccessRoleRule(models.Model):
     role = models.ForeignKey(
@@ -154,12 +333,68 @@ class AccessRoleRule(models.Model):
         verbose_name="Удаление всех",
         help_text="Право на удаление всех элементов",
     )
+    permissions = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Маска прав",
+        help_text="Битовая маска флагов правила, пересчитывается при сохранении",
+    )
+
+    objects = AccessRoleRuleQuerySet.as_manager()
 
     class Meta:
         unique_together = ("role", "element")
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(permissions=mask_expression()),
+                name="accessrolerule_permissions_mask",
+            ),
+        ]
         verbose_name = "Правило доступа роли"
         verbose_name_plural = "Правила доступа ролей"
 
+    def save(self, *args, **kwargs):
+        self.permissions = flags_to_mask(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "permissions" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "permissions"]
+        super().save(*args, **kwargs)
+
+
+RBAC_VERSION_PK = 1
+
+
+class RBACVersion(models.Model):
+    """Версия RBAC-матрицы: единственная строка в основной БД.
+
+    Меняется в той же транзакции, что и роли/элементы/правила, поэтому новую
+    версию все процессы видят ровно с коммитом изменений.
+    """
+
+    version = models.CharField(
+        max_length=32,
+        verbose_name="Версия",
+        help_text="Случайное значение, меняется при каждом изменении RBAC",
+    )
+
+    class Meta:
+        verbose_name = "Версия RBAC"
+        verbose_name_plural = "Версии RBAC"
+
+    @classmethod
+    def bump(cls) -> None:
+        """Новая версия в текущей транзакции (см. rbac.bump_rbac_version)."""
+        version = uuid.uuid4().hex
+        updated = (
+            cls.objects.using(DEFAULT_DB_ALIAS)
+            .filter(pk=RBAC_VERSION_PK)
+            .update(version=version)
+        )
+        if not updated:
+            cls.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+                pk=RBAC_VERSION_PK, defaults={"version": version}
+            )
+
 
 class RefreshToken(models.Model):
     jti = models.CharField(
@@ -172,6 +407,8 @@ class RefreshToken(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="refresh_tokens",
+        # Покрывается составным индексом (user, revoked) из Meta.indexes
+        db_index=False,
         verbose_name="Пользователь",
         help_text="Пользователь, которому принадлежит токен",
     )
@@ -198,6 +435,20 @@ class RefreshToken(models.Model):
     )
 
     class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "revoked"], name="refreshtoken_user_revoked_idx"
+            ),
+            # Активные сессии пользователя: отозванных токенов после ротации
+            # на порядки больше, частичный индекс хранит только живые
+            models.Index(
+                fields=["user"],
+                condition=models.Q(revoked=False),
+                name="refreshtoken_active_user_idx",
+            ),
+            # Очистка истекших токенов - диапазон по expires_at
+            models.Index(fields=["expires_at"], name="refreshtoken_expires_at_idx"),
+        ]
         verbose_name = "Refresh токен"
         verbose_name_plural = "Refresh токены"
 
@@ -230,6 +481,11 @@ class RevokedAccessToken(models.Model):
     )
 
     class Meta:
+        indexes = [
+            # Опрос RevocationStore: записи новее high-water mark
+            models.Index(fields=["created_at"], name="revokedaccess_created_at_idx"),
+            models.Index(fields=["expires_at"], name="revokedaccess_expires_at_idx"),
+        ]
         verbose_name = "Отозванный access токен"
         verbose_name_plural = "Отозванные access токены"
 
@@ -244,6 +500,40 @@ class RevokedAccessToken(models.Model):
 """
 
 
+class ItemManager(models.Manager):
+    def delete_ids(self, ids, owner_id=None, batch_size: int = 500) -> list[int]:
+        """Удаляет items по id одним DELETE на пачку; возвращает id удаленных.
+
+        В отличие от QuerySet.delete(), строки не читаются в память и
+        post_delete не шлется: tombstone в ItemChange пишет вызывающий.
+        Каскад не нужен - внешних ключей на Item нет. ``owner_id`` входит
+        в WHERE, как у QuerySet.filter(owner=...).
+        """
+        opts = self.model._meta
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        pk_column = quote(opts.pk.column)
+        owner_field = opts.get_field("owner")
+        ids = list(ids)
+        deleted = []
+        with connection.cursor() as cursor:
+            for start in range(0, len(ids), batch_size):
+                batch = ids[start : start + batch_size]
+                placeholders = ", ".join(["%s"] * len(batch))
+                sql = (
+                    f"DELETE FROM {quote(opts.db_table)} "
+                    f"WHERE {pk_column} IN ({placeholders})"
+                )
+                params = list(batch)
+                if owner_id is not None:
+                    sql += f" AND {quote(owner_field.column)} = %s"
+                    params.append(owner_field.get_db_prep_value(owner_id, connection))
+                # RETURNING есть в Postgres и SQLite 3.35+
+                cursor.execute(f"{sql} RETURNING {pk_column}", params)
+                deleted.extend(row[0] for row in cursor.fetchall())
+        return deleted
+
+
 class Item(models.Model):
     title = models.CharField(
         max_length=200,
@@ -254,13 +544,102 @@ class Item(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="items",
+        # Покрывается составным индексом (owner, id) из Meta.indexes
+        db_index=False,
         verbose_name="Владелец",
         help_text="Пользователь, которому принадлежит элемент",
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения",
+        help_text="Дата и время последнего изменения элемента",
+    )
+
+    objects = ItemManager()
 
     class Meta:
+        indexes = [
+            # Страница "своих" items - диапазонный скан без сортировки
+            models.Index(fields=["owner", "id"], name="item_owner_id_idx"),
+            # max(updated_at) для ETag списка - чтение края индекса
+            models.Index(fields=["updated_at"], name="item_updated_at_idx"),
+            models.Index(fields=["owner", "updated_at"], name="item_owner_updated_idx"),
+        ]
         verbose_name = "Элемент"
         verbose_name_plural = "Элементы"
 
     def __str__(self):
         return self.title
+
+
+class ItemChange(models.Model):
+    """Журнал изменений items для инкрементальной синхронизации.
+
+    ``id`` - монотонная последовательность изменений (курсор ``since``).
+    Удаление оставляет запись-tombstone. Владелец хранится без внешнего
+    ключа в БД: журнал переживает удаление пользователя и его items.
+    """
+
+    OP_UPSERT = "upsert"
+    OP_DELETE = "delete"
+    OP_CHOICES = [(OP_UPSERT, "Создание/изменение"), (OP_DELETE, "Удаление")]
+
+    id = models.BigAutoField(
+        primary_key=True,
+        verbose_name="Номер изменения",
+        help_text="Монотонно растущий номер изменения",
+    )
+    item_id = models.BigIntegerField(
+        verbose_name="ID элемента",
+        help_text="Идентификатор измененного элемента",
+    )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        related_name="+",
+        verbose_name="Владелец",
+        help_text="Владелец элемента на момент изменения",
+    )
+    op = models.CharField(
+        max_length=6,
+        choices=OP_CHOICES,
+        verbose_name="Операция",
+        help_text="upsert - элемент создан или изменен, delete - удален",
+    )
+    title = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name="Название",
+        help_text="Название элемента после изменения (пусто для удаления)",
+    )
+    changed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Дата изменения",
+        help_text="Дата и время записи изменения",
+    )
+
+    class Meta:
+        indexes = [
+            # Лента "своих" изменений - диапазонный скан по (owner_id, id)
+            models.Index(fields=["owner", "id"], name="itemchange_owner_seq_idx"),
+        ]
+        verbose_name = "Изменение элемента"
+        verbose_name_plural = "Изменения элементов"
+
+    def __str__(self):
+        return f"#{self.id} {self.op} item {self.item_id}"
+
+    @classmethod
+    def for_items(cls, items, op: str) -> list["ItemChange"]:
+        return [
+            cls(
+                item_id=item.id,
+                owner_id=item.owner_id,
+                op=op,
+                title=item.title if op == cls.OP_UPSERT else "",
+            )
+            for item in items
+        ]
@@ -0,0 +1,25 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Keyset-пагинация по уникальному полю с непрозрачным курсором.
+
+    Страница выбирается условием ``WHERE id > <позиция> ORDER BY id LIMIT n``,
+    поэтому стоимость не зависит от глубины, а вставки между запросами не
+    сдвигают и не дублируют строки. Поле сортировки задается атрибутом
+    ``cursor_ordering`` представления и должно быть уникальным и неизменяемым.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
@@ -4,7 +4,8 @@ from django.contrib.auth import get_user_model
 from rest_framework.exceptions import NotAuthenticated
 from rest_framework.permissions import SAFE_METHODS, BasePermission
 
-from .models import AccessRoleRule, BusinessElement
+from .models import mask_to_flags
+from .rbac import get_effective_mask, user_has_role
 
 User = get_user_model()
 
@@ -12,40 +13,27 @@ User = get_user_model()
 def get_effective_rule(user, element_code: str) -> Optional[dict]:
     if not getattr(user, "is_authenticated", False):
         return None
-    try:
-        element = BusinessElement.objects.get(code=element_code)
-    except BusinessElement.DoesNotExist:
+    mask = get_effective_mask(user, element_code)
+    if mask is None:
         return None
-    roles = user.roles.all()
-    rules = AccessRoleRule.objects.filter(role__in=roles, element=element)
-    if not rules.exists():
-        return {
-            "read": False,
-            "read_all": False,
-            "create": False,
-            "update": False,
-            "update_all": False,
-            "delete": False,
-            "delete_all": False,
-        }
-    agg = {
-        "read": False,
-        "read_all": False,
-        "create": False,
-        "update": False,
-        "update_all": False,
-        "delete": False,
-        "delete_all": False,
-    }
-    for rule in rules:
-        agg["read"] = agg["read"] or rule.read
-        agg["read_all"] = agg["read_all"] or rule.read_all
-        agg["create"] = agg["create"] or rule.create
-        agg["update"] = agg["update"] or rule.update
-        agg["update_all"] = agg["update_all"] or rule.update_all
-        agg["delete"] = agg["delete"] or rule.delete
-        agg["delete_all"] = agg["delete_all"] or rule.delete_all
-    return agg
+    # Если правил нет, все флаги остаются False
+    return mask_to_flags(mask)
+
+
+def get_request_rule(request, element_code: str) -> Optional[dict]:
+    """Эффективное правило, вычисляемое один раз за запрос.
+
+    permission (has_permission/has_object_permission) и get_queryset
+    обращаются к одному и тому же правилу, поэтому результат кешируется
+    на объекте запроса по коду элемента.
+    """
+    rules = getattr(request, "_effective_rules", None)
+    if rules is None:
+        rules = {}
+        request._effective_rules = rules
+    if element_code not in rules:
+        rules[element_code] = get_effective_rule(request.user, element_code)
+    return rules[element_code]
 
 
 class HasAccessPermission(BasePermission):
@@ -56,7 +44,7 @@ class HasAccessPermission(BasePermission):
         if not element_code:
             return True
 
-        rule = get_effective_rule(request.user, element_code)
+        rule = get_request_rule(request, element_code)
         if rule is None:
             raise NotAuthenticated()
 
@@ -75,7 +63,7 @@ class HasAccessPermission(BasePermission):
         element_code = getattr(view, "element_code", None)
         if not element_code:
             return True
-        rule = get_effective_rule(request.user, element_code)
+        rule = get_request_rule(request, element_code)
         if rule is None:
             raise NotAuthenticated()
 
@@ -118,5 +106,7 @@ class IsAdminRole(BasePermission):
     def has_permission(self, request, view):
         user = request.user
         return bool(
-            user and user.is_authenticated and user.roles.filter(name="admin").exists()
+            user
+            and user.is_authenticated
+            and user_has_role(user, "admin")
         )
@@ -0,0 +1,101 @@
+"""Очистка истекших refresh-токенов и отозванных access-токенов.
+
+Строки удаляются небольшими пачками в порядке ``expires_at`` (индексы из
+миграции ``0010_token_indexes``): каждая пачка - отдельный короткий DELETE
+в autocommit, между пачками пауза, чтобы не держать блокировки и не
+забивать диск журналом. Следующая пачка начинается с ``expires_at`` конца
+предыдущей (keyset), а не сканирует заново уже удаленное начало индекса.
+
+Запускается командой ``purge_tokens``: разово по cron или отдельным
+процессом с ``--every`` (``TOKEN_PURGE_INTERVAL_SEC``), но не потоком внутри
+веб-сервера - поток в мастере gunicorn с ``--preload`` переживал бы fork
+воркеров с открытыми соединениями и блокировками.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RefreshToken, RevokedAccessToken
+from .tokens import TOKEN_LEEWAY_SEC
+
+PURGED_MODELS = (RefreshToken, RevokedAccessToken)
+
+
+@dataclass
+class PurgeResult:
+    table: str
+    deleted: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    def summary(self) -> dict:
+        return {
+            "table": self.table,
+            "deleted": self.deleted,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 3),
+            "rows_per_sec": round(self.deleted / self.seconds) if self.seconds else 0,
+        }
+
+
+def purge_cutoff(now: Optional[datetime] = None) -> datetime:
+    # exp проверяется с допуском: токен в пределах допуска еще валиден
+    return (now or timezone.now()) - timedelta(seconds=TOKEN_LEEWAY_SEC)
+
+
+def expired_tokens(model, cutoff: datetime):
+    """Истекшие строки в порядке индекса по expires_at."""
+    return model.objects.filter(expires_at__lt=cutoff).order_by("expires_at")
+
+
+def purge_expired(
+    model,
+    batch_size: int,
+    sleep_sec: float = 0.0,
+    now: Optional[datetime] = None,
+    max_batches: Optional[int] = None,
+) -> PurgeResult:
+    result = PurgeResult(model._meta.db_table)
+    expired = expired_tokens(model, purge_cutoff(now))
+    started = time.monotonic()
+    last_expires_at = None
+    while max_batches is None or result.batches < max_batches:
+        batch = expired
+        if last_expires_at is not None:
+            # >=, а не >: строки с тем же expires_at могли не войти в пачку,
+            # а удаленные уже не вернутся
+            batch = batch.filter(expires_at__gte=last_expires_at)
+        keys = list(batch.values_list("id", "expires_at")[:batch_size])
+        if not keys:
+            break
+        deleted, _ = model.objects.filter(id__in=[pk for pk, _ in keys]).delete()
+        result.deleted += deleted
+        result.batches += 1
+        last_expires_at = keys[-1][1]
+        if len(keys) < batch_size:
+            break
+        if sleep_sec > 0:
+            time.sleep(sleep_sec)
+    result.seconds = time.monotonic() - started
+    return result
+
+
+def purge_expired_tokens(
+    batch_size: Optional[int] = None,
+    sleep_sec: Optional[float] = None,
+    now: Optional[datetime] = None,
+    max_batches: Optional[int] = None,
+) -> list[PurgeResult]:
+    if batch_size is None:
+        batch_size = settings.TOKEN_PURGE_BATCH_SIZE
+    if sleep_sec is None:
+        sleep_sec = settings.TOKEN_PURGE_SLEEP_SEC
+    return [
+        purge_expired(model, batch_size, sleep_sec, now, max_batches)
+        for model in PURGED_MODELS
+    ]
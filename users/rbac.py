@@ -0,0 +1,175 @@
+"""Процессный кеш RBAC-матрицы роль × бизнес-элемент.
+
+Правила доступа читаются на каждый запрос, а меняются редко, поэтому все
+правила компилируются в битовые маски и держатся в памяти процесса.
+Актуальность снимка определяется версией в основной БД (``RBACVersion``):
+любая запись в роли/элементы/правила меняет версию в той же транзакции, и
+каждый воркер лениво пересобирает матрицу при следующем обращении. Версия
+в общем кеше с ``locmemcache://`` существовала бы в каждом процессе своя.
+"""
+
+import threading
+import time
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Aggregate, IntegerField, Q
+
+from .models import (
+    RBAC_VERSION_PK,
+    AccessRoleRule,
+    BusinessElement,
+    RBACVersion,
+    Role,
+)
+
+
+class BitOr(Aggregate):
+    """BIT_OR: нативный в Postgres, для SQLite регистрируется в signals."""
+
+    function = "BIT_OR"
+    name = "BitOr"
+    output_field = IntegerField()
+
+
+class RBACMatrix:
+    def __init__(
+        self,
+        version: Optional[str],
+        masks: dict[tuple[int, str], int],
+        element_codes: Iterable[str],
+        role_ids_by_name: dict[str, int],
+    ):
+        self.version = version
+        self.masks = masks
+        self.element_codes = frozenset(element_codes)
+        self.role_ids_by_name = role_ids_by_name
+        self.built_at = time.monotonic()
+
+    def has_element(self, element_code: str) -> bool:
+        return element_code in self.element_codes
+
+    def mask_for(self, role_ids: Iterable[int], element_code: str) -> int:
+        mask = 0
+        for role_id in role_ids:
+            mask |= self.masks.get((role_id, element_code), 0)
+        return mask
+
+    def has_role(self, role_ids: Iterable[int], role_name: str) -> bool:
+        role_id = self.role_ids_by_name.get(role_name)
+        return role_id is not None and role_id in role_ids
+
+
+_lock = threading.Lock()
+_matrix: Optional[RBACMatrix] = None
+
+
+def _current_version() -> Optional[str]:
+    return (
+        RBACVersion.objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk=RBAC_VERSION_PK)
+        .values_list("version", flat=True)
+        .first()
+    )
+
+
+def build_rbac_matrix(version: Optional[str] = None) -> RBACMatrix:
+    # Всегда с основной БД: снимок, собранный с отстающей реплики, остался бы
+    # в кеше с новой версией до следующего изменения правил
+    db = DEFAULT_DB_ALIAS
+    element_codes = list(
+        BusinessElement.objects.using(db).values_list("code", flat=True)
+    )
+    role_ids_by_name = dict(Role.objects.using(db).values_list("name", "id"))
+    rules = AccessRoleRule.objects.using(db).values_list(
+        "role_id", "element__code", "permissions"
+    )
+    masks = {
+        (role_id, element_code): permissions
+        for role_id, element_code, permissions in rules
+    }
+    return RBACMatrix(version, masks, element_codes, role_ids_by_name)
+
+
+def get_rbac_matrix() -> RBACMatrix:
+    global _matrix
+    version = _current_version()
+    # Строки версии нет (например, после flush) - собираем каждый раз
+    if version is None:
+        return build_rbac_matrix()
+
+    ttl = settings.RBAC_CACHE_TTL_SEC
+    matrix = _matrix
+    if (
+        matrix is not None
+        and matrix.version == version
+        and time.monotonic() - matrix.built_at < ttl
+    ):
+        return matrix
+    with _lock:
+        matrix = _matrix
+        if (
+            matrix is None
+            or matrix.version != version
+            or time.monotonic() - matrix.built_at >= ttl
+        ):
+            matrix = build_rbac_matrix(version)
+            _matrix = matrix
+    return matrix
+
+
+def query_effective_mask(user, element_code: str) -> Optional[int]:
+    """Маска прав пользователя на элемент одним запросом (BIT_OR по ролям).
+
+    None - элемента не существует, 0 - элемент есть, но правил нет.
+    """
+    role_ids = user.roles.through.objects.filter(user_id=user.pk).values("role_id")
+    masks = list(
+        BusinessElement.objects.filter(code=element_code)
+        .annotate(
+            mask=BitOr(
+                "accessrolerule__permissions",
+                filter=Q(accessrolerule__role_id__in=role_ids),
+            )
+        )
+        .values_list("mask", flat=True)[:1]
+    )
+    if not masks:
+        return None
+    return masks[0] or 0
+
+
+def get_effective_mask(user, element_code: str) -> Optional[int]:
+    if settings.RBAC_CACHE_TTL_SEC <= 0:
+        return query_effective_mask(user, element_code)
+    matrix = get_rbac_matrix()
+    if not matrix.has_element(element_code):
+        return None
+    return matrix.mask_for(get_user_role_ids(user), element_code)
+
+
+def user_has_role(user, role_name: str) -> bool:
+    if settings.RBAC_CACHE_TTL_SEC <= 0:
+        return user.roles.filter(name=role_name).exists()
+    return get_rbac_matrix().has_role(get_user_role_ids(user), role_name)
+
+
+def bump_rbac_version() -> None:
+    """Помечает матрицу устаревшей во всех воркерах.
+
+    Версия меняется в текущей транзакции: до коммита новую версию видит
+    только этот процесс, остальные - вместе с изменениями правил. Значение
+    случайное, а не счетчик: после отката та же версия не вернется с
+    другими правилами.
+    """
+    RBACVersion.bump()
+
+
+def get_user_role_ids(user) -> frozenset:
+    """id ролей пользователя; кешируются на экземпляре на время запроса."""
+    role_ids = getattr(user, "_rbac_role_ids", None)
+    if role_ids is None:
+        role_ids = frozenset(user.roles.values_list("id", flat=True))
+        user._rbac_role_ids = role_ids
+    return role_ids
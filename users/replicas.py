@@ -0,0 +1,88 @@
+"""Чтение с реплик БД для явно подключенных представлений.
+
+``ReplicaRouter`` отправляет чтения на случайную реплику из
+``DATABASE_REPLICAS`` только пока активен контекст, который включает
+``ReplicaReadsMixin`` для безопасных методов (GET/HEAD/OPTIONS). Команды,
+сигналы и остальные представления читают с основной БД.
+
+Read-your-writes: после небезопасного запроса пользователь на
+``DB_REPLICA_STICKY_SEC`` секунд закрепляется за основной БД. Метка хранится в
+кеше Django, поэтому с репликами ``CACHE_URL`` обязан быть общим для всех
+воркеров (Redis/Memcached): с кешем в памяти процесса настройки не загрузятся.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+PRIMARY_PIN_KEY = "users:db:primary-pin:{}"
+
+_replica_reads: ContextVar[bool] = ContextVar("replica_reads", default=False)
+
+
+def pin_to_primary(user_id) -> None:
+    if settings.DATABASE_REPLICAS and settings.DB_REPLICA_STICKY_SEC > 0:
+        cache.set(
+            PRIMARY_PIN_KEY.format(user_id), 1, timeout=settings.DB_REPLICA_STICKY_SEC
+        )
+
+
+def is_pinned_to_primary(user_id) -> bool:
+    return cache.get(PRIMARY_PIN_KEY.format(user_id)) is not None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and _replica_reads.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Явно, а не None: иначе Django пишет в базу, из которой прочитан
+        # экземпляр, то есть в реплику
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная БД
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Схема попадает на реплики репликацией
+        return None if db == DEFAULT_DB_ALIAS else False
+
+
+class ReplicaReadsMixin:
+    """Подключает чтение с реплик для безопасных методов DRF-представления.
+
+    Аутентификация выполняется до включения (токены, отзыв и пользователь
+    читаются с основной БД). Ленивые выборки, которые выполняются после
+    выхода из представления (стриминг), должны зафиксировать базу через
+    ``queryset.using(queryset.db)``.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _replica_reads.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        user = request.user
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method in SAFE_METHODS
+            and not (user.is_authenticated and is_pinned_to_primary(user.pk))
+        ):
+            _replica_reads.set(True)
+        super().initial(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        user = getattr(request, "_user", None)
+        if request.method not in SAFE_METHODS and user and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
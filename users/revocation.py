@@ -0,0 +1,121 @@
+"""Набор отозванных access-токенов в памяти процесса.
+
+Отозванный access-токен важен только до своего exp, поэтому вместо запроса
+к ``RevokedAccessToken`` на каждый запрос процесс держит множество jti,
+которое инкрементально дополняется из БД (по ``created_at``) не чаще чем
+раз в ``JWT_REVOCATION_POLL_SEC`` секунд и очищается колесом таймеров по
+``expires_at``.
+"""
+
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from django.conf import settings
+
+from .models import RevokedAccessToken
+from .tokens import TOKEN_LEEWAY_SEC
+
+# Запас при опросе: строки, закоммиченные позже своего created_at
+POLL_OVERLAP = timedelta(seconds=30)
+
+
+class RevokedTokenRegistry:
+    def __init__(self, resolution_sec: int = 1):
+        self.resolution = resolution_sec
+        self._expires: dict[str, float] = {}
+        self._wheel: defaultdict[int, set[str]] = defaultdict(set)
+        self._cursor = self._bucket(time.time())
+        self._high_water: Optional[datetime] = None
+        self._last_poll = -math.inf
+        self._lock = threading.Lock()
+
+    def _bucket(self, ts: float) -> int:
+        return int(ts // self.resolution)
+
+    def _add(self, jti: str, expires_at: datetime) -> None:
+        # exp проверяется с допуском, поэтому храним jti чуть дольше
+        drop_at = expires_at.timestamp() + TOKEN_LEEWAY_SEC
+        if drop_at <= time.time() or jti in self._expires:
+            return
+        self._expires[jti] = drop_at
+        self._wheel[self._bucket(drop_at)].add(jti)
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._add(jti, expires_at)
+
+    def _prune(self, now: float) -> None:
+        current = self._bucket(now)
+        if current - self._cursor > len(self._wheel):
+            expired = [bucket for bucket in self._wheel if bucket < current]
+        else:
+            expired = range(self._cursor, current)
+        for bucket in expired:
+            for jti in self._wheel.pop(bucket, ()):
+                self._expires.pop(jti, None)
+        self._cursor = current
+
+    def _poll_queryset(self, now: datetime):
+        rows = RevokedAccessToken.objects.filter(expires_at__gt=now)
+        with self._lock:
+            high_water = self._high_water
+        if high_water is not None:
+            rows = rows.filter(created_at__gte=high_water - POLL_OVERLAP)
+        return rows.values_list("jti", "expires_at", "created_at")
+
+    def _apply_poll(self, rows, now: datetime) -> None:
+        with self._lock:
+            for jti, expires_at, created_at in rows:
+                self._add(jti, expires_at)
+                if self._high_water is None or created_at > self._high_water:
+                    self._high_water = created_at
+            if self._high_water is None:
+                self._high_water = now
+            self._last_poll = time.monotonic()
+
+    def poll(self) -> None:
+        """Подтягивает из БД записи, появившиеся после прошлого опроса."""
+        now = datetime.now(timezone.utc)
+        self._apply_poll(list(self._poll_queryset(now)), now)
+
+    async def apoll(self) -> None:
+        now = datetime.now(timezone.utc)
+        rows = [row async for row in self._poll_queryset(now)]
+        self._apply_poll(rows, now)
+
+    def _poll_due(self) -> bool:
+        with self._lock:
+            due = time.monotonic() - self._last_poll >= settings.JWT_REVOCATION_POLL_SEC
+            if due:
+                # Остальные потоки не ждут опроса и не дублируют его
+                self._last_poll = time.monotonic()
+        return due
+
+    def _contains(self, jti: str) -> bool:
+        with self._lock:
+            self._prune(time.time())
+            return jti in self._expires
+
+    def is_revoked(self, jti: str) -> bool:
+        if settings.JWT_REVOCATION_POLL_SEC <= 0:
+            return RevokedAccessToken.objects.filter(jti=jti).exists()
+        if self._poll_due():
+            self.poll()
+        return self._contains(jti)
+
+    async def ais_revoked(self, jti: str) -> bool:
+        if settings.JWT_REVOCATION_POLL_SEC <= 0:
+            return await RevokedAccessToken.objects.filter(jti=jti).aexists()
+        if self._poll_due():
+            await self.apoll()
+        return self._contains(jti)
+
+    def __len__(self) -> int:
+        return len(self._expires)
+
+
+revoked_access_tokens = RevokedTokenRegistry()
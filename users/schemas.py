@@ -1,4 +1,5 @@
 from drf_spectacular.utils import (
+    OpenApiParameter,
     OpenApiTypes,
     extend_schema,
     extend_schema_view,
@@ -9,6 +10,8 @@ from rest_framework import serializers
 from .serializers import (
     AccessRoleRuleSerializer,
     BusinessElementSerializer,
+    ItemBulkDeleteSerializer,
+    ItemBulkUpdateSerializer,
     ItemSerializer,
     LoginSerializer,
     MeUpdateSerializer,
@@ -28,7 +31,56 @@ LoginResponse = inline_serializer(
 
 RefreshResponse = inline_serializer(
     name="RefreshResponse",
-    fields={"access": serializers.CharField()},
+    fields={
+        "access": serializers.CharField(),
+        "refresh": serializers.CharField(required=False),
+    },
+)
+
+ItemBulkResponse = inline_serializer(
+    name="ItemBulkResponse",
+    fields={
+        "results": inline_serializer(
+            name="ItemBulkResult",
+            fields={
+                "id": serializers.IntegerField(required=False),
+                "index": serializers.IntegerField(required=False),
+                "status": serializers.ChoiceField(
+                    choices=[
+                        "created",
+                        "updated",
+                        "deleted",
+                        "invalid",
+                        "forbidden",
+                        "not_found",
+                    ]
+                ),
+                "item": ItemSerializer(required=False),
+                "errors": serializers.DictField(required=False),
+            },
+            many=True,
+        )
+    },
+)
+
+ItemChangesResponse = inline_serializer(
+    name="ItemChangesResponse",
+    fields={
+        "results": inline_serializer(
+            name="ItemChange",
+            fields={
+                "seq": serializers.IntegerField(),
+                "op": serializers.ChoiceField(choices=["upsert", "delete"]),
+                "id": serializers.IntegerField(),
+                "title": serializers.CharField(allow_null=True),
+                "owner_email": serializers.EmailField(allow_null=True),
+                "changed_at": serializers.DateTimeField(),
+            },
+            many=True,
+        ),
+        "next": serializers.IntegerField(),
+        "has_more": serializers.BooleanField(),
+    },
 )
 
 LogoutRequest = inline_serializer(
@@ -61,7 +113,8 @@ SCHEMA_REFRESH = extend_schema(
     ),
     summary="Обновление access-токена",
     description=(
-        "Принимает refresh-токен и возвращает новый access-токен. "
+        "Принимает refresh-токен и возвращает новый access-токен "
+        "(и новый refresh, если включена ротация). "
         "Если токен просрочен, некорректен или отозван (блеклист) — 401."
     ),
     responses={200: RefreshResponse},
@@ -92,7 +145,8 @@ SCHEMA_LOGOUT_POST = extend_schema(
     summary="Выход из системы",
     description=(
         "При вызове текущий access отзывается. Если передан refresh — он будет отозван;"
-        " если не передан — будут отозваны все активные refresh пользователя."
+        " если не передан — будут отозваны все access и refresh пользователя"
+        " (выход со всех устройств). "
         "Возвращает 204."
     ),
     request=LogoutRequest,
@@ -190,6 +244,14 @@ SCHEMA_ITEM_VIEWSET = extend_schema_view(
         tags=["Items"],
         summary="Список айтемов",
         description="Возвращает все или только свои — согласно флагам read/read_all.",
+        parameters=[
+            OpenApiParameter(
+                "fields",
+                OpenApiTypes.STR,
+                description="Поля через запятую (id, title, owner_email). "
+                "Без owner_email список не делает JOIN с пользователями.",
+            )
+        ],
         responses={200: ItemSerializer(many=True)},
     ),
     retrieve=extend_schema(
@@ -210,4 +272,74 @@ SCHEMA_ITEM_VIEWSET = extend_schema_view(
     destroy=extend_schema(
         tags=["Items"], summary="Удалить айтем", responses={204: OpenApiTypes.NONE}
     ),
+    bulk=[
+        extend_schema(
+            methods=["POST"],
+            tags=["Items"],
+            summary="Пакетное создание айтемов",
+            request=ItemSerializer(many=True),
+            responses={200: ItemBulkResponse},
+        ),
+        extend_schema(
+            methods=["PATCH"],
+            tags=["Items"],
+            summary="Пакетное обновление айтемов",
+            description="Чужие айтемы без update_all - forbidden, невидимые - "
+            "not_found.",
+            request=ItemBulkUpdateSerializer(many=True),
+            responses={200: ItemBulkResponse},
+        ),
+        extend_schema(
+            methods=["DELETE"],
+            tags=["Items"],
+            summary="Пакетное удаление айтемов",
+            request=ItemBulkDeleteSerializer,
+            responses={200: ItemBulkResponse},
+        ),
+    ],
+    changes=extend_schema(
+        tags=["Items"],
+        summary="Лента изменений айтемов",
+        description="Изменения с номером больше since (удаления - op=delete). "
+        "Значение next передается как since в следующем запросе.",
+        parameters=[
+            OpenApiParameter("since", OpenApiTypes.INT, default=0),
+            OpenApiParameter("page_size", OpenApiTypes.INT),
+        ],
+        responses={200: ItemChangesResponse},
+    ),
+    export=extend_schema(
+        tags=["Items"],
+        summary="Потоковая выгрузка айтемов",
+        description="Все доступные айтемы (по флагам read/read_all) одним потоком "
+        "NDJSON или CSV. При Accept-Encoding: gzip ответ сжимается на лету.",
+        parameters=[
+            OpenApiParameter(
+                "output", OpenApiTypes.STR, enum=["ndjson", "csv"], default="ndjson"
+            ),
+            OpenApiParameter(
+                "fields",
+                OpenApiTypes.STR,
+                description="Поля через запятую (id, title, owner_email).",
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    ),
+)
+
+SCHEMA_DB_DIAGNOSTICS = extend_schema(
+    tags=["Diagnostics"],
+    summary="Соединения с БД",
+    description="Настройки постоянных соединений и статистика пула psycopg "
+    "(pool_size, pool_available, requests_waiting и др.) процесса, обработавшего "
+    "запрос. Только для роли admin.",
+    responses={
+        200: inline_serializer(
+            name="DatabaseDiagnosticsResponse",
+            fields={
+                "pid": serializers.IntegerField(),
+                "databases": serializers.ListField(child=serializers.DictField()),
+            },
+        )
+    },
 )
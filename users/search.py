@@ -0,0 +1,51 @@
+"""Полнотекстовый поиск по Item.title с префиксным совпадением слов.
+
+Postgres: GIN-индекс по ``to_tsvector('simple', title)`` и запрос
+``to_tsquery('simple', 'слово:* & ...')``. SQLite: внешняя (external content)
+FTS5-таблица ``users_item_fts``, которую синхронизируют триггеры на
+``users_item``. Индекс, таблицу и триггеры создает миграция
+``0007_item_title_search``. Остальные СУБД - ``icontains`` по каждому слову.
+
+Семантика на обеих основных СУБД одинакова: каждое слово запроса должно
+быть началом какого-либо слова названия (регистр не важен).
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+# Больше слов в запросе не нужно, а длинный tsquery/MATCH дорог
+MAX_SEARCH_TERMS = 8
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query: str) -> list[str]:
+    return _WORD_RE.findall(query.lower())[:MAX_SEARCH_TERMS]
+
+
+def filter_items_by_title(queryset, query: str):
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    vendor = connection.vendor
+    if vendor == "postgresql":
+        # Выражение совпадает с индексным, иначе GIN не используется
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        condition = RawSQL(
+            "to_tsvector('simple', users_item.title) @@ to_tsquery('simple', %s)",
+            [tsquery],
+            output_field=BooleanField(),
+        )
+        return queryset.filter(condition)
+    if vendor == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        matched_ids = RawSQL(
+            "SELECT rowid FROM users_item_fts WHERE users_item_fts MATCH %s", [match]
+        )
+        return queryset.filter(id__in=matched_ids)
+    for term in terms:
+        queryset = queryset.filter(title__icontains=term)
+    return queryset
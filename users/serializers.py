@@ -3,6 +3,7 @@ from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from rest_framework import serializers
 
+from .hashing import averify_user_password, make_password, verify_user_password
 from .models import AccessRoleRule, BusinessElement, Item, Role
 
 User = get_user_model()
@@ -11,7 +12,7 @@ User = get_user_model()
 class UserOutSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ("id", "email", "first_name", "middle_name", "last_name", "is_active")
+        fields = ("id", *User.PROFILE_FIELDS)
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -42,15 +43,36 @@ class RegisterSerializer(serializers.ModelSerializer):
         validated_data.pop("password2")
         pwd = validated_data.pop("password")
         user = User(**validated_data)
-        user.set_password(pwd)
+        user.password = make_password(pwd)
         user.save()
         return user
 
 
-class LoginSerializer(serializers.Serializer):
+class LoginCredentialsSerializer(serializers.Serializer):
+    """Поля логина без проверки учетных данных (не обращается к БД)."""
+
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
+    @staticmethod
+    async def aauthenticate(email: str, password: str):
+        """Асинхронная проверка учетных данных (async ORM + пул bcrypt)."""
+        try:
+            user = await User.objects.aget(email=email)
+        except User.DoesNotExist:
+            raise serializers.ValidationError({"email": ["Неверные учетные данные"]})
+        if not user.is_active:
+            raise serializers.ValidationError(
+                {"email": ["Пользователь деактивирован"]}
+            )
+        if not await averify_user_password(user, password):
+            raise serializers.ValidationError(
+                {"password": ["Неверные учетные данные"]}
+            )
+        return user
+
+
+class LoginSerializer(LoginCredentialsSerializer):
     def validate(self, attrs):
         email, password = attrs["email"], attrs["password"]
         try:
@@ -59,7 +81,7 @@ class LoginSerializer(serializers.Serializer):
             raise ValidationError({"email": "Неверные учетные данные"})
         if not user.is_active:
             raise ValidationError({"email": "Пользователь деактивирован"})
-        if not user.check_password(password):
+        if not verify_user_password(user, password):
             raise ValidationError({"password": "Неверные учетные данные"})
         attrs["user"] = user
         return attrs
@@ -70,6 +92,15 @@ class MeUpdateSerializer(serializers.ModelSerializer):
         model = User
         fields = ("first_name", "middle_name", "last_name")
 
+    def update(self, instance, validated_data):
+        # Версию профиля (ETag /auth/me/) увеличивает User.save()
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=list(validated_data))
+        # Версия и остальные поля ответа - из одной строки БД
+        instance.refresh_from_db(fields=["profile_version", *User.PROFILE_FIELDS])
+        return instance
+
 
 class RoleSerializer(serializers.ModelSerializer):
     class Meta:
@@ -106,3 +137,12 @@ class ItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = Item
         fields = ("id", "title", "owner_email")
+
+
+class ItemBulkUpdateSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField(max_length=200)
+
+
+class ItemBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
@@ -0,0 +1,90 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from .authentication import invalidate_cached_user, invalidate_cached_user_all
+from .hashing import reset_hashing_pool
+from .models import (
+    AccessRoleRule,
+    BusinessElement,
+    Item,
+    ItemChange,
+    Role,
+    User,
+    tokens_revoked,
+)
+from .rbac import bump_rbac_version
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=BusinessElement)
+@receiver(post_delete, sender=BusinessElement)
+@receiver(post_save, sender=AccessRoleRule)
+@receiver(post_delete, sender=AccessRoleRule)
+def invalidate_rbac_matrix(sender, **kwargs):
+    bump_rbac_version()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(tokens_revoked, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def invalidate_user_roles_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_cached_user(instance.pk)
+    elif pk_set:
+        # role.user_set.add/remove: pk_set - id пользователей
+        for user_id in pk_set:
+            invalidate_cached_user(user_id)
+    else:
+        # role.user_set.clear(): затронутых пользователей уже не узнать
+        invalidate_cached_user_all()
+
+
+@receiver(post_save, sender=Item)
+def record_item_upsert(sender, instance, **kwargs):
+    # bulk_create/bulk_update/QuerySet.delete сигналов не шлют - такие пути
+    # пишут ItemChange сами
+    ItemChange.objects.bulk_create(
+        ItemChange.for_items([instance], ItemChange.OP_UPSERT)
+    )
+
+
+@receiver(post_delete, sender=Item)
+def record_item_delete(sender, instance, **kwargs):
+    ItemChange.objects.bulk_create(
+        ItemChange.for_items([instance], ItemChange.OP_DELETE)
+    )
+
+
+class _SQLiteBitOr:
+    def __init__(self):
+        self.value = None
+
+    def step(self, value):
+        if value is not None:
+            self.value = (self.value or 0) | value
+
+    def finalize(self):
+        return self.value
+
+
+@receiver(connection_created)
+def register_sqlite_bit_or(sender, connection, **kwargs):
+    # В SQLite нет агрегата BIT_OR, регистрируем совместимую реализацию
+    if connection.vendor == "sqlite":
+        connection.connection.create_aggregate("BIT_OR", 1, _SQLiteBitOr)
+
+
+@receiver(setting_changed)
+def reset_hashing_pool_on_settings_change(setting, **kwargs):
+    if setting.startswith("PASSWORD_HASHING_"):
+        reset_hashing_pool()
@@ -1,6 +1,56 @@
+import csv
+import gzip
+import io
+import json
+import shlex
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
 from django.core.management import call_command
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import F
+from django.test import AsyncRequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
-from rest_framework.test import APIClient, APITestCase
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+
+from .async_views import (
+    AsyncLoginView,
+    AsyncLogoutView,
+    AsyncMeView,
+    AsyncRefreshView,
+)
+from .authentication import USER_GENERATION_KEY, invalidate_cached_user_all
+from .conditional import user_etag
+from .hashing import BatchPasswordHasher, get_hashing_pool
+from .management.commands.bench_api import ENDPOINTS as BENCH_ENDPOINTS
+from .models import (
+    AccessRoleRule,
+    BusinessElement,
+    Item,
+    ItemChange,
+    RBACVersion,
+    RefreshToken,
+    RevokedAccessToken,
+    Role,
+    User,
+    flags_to_mask,
+    mask_to_flags,
+)
+from .permissions import get_effective_rule
+from .purge import purge_expired_tokens
+from .rbac import bump_rbac_version, query_effective_mask
+from .replicas import PRIMARY_PIN_KEY
+from .revocation import RevokedTokenRegistry, revoked_access_tokens
+from .serializers import ItemSerializer
+from .tokens import decode_token
 
 API_PREFIX = "/api"
 
@@ -177,8 +227,8 @@ class RBACTests(APITestCase):
         self.assertEqual(
             response_user.status_code, status.HTTP_200_OK, response_user.content
         )
-        self.assertTrue(isinstance(response_user.data, list))
-        self.assertEqual(len(response_user.data), 2)
+        self.assertTrue(isinstance(response_user.data["results"], list))
+        self.assertEqual(len(response_user.data["results"]), 2)
 
         # 200 у manager: read_all => видит все 4 items
         self.client.credentials()
@@ -193,7 +243,7 @@ class RBACTests(APITestCase):
         self.assertEqual(
             response_manager.status_code, status.HTTP_200_OK, response_manager.content
         )
-        self.assertEqual(len(response_manager.data), 4)
+        self.assertEqual(len(response_manager.data["results"]), 4)
 
     def test_rbac_admin_endpoints_require_admin_role(self):
         # user -> 403
@@ -407,9 +457,9 @@ class ItemsCRUDTests(APITestCase):
         # Получаем список items пользователя
         items_resp = self.client.get(api_url("/items/"))
         self.assertEqual(items_resp.status_code, status.HTTP_200_OK)
-        self.assertGreater(len(items_resp.data), 0)
+        self.assertGreater(len(items_resp.data["results"]), 0)
 
-        item_id = items_resp.data[0]["id"]
+        item_id = items_resp.data["results"][0]["id"]
 
         # Обновляем свой item
         resp = self.client.patch(
@@ -430,7 +480,7 @@ class ItemsCRUDTests(APITestCase):
         # Находим item, который НЕ принадлежит user
         other_items = [
             item
-            for item in items_resp.data
+            for item in items_resp.data["results"]
             if item["owner_email"] != "user@example.com"
         ]
         self.assertGreater(len(other_items), 0)
@@ -456,8 +506,8 @@ class ItemsCRUDTests(APITestCase):
 
         # Получаем любой item
         items_resp = self.client.get(api_url("/items/"))
-        self.assertGreater(len(items_resp.data), 0)
-        item_id = items_resp.data[0]["id"]
+        self.assertGreater(len(items_resp.data["results"]), 0)
+        item_id = items_resp.data["results"][0]["id"]
 
         # Обновляем любой item
         resp = self.client.patch(
@@ -599,8 +649,8 @@ class RBACCRUDTests(APITestCase):
 
         # Получаем существующую роль
         roles_resp = self.client.get(api_url("/rbac/roles/"))
-        self.assertGreater(len(roles_resp.data), 0)
-        role_id = roles_resp.data[0]["id"]
+        self.assertGreater(len(roles_resp.data["results"]), 0)
+        role_id = roles_resp.data["results"][0]["id"]
 
         # Обновляем роль
         resp = self.client.patch(
@@ -629,8 +679,8 @@ class RBACCRUDTests(APITestCase):
         roles_resp = self.client.get(api_url("/rbac/roles/"))
         elements_resp = self.client.get(api_url("/rbac/elements/"))
 
-        role_id = roles_resp.data[0]["id"]
-        element_id = elements_resp.data[0]["id"]
+        role_id = roles_resp.data["results"][0]["id"]
+        element_id = elements_resp.data["results"][0]["id"]
 
         resp = self.client.post(
             api_url("/rbac/access-rules/"),
@@ -653,3 +703,1624 @@ class RBACCRUDTests(APITestCase):
             [status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST],
             resp.content,
         )
+
+
+class ItemsQueryBudgetTests(APITestCase):
+    """Количество SQL-запросов на операции с items фиксировано"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "user@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.item_id = self.client.get(api_url("/items/")).data["results"][0]["id"]
+
+    def test_list_query_budget(self):
+        # поколение токенов + версия RBAC + страница (ETag - по ее строкам)
+        with self.assertNumQueries(3):
+            resp = self.client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_list_not_modified_query_budget(self):
+        etag = self.client.get(api_url("/items/"))["ETag"]
+        with self.assertNumQueries(3):
+            resp = self.client.get(api_url("/items/"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_retrieve_query_budget(self):
+        with self.assertNumQueries(3):
+            resp = self.client.get(api_url(f"/items/{self.item_id}/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_update_query_budget(self):
+        # поколение токенов + версия RBAC + get_object + UPDATE + запись ItemChange
+        with self.assertNumQueries(5):
+            resp = self.client.patch(
+                api_url(f"/items/{self.item_id}/"), {"title": "Budget"}, format="json"
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_delete_query_budget(self):
+        # поколение токенов + версия RBAC + get_object + DELETE + tombstone
+        with self.assertNumQueries(5):
+            resp = self.client.delete(api_url(f"/items/{self.item_id}/"))
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT, resp.content)
+
+
+class RBACMatrixCacheTests(APITestCase):
+    """Тесты на процессный кеш RBAC-матрицы"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        # Откат транзакции теста не меняет версию матрицы
+        self.addCleanup(bump_rbac_version)
+
+    def login(self, email: str, password: str = "Passw0rd!"):
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": email, "password": password},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_rule_change_invalidates_matrix(self):
+        self.login("guest@example.com")
+        resp = self.client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN, resp.content)
+
+        rule = AccessRoleRule.objects.get(role__name="guest", element__code="items")
+        self.login("admin@example.com")
+        resp = self.client.patch(
+            api_url(f"/rbac/access-rules/{rule.id}/"), {"read": True}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+        self.login("guest@example.com")
+        resp = self.client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_rule_change_in_other_worker_invalidates_matrix(self):
+        self.login("guest@example.com")
+        resp = self.client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN, resp.content)
+        # Другой воркер: меняет правило и версию в БД без сигналов этого процесса
+        AccessRoleRule.objects.filter(role__name="guest", element__code="items").update(
+            read=True
+        )
+        RBACVersion.objects.update(version="other-worker")
+        resp = self.client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_bulk_writes_invalidate_matrix(self):
+        user = User.objects.get(email="user@example.com")
+        self.assertTrue(get_effective_rule(user, "items")["read"])
+        AccessRoleRule.objects.filter(element__code="items").update(
+            read=False, read_all=False
+        )
+        self.assertFalse(get_effective_rule(user, "items")["read"])
+
+        rules = list(AccessRoleRule.objects.filter(element__code="items"))
+        for rule in rules:
+            rule.read = True
+        AccessRoleRule.objects.bulk_update(rules, ["read"])
+        self.assertTrue(get_effective_rule(user, "items")["read"])
+
+        BusinessElement.objects.filter(code="items").update(code="goods")
+        self.assertIsNone(get_effective_rule(user, "items"))
+
+    def test_admin_check_does_not_query_rules(self):
+        self.login("admin@example.com")
+        self.client.get(api_url("/rbac/roles/"))
+        # поколение токенов, версия RBAC и сам список: blacklist, пользователь
+        # и матрица в памяти
+        with self.assertNumQueries(3):
+            resp = self.client.get(api_url("/rbac/roles/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+
+class AccessRuleMaskTests(APITestCase):
+    """Тесты на битовую маску правил и агрегацию BIT_OR в SQL"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def test_mask_follows_boolean_flags(self):
+        rule = AccessRoleRule.objects.get(role__name="user", element__code="items")
+        self.assertEqual(
+            mask_to_flags(rule.permissions),
+            {
+                "read": True,
+                "read_all": False,
+                "create": True,
+                "update": True,
+                "update_all": False,
+                "delete": True,
+                "delete_all": False,
+            },
+        )
+        rule.read_all = True
+        rule.save(update_fields=["read_all"])
+        rule.refresh_from_db()
+        self.assertTrue(mask_to_flags(rule.permissions)["read_all"])
+
+    def test_queryset_writes_keep_mask_in_sync(self):
+        rules = AccessRoleRule.objects.filter(element__code="items")
+        rules.update(read_all=True, delete=F("update"))
+        for rule in rules:
+            self.assertEqual(rule.permissions, flags_to_mask(rule))
+
+        rule = rules.get(role__name="guest")
+        rule.create = True
+        AccessRoleRule.objects.bulk_update([rule], ["create"])
+        rule.refresh_from_db()
+        self.assertTrue(mask_to_flags(rule.permissions)["create"])
+
+    def test_inconsistent_mask_rejected_by_database(self):
+        rule = AccessRoleRule.objects.get(role__name="guest", element__code="items")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AccessRoleRule.objects.filter(pk=rule.pk).update(permissions=127)
+
+    def test_query_effective_mask_is_single_query(self):
+        user = User.objects.get(email="manager@example.com")
+        user.roles.add(*User.objects.get(email="user@example.com").roles.all())
+        with self.assertNumQueries(1):
+            mask = query_effective_mask(user, "items")
+        flags = mask_to_flags(mask)
+        # manager: read_all/update; user: delete - итог объединяется по ролям
+        self.assertTrue(flags["read_all"])
+        self.assertTrue(flags["delete"])
+        self.assertFalse(flags["delete_all"])
+
+        BusinessElement.objects.create(code="empty", name="Empty")
+        self.assertEqual(query_effective_mask(user, "empty"), 0)
+        self.assertIsNone(query_effective_mask(user, "missing"))
+
+    @override_settings(RBAC_CACHE_TTL_SEC=0)
+    def test_items_without_matrix_cache(self):
+        client = APIClient()
+        resp = client.post(
+            api_url("/auth/login/"),
+            {"email": "user@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        client.get(api_url("/items/"))
+        # поколение токенов + маска прав + список
+        with self.assertNumQueries(3):
+            resp = client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        self.assertEqual(len(resp.data["results"]), 2)
+
+
+def use_shared_cache(test) -> None:
+    """Файловый кеш на время теста: в отличие от locmem, общий для процессов."""
+    cache_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(cache_dir.cleanup)
+    shared = override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": cache_dir.name,
+            }
+        }
+    )
+    shared.enable()
+    test.addCleanup(shared.disable)
+    test.addCleanup(invalidate_cached_user_all)
+
+
+class AuthUserCacheTests(APITestCase):
+    """Тесты на кеш пользователей в RequestUserAuthentication"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "guest@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.user = User.objects.get(email="guest@example.com")
+        # Откат транзакции теста не сбрасывает кеш пользователей
+        self.addCleanup(self.user.roles.set, list(self.user.roles.all()))
+
+    def test_cached_user_skips_user_query(self):
+        self.client.get(api_url("/auth/me/"))
+        # пользователь в кеше, blacklist в памяти; из БД - только поколение токенов
+        with self.assertNumQueries(1):
+            resp = self.client.get(api_url("/auth/me/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_deactivated_user_rejected(self):
+        self.assertEqual(self.client.get(api_url("/auth/me/")).status_code, 200)
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        resp = self.client.get(api_url("/auth/me/"))
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED, resp.content)
+
+    def test_role_assignment_invalidates_cache(self):
+        resp = self.client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN, resp.content)
+        self.user.roles.add(Role.objects.get(name="manager"))
+        resp = self.client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+
+class SharedAuthUserCacheTests(APITestCase):
+    """Тесты на сброс кеша пользователей в других процессах через общий кеш"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def setUp(self) -> None:
+        use_shared_cache(self)
+        self.client = APIClient()
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "guest@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.user = User.objects.get(email="guest@example.com")
+
+    def test_validated_hit_skips_token_version_query(self):
+        self.client.get(api_url("/auth/me/"))
+        # копия сверена с поколением в общем кеше - БД не нужна
+        with self.assertNumQueries(0):
+            resp = self.client.get(api_url("/auth/me/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_deactivation_in_other_worker_rejects_cached_user(self):
+        self.assertEqual(self.client.get(api_url("/auth/me/")).status_code, 200)
+        # Другой воркер: пишет в БД и меняет поколение в общем кеше, а кеш
+        # этого процесса не трогает
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        cache.set(USER_GENERATION_KEY.format(self.user.pk), "other-worker")
+        resp = self.client.get(api_url("/auth/me/"))
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED, resp.content)
+
+
+class RevokedTokenRegistryTests(APITestCase):
+    """Тесты на набор отозванных access-токенов в памяти процесса"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.post(
+            api_url("/auth/register/"),
+            {
+                "email": "test@example.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "password": "Passw0rd!",
+                "password2": "Passw0rd!",
+            },
+            format="json",
+        )
+        login_resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "test@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.access_token = login_resp.data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+
+    def test_token_revoked_by_other_worker_picked_up_by_poll(self):
+        self.assertEqual(self.client.get(api_url("/auth/me/")).status_code, 200)
+        # Запись, сделанная другим процессом, видна после очередного опроса
+        payload = decode_token(self.access_token, expected_type="access")
+        RevokedAccessToken.objects.create(
+            jti=payload["jti"],
+            user=User.objects.get(email="test@example.com"),
+            expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+        )
+        revoked_access_tokens.poll()
+        resp = self.client.get(api_url("/auth/me/"))
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED, resp.content)
+
+    @override_settings(JWT_REVOCATION_POLL_SEC=3600)
+    def test_expired_entries_are_pruned(self):
+        registry = RevokedTokenRegistry()
+        registry.poll()
+        now = datetime.now(timezone.utc)
+        registry.add("active", now + timedelta(minutes=5))
+        registry.add("expired", now - timedelta(minutes=5))
+        self.assertTrue(registry.is_revoked("active"))
+        self.assertFalse(registry.is_revoked("expired"))
+        self.assertEqual(len(registry), 1)
+
+
+class LogoutEverywhereTests(APITestCase):
+    """Тесты на отзыв всех токенов через поколение токенов пользователя"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.post(
+            api_url("/auth/register/"),
+            {
+                "email": "test@example.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "password": "Passw0rd!",
+                "password2": "Passw0rd!",
+            },
+            format="json",
+        )
+        self.sessions = [
+            self.client.post(
+                api_url("/auth/login/"),
+                {"email": "test@example.com", "password": "Passw0rd!"},
+                format="json",
+            ).data
+            for _ in range(2)
+        ]
+
+    def test_logout_without_refresh_revokes_all_sessions(self):
+        first, second = self.sessions
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {first['access']}")
+        self.assertEqual(self.client.get(api_url("/auth/me/")).status_code, 200)
+
+        # Поколение токенов для аутентификации + один UPDATE строки пользователя
+        with self.assertNumQueries(2):
+            logout = self.client.post(api_url("/auth/logout/"), {}, format="json")
+        self.assertEqual(logout.status_code, status.HTTP_204_NO_CONTENT)
+
+        for session in self.sessions:
+            self.client.credentials(
+                HTTP_AUTHORIZATION=f"Bearer {session['access']}"
+            )
+            resp = self.client.get(api_url("/auth/me/"))
+            self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertIn("revoked", str(resp.content).lower())
+            self.client.credentials()
+            resp = self.client.post(
+                api_url("/auth/refresh/"),
+                {"refresh": session["refresh"]},
+                format="json",
+            )
+            self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Новый логин выдаёт рабочие токены
+        login = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "test@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+        self.assertEqual(self.client.get(api_url("/auth/me/")).status_code, 200)
+
+    def test_revocation_in_other_worker_beats_cached_copy(self):
+        first = self.sessions[0]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {first['access']}")
+        self.assertEqual(self.client.get(api_url("/auth/me/")).status_code, 200)
+        # Другой воркер: UPDATE без сигналов, кеш этого процесса не сброшен
+        User.objects.filter(email="test@example.com").update(
+            token_version=F("token_version") + 1
+        )
+        login = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "test@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+
+        resp = self.client.get(api_url("/auth/me/"))
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.credentials()
+        resp = self.client.post(
+            api_url("/auth/refresh/"), {"refresh": first["refresh"]}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Токены свежего входа принимаются, хотя копия в кеше была старше
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {login.data['access']}")
+        self.assertEqual(self.client.get(api_url("/auth/me/")).status_code, 200)
+
+    def test_revoke_all_tokens_increments_in_database(self):
+        user = User.objects.get(email="test@example.com")
+        stale = User.objects.get(pk=user.pk)
+        user.revoke_all_tokens()
+        # Устаревшая копия не перезаписывает поколение своим значением + 1
+        stale.revoke_all_tokens()
+        self.assertEqual(stale.token_version, 2)
+
+
+@override_settings(JWT_ROTATE_REFRESH_TOKENS=True)
+class RefreshRotationTests(APITestCase):
+    """Тесты на ротацию refresh-токенов"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.post(
+            api_url("/auth/register/"),
+            {
+                "email": "test@example.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "password": "Passw0rd!",
+                "password2": "Passw0rd!",
+            },
+            format="json",
+        )
+        login = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "test@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.refresh_token = login.data["refresh"]
+
+    def refresh(self, token: str):
+        return self.client.post(
+            api_url("/auth/refresh/"), {"refresh": token}, format="json"
+        )
+
+    def test_refresh_rotates_token(self):
+        resp = self.refresh(self.refresh_token)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        new_refresh = resp.data["refresh"]
+        old_jti = decode_token(self.refresh_token, expected_type="refresh")["jti"]
+        new_jti = decode_token(new_refresh, expected_type="refresh")["jti"]
+        old_row = RefreshToken.objects.get(jti=old_jti)
+        self.assertTrue(old_row.revoked)
+        self.assertEqual(old_row.replaced_by, new_jti)
+        self.assertFalse(RefreshToken.objects.get(jti=new_jti).revoked)
+
+        resp = self.refresh(new_refresh)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_duplicate_refresh_within_grace_is_rejected_without_revocation(self):
+        new_refresh = self.refresh(self.refresh_token).data["refresh"]
+        resp = self.refresh(self.refresh_token)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        # Гонка клиента: новая сессия продолжает работать
+        self.assertEqual(self.refresh(new_refresh).status_code, status.HTTP_200_OK)
+
+    @override_settings(JWT_REFRESH_REUSE_GRACE_SEC=0)
+    def test_reuse_of_rotated_token_revokes_all_sessions(self):
+        new_refresh = self.refresh(self.refresh_token).data["refresh"]
+        resp = self.refresh(self.refresh_token)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+        resp = self.refresh(new_refresh)
+        self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PasswordHashingPoolTests(APITestCase):
+    """Тесты на пул хеширования паролей"""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.client.post(
+            api_url("/auth/register/"),
+            {
+                "email": "test@example.com",
+                "first_name": "Test",
+                "last_name": "User",
+                "password": "Passw0rd!",
+                "password2": "Passw0rd!",
+            },
+            format="json",
+        )
+
+    def login(self):
+        return self.client.post(
+            api_url("/auth/login/"),
+            {"email": "test@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_MAX_QUEUE=0)
+    def test_login_rejected_with_503_when_pool_is_full(self):
+        release = threading.Event()
+        busy = get_hashing_pool().submit(release.wait, 5)
+        try:
+            resp = self.login()
+            self.assertEqual(resp.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertIn("Retry-After", resp.headers)
+        finally:
+            release.set()
+            busy.result()
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    @override_settings(PASSWORD_HASHING_EXECUTOR="process", PASSWORD_HASHING_WORKERS=1)
+    def test_login_with_process_pool(self):
+        resp = self.login()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+
+class AsyncAuthViewsTests(APITestCase):
+    """Тесты на нативные async-эндпоинты аутентификации"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        User.objects.create_user(
+            email="async@example.com",
+            password="Passw0rd!",
+            first_name="Async",
+            last_name="User",
+        )
+
+    def setUp(self) -> None:
+        self.factory = AsyncRequestFactory()
+
+    async def call(self, view, method: str, data=None, token: str = None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        request = getattr(self.factory, method)(
+            "/", data=data or {}, content_type="application/json", headers=headers
+        )
+        return await view.as_view()(request)
+
+    async def test_login_me_refresh_logout(self):
+        login = await self.call(
+            AsyncLoginView,
+            "post",
+            {"email": "async@example.com", "password": "Passw0rd!"},
+        )
+        self.assertEqual(login.status_code, status.HTTP_200_OK, login.content)
+        tokens = json.loads(login.content)
+
+        me = await self.call(AsyncMeView, "get", token=tokens["access"])
+        self.assertEqual(me.status_code, status.HTTP_200_OK, me.content)
+        self.assertEqual(json.loads(me.content)["email"], "async@example.com")
+
+        patch = await self.call(
+            AsyncMeView, "patch", {"first_name": "Updated"}, token=tokens["access"]
+        )
+        self.assertEqual(json.loads(patch.content)["first_name"], "Updated")
+
+        refresh = await self.call(
+            AsyncRefreshView, "post", {"refresh": tokens["refresh"]}
+        )
+        self.assertEqual(refresh.status_code, status.HTTP_200_OK, refresh.content)
+
+        logout = await self.call(
+            AsyncLogoutView,
+            "post",
+            {"refresh": tokens["refresh"]},
+            token=tokens["access"],
+        )
+        self.assertEqual(logout.status_code, status.HTTP_204_NO_CONTENT)
+
+        me = await self.call(AsyncMeView, "get", token=tokens["access"])
+        self.assertEqual(me.status_code, status.HTTP_401_UNAUTHORIZED)
+        refresh = await self.call(
+            AsyncRefreshView, "post", {"refresh": tokens["refresh"]}
+        )
+        self.assertEqual(refresh.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_errors_match_sync_views(self):
+        login = await self.call(
+            AsyncLoginView,
+            "post",
+            {"email": "async@example.com", "password": "WrongPassword!"},
+        )
+        self.assertEqual(login.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("password", json.loads(login.content))
+
+        me = await self.call(AsyncMeView, "get")
+        self.assertEqual(me.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AsyncSharedCacheTests(APITransactionTestCase):
+    """Async-представления с общим кешем (CACHE_URL) и автокоммитом"""
+
+    def setUp(self) -> None:
+        use_shared_cache(self)
+        self.user = User.objects.create_user(
+            email="async-revoke@example.com", password="Passw0rd!"
+        )
+        self.factory = AsyncRequestFactory()
+
+    async def call(self, view, method: str, token: str = None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        request = getattr(self.factory, method)(
+            "/", data={}, content_type="application/json", headers=headers
+        )
+        return await view.as_view()(request)
+
+    async def login(self) -> str:
+        request = self.factory.post(
+            "/",
+            data={"email": "async-revoke@example.com", "password": "Passw0rd!"},
+            content_type="application/json",
+        )
+        return json.loads((await AsyncLoginView.as_view()(request)).content)["access"]
+
+    async def test_logout_everywhere(self):
+        access = await self.login()
+        self.assertEqual((await self.call(AsyncMeView, "get", access)).status_code, 200)
+        logout = await self.call(AsyncLogoutView, "post", access)
+        self.assertEqual(logout.status_code, status.HTTP_204_NO_CONTENT, logout.content)
+        me = await self.call(AsyncMeView, "get", access)
+        self.assertEqual(me.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_cached_user_uses_async_cache_api(self):
+        access = await self.login()
+        await self.call(AsyncMeView, "get", access)
+        # Синхронный get_many блокировал бы цикл событий сетевым вызовом
+        with mock.patch.object(
+            FileBasedCache, "get_many", side_effect=AssertionError("sync cache call")
+        ):
+            me = await self.call(AsyncMeView, "get", access)
+        self.assertEqual(me.status_code, status.HTTP_200_OK, me.content)
+
+    async def test_delete_me(self):
+        access = await self.login()
+        resp = await self.call(AsyncMeView, "delete", access)
+        self.assertEqual(resp.status_code, status.HTTP_204_NO_CONTENT, resp.content)
+        await self.user.arefresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Списки отдаются страницами по курсору"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+        owner = User.objects.get(email="manager@example.com")
+        Item.objects.bulk_create(
+            Item(title=f"Page item {i}", owner=owner) for i in range(10)
+        )
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "manager@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def collect_ids(self, url: str) -> list[int]:
+        ids = []
+        while url:
+            resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+            ids.extend(item["id"] for item in resp.data["results"])
+            url = resp.data["next"]
+        return ids
+
+    def test_pages_cover_all_items_in_order(self):
+        ids = self.collect_ids(api_url("/items/?page_size=3"))
+        expected = Item.objects.order_by("id").values_list("id", flat=True)
+        self.assertEqual(ids, list(expected))
+
+    def test_inserts_between_pages_do_not_shift_cursor(self):
+        first = self.client.get(api_url("/items/?page_size=3")).data
+        owner = User.objects.get(email="manager@example.com")
+        Item.objects.create(title="Inserted", owner=owner)
+        rest = self.collect_ids(first["next"])
+        ids = [item["id"] for item in first["results"]] + rest
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), Item.objects.count())
+
+    @override_settings(API_MAX_PAGE_SIZE=5)
+    def test_page_size_is_capped(self):
+        resp = self.client.get(api_url("/items/?page_size=100"))
+        self.assertEqual(len(resp.data["results"]), 5)
+        self.assertIsNotNone(resp.data["next"])
+
+
+class ItemListFieldsTests(APITestCase):
+    """Список items через values() и выбор полей ?fields="""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "manager@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_default_shape_matches_serializer(self):
+        resp = self.client.get(api_url("/items/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        expected = ItemSerializer(
+            Item.objects.select_related("owner").order_by("id"), many=True
+        ).data
+        self.assertEqual(resp.json()["results"], json.loads(json.dumps(expected)))
+
+    def test_sparse_fields_skip_owner_join(self):
+        self.client.get(api_url("/items/"))
+        with CaptureQueriesContext(connection) as queries:
+            resp = self.client.get(api_url("/items/?fields=title,id"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        self.assertEqual(list(resp.data["results"][0]), ["title", "id"])
+        self.assertNotIn("JOIN", queries[-1]["sql"])
+
+    def test_fields_without_id_keep_cursor(self):
+        resp = self.client.get(api_url("/items/?fields=title&page_size=2"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        self.assertEqual(list(resp.data["results"][0]), ["title"])
+        self.assertIsNotNone(resp.data["next"])
+
+    def test_unknown_field_rejected(self):
+        resp = self.client.get(api_url("/items/?fields=id,password"))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, resp.content)
+
+
+class ItemsExportTests(APITestCase):
+    """Потоковая выгрузка items учитывает RBAC"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def login(self, email: str) -> None:
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": email, "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_ndjson_export_is_scoped_to_owner(self):
+        self.login("user@example.com")
+        resp = self.client.get(api_url("/items/export/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertTrue(resp.streaming)
+        body = b"".join(resp.streaming_content)
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row["owner_email"] for row in rows}, {"user@example.com"})
+
+    def test_csv_export_with_fields(self):
+        self.login("manager@example.com")
+        resp = self.client.get(api_url("/items/export/?output=csv&fields=id,title"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "id,title")
+        self.assertEqual(len(lines) - 1, Item.objects.count())
+
+    def test_gzip_export(self):
+        self.login("manager@example.com")
+        resp = self.client.get(
+            api_url("/items/export/"), HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(resp["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(resp.streaming_content))
+        self.assertEqual(len(body.splitlines()), Item.objects.count())
+
+    def test_unknown_output_rejected(self):
+        self.login("manager@example.com")
+        resp = self.client.get(api_url("/items/export/?output=xml"))
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ItemsBulkTests(APITestCase):
+    """Пакетные операции с items: права на пакет и результат по каждому id"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def login(self, email: str) -> None:
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": email, "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.client.get(api_url("/items/"))
+
+    def test_bulk_create_reports_each_entry(self):
+        self.login("user@example.com")
+        payload = [{"title": "Bulk 1"}, {"title": ""}, {"title": "Bulk 2"}]
+        with self.assertNumQueries(4):
+            resp = self.client.post(api_url("/items/bulk/"), payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        statuses = [result["status"] for result in resp.data["results"]]
+        self.assertEqual(statuses, ["created", "invalid", "created"])
+        created = resp.data["results"][0]["item"]
+        self.assertEqual(created["owner_email"], "user@example.com")
+        self.assertTrue(Item.objects.filter(title="Bulk 2").exists())
+
+    def test_bulk_update_restricts_to_own_items(self):
+        self.login("manager@example.com")
+        own = list(Item.objects.filter(owner__email="manager@example.com"))
+        foreign = Item.objects.exclude(owner__email="manager@example.com").first()
+        payload = [{"id": item.id, "title": "Bulk updated"} for item in own]
+        payload += [{"id": foreign.id, "title": "Hacked"}, {"id": 10**9, "title": "x"}]
+        with self.assertNumQueries(5):
+            resp = self.client.patch(api_url("/items/bulk/"), payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        by_id = {result["id"]: result["status"] for result in resp.data["results"]}
+        # Каждая запись пакета - ровно один результат со своим index
+        indexes = [result["index"] for result in resp.data["results"]]
+        self.assertEqual(indexes, list(range(len(payload))))
+        self.assertEqual(by_id[foreign.id], "forbidden")
+        self.assertEqual(by_id[10**9], "not_found")
+        self.assertTrue(all(by_id[item.id] == "updated" for item in own))
+        foreign.refresh_from_db()
+        self.assertNotEqual(foreign.title, "Hacked")
+        self.assertEqual(
+            Item.objects.filter(title="Bulk updated").count(), len(own)
+        )
+
+    def test_bulk_delete_hides_foreign_items(self):
+        self.login("user@example.com")
+        own_ids = list(
+            Item.objects.filter(owner__email="user@example.com").values_list(
+                "id", flat=True
+            )
+        )
+        foreign = Item.objects.exclude(owner__email="user@example.com").first()
+        with self.assertNumQueries(5):
+            resp = self.client.delete(
+                api_url("/items/bulk/"),
+                {"ids": [*own_ids, foreign.id]},
+                format="json",
+            )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        by_id = {result["id"]: result["status"] for result in resp.data["results"]}
+        self.assertEqual(by_id[foreign.id], "not_found")
+        self.assertFalse(Item.objects.filter(id__in=own_ids).exists())
+        self.assertTrue(Item.objects.filter(id=foreign.id).exists())
+
+    def test_bulk_delete_reports_each_requested_id(self):
+        self.login("user@example.com")
+        own = Item.objects.filter(owner__email="user@example.com").first()
+        resp = self.client.delete(
+            api_url("/items/bulk/"), {"ids": [own.id, 10**9, own.id]}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        self.assertEqual(
+            [(r["index"], r["id"], r["status"]) for r in resp.data["results"]],
+            [(0, own.id, "deleted"), (1, 10**9, "not_found"), (2, own.id, "deleted")],
+        )
+        self.assertEqual(
+            ItemChange.objects.filter(item_id=own.id, op=ItemChange.OP_DELETE).count(),
+            1,
+        )
+
+    def test_delete_ids_returns_only_deleted_rows(self):
+        user = User.objects.get(email="user@example.com")
+        own = Item.objects.filter(owner=user).first()
+        foreign = Item.objects.exclude(owner=user).first()
+        with self.assertNumQueries(1):
+            deleted = Item.objects.delete_ids(
+                [own.id, foreign.id, 10**9], owner_id=user.pk
+            )
+        self.assertEqual(deleted, [own.id])
+        self.assertTrue(Item.objects.filter(id=foreign.id).exists())
+        # Сигналы не шлются: tombstone пишет вызывающий
+        self.assertFalse(
+            ItemChange.objects.filter(item_id=own.id, op=ItemChange.OP_DELETE).exists()
+        )
+
+    def test_bulk_delete_requires_permission(self):
+        self.login("manager@example.com")
+        resp = self.client.delete(
+            api_url("/items/bulk/"), {"ids": [1]}, format="json"
+        )
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN, resp.content)
+
+    @override_settings(ITEMS_BULK_MAX_SIZE=2)
+    def test_bulk_size_limit(self):
+        self.login("user@example.com")
+        payload = [{"title": f"Bulk {i}"} for i in range(3)]
+        resp = self.client.post(api_url("/items/bulk/"), payload, format="json")
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST, resp.content)
+
+
+class ItemSearchTests(APITestCase):
+    """Поиск items по началу слов названия с учетом RBAC"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+        cls.user = User.objects.get(email="user@example.com")
+        manager = User.objects.get(email="manager@example.com")
+        Item.objects.bulk_create(
+            [
+                Item(title="Квартальный отчет", owner=cls.user),
+                Item(title="Отчетность по складу", owner=cls.user),
+                Item(title="Квартальный отчет", owner=manager),
+                Item(title="Report draft", owner=cls.user),
+            ]
+        )
+
+    def search(self, email: str, query: str) -> list[str]:
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": email, "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        resp = self.client.get(api_url("/items/"), {"search": query})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        return [item["title"] for item in resp.data["results"]]
+
+    def test_prefix_search_is_scoped_to_owner(self):
+        titles = self.search("user@example.com", "отч")
+        self.assertEqual(titles, ["Квартальный отчет", "Отчетность по складу"])
+
+    def test_all_terms_must_match(self):
+        titles = self.search("manager@example.com", "кварт отчет")
+        self.assertEqual(titles, ["Квартальный отчет", "Квартальный отчет"])
+        titles = self.search("manager@example.com", "REPORT dra")
+        self.assertEqual(titles, ["Report draft"])
+
+    def test_index_follows_updates_and_deletes(self):
+        item = Item.objects.get(title="Report draft")
+        item.title = "Final summary"
+        item.save()
+        self.assertEqual(self.search("user@example.com", "report"), [])
+        self.assertEqual(self.search("user@example.com", "summ"), ["Final summary"])
+        item.delete()
+        self.assertEqual(self.search("user@example.com", "summ"), [])
+
+    def test_punctuation_only_query_is_ignored(self):
+        titles = self.search("user@example.com", '"*')
+        self.assertEqual(len(titles), Item.objects.filter(owner=self.user).count())
+
+
+class ConditionalGetTests(APITestCase):
+    """ETag/Last-Modified и ответы 304 для items и /auth/me/"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def setUp(self) -> None:
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "user@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.item = Item.objects.filter(owner__email="user@example.com").first()
+
+    def assertNotModified(self, url: str, etag: str) -> None:
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(resp["ETag"], etag)
+
+    def test_item_etag_changes_on_update(self):
+        url = api_url(f"/items/{self.item.id}/")
+        resp = self.client.get(url)
+        self.assertIn("Last-Modified", resp)
+        self.assertFalse(resp["ETag"].startswith("W/"))
+        self.assertNotModified(url, resp["ETag"])
+
+        self.client.patch(url, {"title": "Changed"}, format="json")
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["title"], "Changed")
+
+    def test_list_etag_tracks_scope_changes(self):
+        url = api_url("/items/")
+        resp = self.client.get(url)
+        etag = resp["ETag"]
+        self.assertTrue(etag.startswith("W/"))
+        # max(updated_at) страницы не сдвигается при удалении - только ETag
+        self.assertNotIn("Last-Modified", resp)
+        self.assertNotModified(url, etag)
+        self.assertNotEqual(self.client.get(url, {"fields": "id"})["ETag"], etag)
+
+        self.client.patch(
+            api_url("/items/bulk/"),
+            [{"id": self.item.id, "title": "Bulk changed"}],
+            format="json",
+        )
+        changed = self.client.get(url)["ETag"]
+        self.assertNotEqual(changed, etag)
+
+        self.client.delete(api_url(f"/items/{self.item.id}/"))
+        self.assertNotEqual(self.client.get(url)["ETag"], changed)
+
+    def test_list_etag_per_cursor_page(self):
+        url = api_url("/items/")
+        first = self.client.get(url, {"page_size": 1})
+        second = self.client.get(first.data["next"])
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertNotModified(first.data["next"], second["ETag"])
+        # Изменение на второй странице не меняет ETag первой
+        Item.objects.filter(id=second.data["results"][0]["id"]).update(title="Moved")
+        self.assertNotModified(url + "?page_size=1", first["ETag"])
+        resp = self.client.get(first.data["next"], HTTP_IF_NONE_MATCH=second["ETag"])
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_foreign_changes_do_not_affect_own_list(self):
+        url = api_url("/items/")
+        etag = self.client.get(url)["ETag"]
+        foreign = Item.objects.exclude(owner__email="user@example.com").first()
+        foreign.title = "Foreign changed"
+        foreign.save()
+        self.assertNotModified(url, etag)
+
+    def test_me_etag_changes_on_profile_update(self):
+        url = api_url("/auth/me/")
+        etag = self.client.get(url)["ETag"]
+        with self.assertNumQueries(1):
+            self.assertNotModified(url, etag)
+
+        resp = self.client.patch(url, {"first_name": "Renamed"}, format="json")
+        self.assertNotEqual(resp["ETag"], etag)
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["first_name"], "Renamed")
+
+    def test_me_etag_changes_on_any_profile_save(self):
+        # Откат транзакции теста не сбрасывает кеш пользователей
+        self.addCleanup(invalidate_cached_user_all)
+        url = api_url("/auth/me/")
+        etag = self.client.get(url)["ETag"]
+        user = User.objects.get(email="user@example.com")
+        user.first_name = "Changed"
+        user.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data["first_name"], "Changed")
+
+        etag = resp["ETag"]
+        user.last_login = user.date_joined
+        user.save(update_fields=["last_login"])
+        self.assertNotModified(url, etag)
+
+    def test_profile_version_increments_in_database(self):
+        url = api_url("/auth/me/")
+        self.client.get(url)
+        user = User.objects.get(email="user@example.com")
+        before = user.profile_version
+        # Другой воркер изменил профиль, копия в кеше этого процесса отстала
+        User.objects.filter(pk=user.pk).update(
+            last_name="Elsewhere", profile_version=F("profile_version") + 1
+        )
+        resp = self.client.patch(url, {"first_name": "Renamed"}, format="json")
+        user.refresh_from_db()
+        self.assertEqual(user.profile_version, before + 2)
+        self.assertEqual(resp["ETag"], user_etag(user))
+        self.assertEqual(resp.data["last_name"], "Elsewhere")
+
+
+@override_settings(ITEMS_CHANGES_SETTLE_SEC=0)
+class ItemChangesFeedTests(APITestCase):
+    """Лента изменений items по курсору since"""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def login(self, email: str) -> None:
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": email, "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def changes(self, since: int = 0, **params) -> dict:
+        resp = self.client.get(api_url("/items/changes/"), {"since": since, **params})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        return resp.data
+
+    def test_feed_records_upserts_and_tombstones(self):
+        self.login("user@example.com")
+        head = self.changes()["next"]
+        item_id = self.client.post(
+            api_url("/items/"), {"title": "Feed"}, format="json"
+        ).data["id"]
+        self.client.patch(
+            api_url(f"/items/{item_id}/"), {"title": "Feed 2"}, format="json"
+        )
+        self.client.delete(api_url(f"/items/{item_id}/"))
+
+        feed = self.changes(head)
+        ops = [(c["op"], c["id"], c["title"]) for c in feed["results"]]
+        self.assertEqual(
+            ops,
+            [
+                ("upsert", item_id, "Feed"),
+                ("upsert", item_id, "Feed 2"),
+                ("delete", item_id, None),
+            ],
+        )
+        self.assertFalse(feed["has_more"])
+        self.assertEqual(self.changes(feed["next"])["results"], [])
+
+    def test_bulk_operations_are_recorded(self):
+        self.login("user@example.com")
+        head = self.changes()["next"]
+        created = self.client.post(
+            api_url("/items/bulk/"), [{"title": "B1"}, {"title": "B2"}], format="json"
+        ).data["results"]
+        ids = [result["item"]["id"] for result in created]
+        self.client.patch(
+            api_url("/items/bulk/"), [{"id": ids[0], "title": "B1+"}], format="json"
+        )
+        self.client.delete(api_url("/items/bulk/"), {"ids": ids}, format="json")
+
+        ops = [(c["op"], c["id"]) for c in self.changes(head)["results"]]
+        self.assertEqual(
+            ops,
+            [
+                ("upsert", ids[0]),
+                ("upsert", ids[1]),
+                ("upsert", ids[0]),
+                ("delete", ids[0]),
+                ("delete", ids[1]),
+            ],
+        )
+
+    def test_feed_is_scoped_by_rbac(self):
+        self.login("user@example.com")
+        own = self.changes()["results"]
+        self.assertTrue(own)
+        self.assertEqual({c["owner_email"] for c in own}, {"user@example.com"})
+
+        self.login("manager@example.com")
+        self.assertEqual(len(self.changes()["results"]), ItemChange.objects.count())
+
+    def test_page_size_and_has_more(self):
+        self.login("manager@example.com")
+        first = self.changes(page_size=1)
+        self.assertEqual(len(first["results"]), 1)
+        self.assertTrue(first["has_more"])
+        second = self.changes(first["next"], page_size=1)
+        self.assertGreater(second["results"][0]["seq"], first["results"][0]["seq"])
+
+    @override_settings(ITEMS_CHANGES_SETTLE_SEC=60)
+    def test_fresh_changes_wait_for_settle_window(self):
+        self.login("user@example.com")
+        self.assertEqual(self.changes()["results"], [])
+
+    def test_invalid_since_rejected(self):
+        self.login("user@example.com")
+        resp = self.client.get(api_url("/items/changes/"), {"since": "abc"})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LoadMockDataBulkTests(APITestCase):
+    """Режим --bulk загрузчика: тот же результат и идемпотентность."""
+
+    def setUp(self) -> None:
+        self.addCleanup(bump_rbac_version)
+
+    def load(self, *args) -> str:
+        out = io.StringIO()
+        call_command("load_mock_data", "--bulk", "--chunk-size=2", *args, stdout=out)
+        return out.getvalue()
+
+    def snapshot(self) -> dict:
+        return {
+            "roles": Role.objects.count(),
+            "rules": sorted(
+                AccessRoleRule.objects.values_list(
+                    "role__name", "element__code", "permissions"
+                )
+            ),
+            "user_roles": sorted(
+                User.roles.through.objects.values_list("user__email", "role__name")
+            ),
+            "items": sorted(Item.objects.values_list("owner__email", "title")),
+        }
+
+    def test_bulk_matches_row_by_row_loader(self):
+        output = self.load()
+        self.assertIn("строк/с", output)
+        bulk = self.snapshot()
+        self.assertTrue(bulk["items"])
+        self.assertEqual(ItemChange.objects.count(), len(bulk["items"]))
+        rule = AccessRoleRule.objects.get(role__name="admin", element__code="items")
+        self.assertTrue(all(mask_to_flags(rule.permissions).values()))
+
+        call_command("load_mock_data", stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), bulk)
+
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "admin@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+
+    def test_rerun_is_idempotent_and_restores_roles(self):
+        self.load()
+        expected = self.snapshot()
+        admin = User.objects.get(email="admin@example.com")
+        admin.roles.clear()
+        admin.first_name = "Renamed"
+        admin.save(update_fields=["first_name"])
+
+        self.load("--reset-passwords")
+        self.assertEqual(self.snapshot(), expected)
+        admin.refresh_from_db()
+        self.assertEqual(admin.first_name, "Renamed")
+        self.assertTrue(admin.check_password("Passw0rd!"))
+
+    def test_parallel_hashing_keeps_salts_distinct(self):
+        self.load("--hash-workers=2")
+        passwords = list(
+            User.objects.filter(email__endswith="@example.com").values_list(
+                "password", flat=True
+            )
+        )
+        self.assertGreater(len(passwords), 1)
+        self.assertEqual(len(set(passwords)), len(passwords))
+        user = User.objects.get(email="user@example.com")
+        self.assertTrue(user.check_password("Passw0rd!"))
+
+    def test_small_batches_hash_in_process(self):
+        with BatchPasswordHasher(workers=2) as hasher:
+            hashes = list(hasher.submit(["Passw0rd!"] * 4))
+            self.assertIsNone(hasher._executor)
+        self.assertEqual(len(set(hashes)), 4)
+
+    def test_large_batches_use_process_pool(self):
+        with BatchPasswordHasher(workers=2, min_pool_passwords=3) as hasher:
+            hashes = list(hasher.submit(["Passw0rd!"] * 3))
+            self.assertIsNotNone(hasher._executor)
+        self.assertEqual(len(set(hashes)), 3)
+        self.assertTrue(check_password("Passw0rd!", hashes[0]))
+
+
+class GenerateLoadDataTests(APITestCase):
+    """Генератор синтетических данных: CSV, плотность матрицы, перекос items."""
+
+    def setUp(self) -> None:
+        self.addCleanup(bump_rbac_version)
+
+    def generate(self, *args) -> None:
+        call_command(
+            "generate_load_data",
+            "--users=30",
+            "--roles=4",
+            "--elements=5",
+            "--items=600",
+            *args,
+            stdout=io.StringIO(),
+        )
+
+    def test_writes_csv_for_loader(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.generate(f"--output-dir={tmp}", "--rule-density=0.5")
+            data_dir = Path(tmp)
+            with (data_dir / "demo_items.csv").open(encoding="utf-8") as f:
+                items = list(csv.DictReader(f))
+            with (data_dir / "access_role_rules.csv").open(encoding="utf-8") as f:
+                rules = list(csv.DictReader(f))
+        self.assertEqual(len(items), 600)
+        self.assertLess(len(rules), 4 * 5)
+        owners = Counter(item["owner_email"] for item in items).most_common()
+        # Перекос: самый "тяжелый" владелец заметно больше среднего
+        self.assertGreater(owners[0][1], 3 * 600 / 30)
+
+    def test_load_into_db(self):
+        self.generate("--load", "--chunk-size=7", "--hash-workers=1")
+        load_users = User.objects.filter(email__startswith="load-user-")
+        self.assertEqual(load_users.count(), 30)
+        self.assertEqual(
+            Item.objects.filter(owner__email__startswith="load-user-").count(), 600
+        )
+        self.assertEqual(
+            AccessRoleRule.objects.filter(role__name__startswith="role-").count(),
+            4 * 5,
+        )
+        self.assertTrue(BusinessElement.objects.filter(code="element-0005").exists())
+
+
+class BenchAPICommandTests(APITransactionTestCase):
+    """bench_api в процессе: все эндпоинты без ошибок, JSON для сравнения."""
+
+    def setUp(self) -> None:
+        self.addCleanup(bump_rbac_version)
+
+    def test_inprocess_run_reports_latency_and_queries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = Path(tmp) / "bench.json"
+            out = io.StringIO()
+            call_command(
+                "bench_api",
+                "--requests=6",
+                "--concurrency=1",
+                "--items=5",
+                "--query-sample=2",
+                f"--json={report_path}",
+                stdout=out,
+            )
+            call_command(
+                "bench_api",
+                "--requests=3",
+                "--concurrency=1",
+                "--items=5",
+                "--endpoints=me",
+                f"--compare={report_path}",
+                stdout=out,
+            )
+            report = json.loads(report_path.read_text(encoding="utf-8"))
+
+        rows = {row["endpoint"]: row for row in report["results"]}
+        self.assertEqual(set(rows), {*BENCH_ENDPOINTS})
+        for row in rows.values():
+            self.assertEqual(row["errors"], 0, row)
+            self.assertEqual(row["requests"], 6)
+            self.assertIsInstance(row["queries_per_request"], float)
+        self.assertGreater(rows["items_update"]["queries_per_request"], 0)
+        self.assertIn("rps_diff", out.getvalue())
+        # Пользователи, созданные замером register, удаляются
+        self.assertFalse(User.objects.filter(email__startswith="bench-reg-").exists())
+
+
+class ServeCommandTests(APITestCase):
+    """serve собирает команду gunicorn из настроек и опций."""
+
+    def argv(self, *args) -> list[str]:
+        out = io.StringIO()
+        call_command("serve", "--print-command", *args, stdout=out, stderr=out)
+        return shlex.split(out.getvalue().splitlines()[0])
+
+    def option(self, argv: list[str], name: str) -> str:
+        return argv[argv.index(name) + 1]
+
+    @override_settings(SERVER_MAX_REQUESTS=500, SERVER_MAX_REQUESTS_JITTER=50)
+    def test_wsgi_defaults_preload_and_recycle(self):
+        argv = self.argv("--workers=3", "--threads=4")
+        self.assertIn("config.wsgi:application", argv)
+        self.assertEqual(self.option(argv, "--workers"), "3")
+        self.assertEqual(self.option(argv, "--worker-class"), "gthread")
+        self.assertEqual(self.option(argv, "--threads"), "4")
+        self.assertIn("--preload", argv)
+        self.assertEqual(self.option(argv, "--max-requests"), "500")
+        self.assertEqual(self.option(argv, "--max-requests-jitter"), "50")
+
+    def test_asgi_uses_uvicorn_workers(self):
+        argv = self.argv(
+            "--interface=asgi", "--workers=2", "--max-requests=0", "--no-preload"
+        )
+        self.assertIn("config.asgi:application", argv)
+        self.assertEqual(
+            self.option(argv, "--worker-class"), "uvicorn.workers.UvicornWorker"
+        )
+        self.assertNotIn("--max-requests", argv)
+        self.assertNotIn("--preload", argv)
+
+
+class DatabaseDiagnosticsTests(APITestCase):
+    """/diagnostics/db/: настройки соединений процесса только для admin."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        call_command("load_mock_data", "--reset-passwords")
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+
+    def login(self, email: str, password: str = "Passw0rd!"):
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": email, "password": password},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_admin_sees_connection_settings(self):
+        self.login("admin@example.com")
+        resp = self.client.get(api_url("/diagnostics/db/"))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK, resp.content)
+        default = resp.data["databases"][0]
+        self.assertEqual(default["alias"], "default")
+        self.assertEqual(default["vendor"], connection.vendor)
+        self.assertIn("conn_max_age", default)
+        self.assertTrue(default["connected"])
+        self.assertIsNone(default["pool"])
+        self.assertIsInstance(resp.data["pid"], int)
+
+    def test_non_admin_forbidden(self):
+        self.login("user@example.com")
+        resp = self.client.get(api_url("/diagnostics/db/"))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+
+REPLICA_ALIAS = "replica_test"
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA_ALIAS], DB_REPLICA_STICKY_SEC=30)
+class ReplicaRoutingTests(APITransactionTestCase):
+    """Чтения подключенных представлений идут на реплику, после записи - нет."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        # Реплика-заглушка: второе соединение к той же тестовой БД (зеркало).
+        # Алиас добавляется после проверки databases раннером
+        default = connections["default"].settings_dict
+        connections.settings[REPLICA_ALIAS] = {
+            **default,
+            "TEST": {**default["TEST"], "MIRROR": "default"},
+        }
+        cls.databases = {*cls.databases, REPLICA_ALIAS}
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        connections[REPLICA_ALIAS].close()
+        del connections[REPLICA_ALIAS]
+        del connections.settings[REPLICA_ALIAS]
+        cls.databases = cls.databases - {REPLICA_ALIAS}
+        super().tearDownClass()
+
+    def setUp(self) -> None:
+        self.addCleanup(bump_rbac_version)
+        role = Role.objects.create(name="replica-reader")
+        element, _ = BusinessElement.objects.get_or_create(
+            code="items", defaults={"name": "Items"}
+        )
+        AccessRoleRule.objects.create(
+            role=role, element=element, read=True, update=True
+        )
+        self.user = User.objects.create_user("replica@example.com", "Passw0rd!")
+        self.user.roles.add(role)
+        self.item = Item.objects.create(title="Replica item", owner=self.user)
+        resp = self.client.post(
+            api_url("/auth/login/"),
+            {"email": "replica@example.com", "password": "Passw0rd!"},
+            format="json",
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def replica_queries(self, method: str, path: str, **kwargs):
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as queries:
+            resp = getattr(self.client, method)(api_url(path), **kwargs)
+        self.assertLess(resp.status_code, 400, resp.content)
+        return len(queries)
+
+    def test_safe_reads_use_replica(self):
+        self.assertGreater(self.replica_queries("get", "/items/"), 0)
+        self.assertGreater(self.replica_queries("get", f"/items/{self.item.id}/"), 0)
+
+    def test_writes_go_to_primary_and_pin_user(self):
+        path = f"/items/{self.item.id}/"
+        self.assertEqual(
+            self.replica_queries("patch", path, data={"title": "New"}, format="json"),
+            0,
+        )
+        # Read-your-writes: сразу после записи чтение с основной БД
+        self.assertEqual(self.replica_queries("get", path), 0)
+
+        cache.delete(PRIMARY_PIN_KEY.format(self.user.pk))
+        self.assertGreater(self.replica_queries("get", path), 0)
+
+    def test_views_without_opt_in_read_primary(self):
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as queries:
+            self.client.post(
+                api_url("/auth/login/"),
+                {"email": "replica@example.com", "password": "Passw0rd!"},
+                format="json",
+            )
+        self.assertEqual(len(queries), 0)
+
+
+class TokenIndexesTests(APITestCase):
+    """Индексы таблиц токенов и замер bench_token_indexes."""
+
+    def token_indexes(self, model) -> dict:
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, model._meta.db_table
+            )
+        return {
+            name: info["columns"]
+            for name, info in constraints.items()
+            if info["index"] and not info["unique"]
+        }
+
+    def test_migration_indexes(self):
+        refresh = self.token_indexes(RefreshToken)
+        self.assertEqual(
+            refresh["refreshtoken_user_revoked_idx"], ["user_id", "revoked"]
+        )
+        self.assertEqual(refresh["refreshtoken_active_user_idx"], ["user_id"])
+        self.assertEqual(refresh["refreshtoken_expires_at_idx"], ["expires_at"])
+        # Одиночный индекс FK покрыт составным (user_id, revoked)
+        self.assertEqual(
+            [name for name, cols in refresh.items() if cols == ["user_id"]],
+            ["refreshtoken_active_user_idx"],
+        )
+        revoked = self.token_indexes(RevokedAccessToken)
+        self.assertEqual(revoked["revokedaccess_created_at_idx"], ["created_at"])
+        self.assertEqual(revoked["revokedaccess_expires_at_idx"], ["expires_at"])
+
+    def test_bench_compares_plans_and_rolls_back(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = Path(tmp) / "tokens.json"
+            call_command(
+                "bench_token_indexes",
+                "--rows=3000",
+                "--users=30",
+                "--repeat=2",
+                f"--json={report_path}",
+                stdout=io.StringIO(),
+            )
+            report = json.loads(report_path.read_text(encoding="utf-8"))
+
+        rows = {row["query"]: row for row in report["results"]}
+        active, expired = rows["active_sessions"], rows["expired_refresh"]
+        self.assertIn("refreshtoken_active_user_idx", active["after_plan"])
+        self.assertIn("refreshtoken_expires_at_idx", expired["after_plan"])
+        self.assertNotIn("refreshtoken_expires_at_idx", expired["before_plan"])
+        # Из 8 дней истории срок жизни 7 дней: истекла восьмая часть
+        self.assertAlmostEqual(expired["rows"], 3000 // 8, delta=2)
+        # Данные и удаление индексов откатываются
+        self.assertFalse(RefreshToken.objects.exists())
+        self.assertFalse(
+            User.objects.filter(email__startswith="bench-tokens-").exists()
+        )
+        self.assertIn("refreshtoken_expires_at_idx", self.token_indexes(RefreshToken))
+
+
+class PurgeTokensTests(APITestCase):
+    """Очистка истекших токенов пачками, команда и фоновый запуск."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            email="purge@example.com",
+            password="Passw0rd!",
+            first_name="Purge",
+            last_name="Tokens",
+        )
+        now = datetime.now(timezone.utc)
+        past = now - timedelta(hours=1)
+        for i in range(5):
+            # Одинаковый expires_at у части строк: keyset по >= их не теряет
+            RefreshToken.objects.create(
+                jti=f"old-{i}",
+                user=self.user,
+                expires_at=past + timedelta(seconds=i // 3),
+            )
+            RevokedAccessToken.objects.create(
+                jti=f"old-access-{i}", user=self.user, expires_at=past
+            )
+        RefreshToken.objects.create(
+            jti="live", user=self.user, expires_at=now + timedelta(days=1)
+        )
+        # Истек, но в пределах допуска проверки exp - еще нужен
+        RevokedAccessToken.objects.create(
+            jti="leeway", user=self.user, expires_at=now - timedelta(seconds=1)
+        )
+
+    def remaining(self):
+        return (
+            set(RefreshToken.objects.values_list("jti", flat=True)),
+            set(RevokedAccessToken.objects.values_list("jti", flat=True)),
+        )
+
+    def test_purge_in_batches(self):
+        results = purge_expired_tokens(batch_size=2, sleep_sec=0)
+        self.assertEqual([(r.deleted, r.batches) for r in results], [(5, 3), (5, 3)])
+        self.assertEqual(self.remaining(), ({"live"}, {"leeway"}))
+
+    def test_max_batches_limits_run(self):
+        results = purge_expired_tokens(batch_size=2, sleep_sec=0, max_batches=1)
+        self.assertEqual([r.deleted for r in results], [2, 2])
+
+    def test_command_reports_and_dry_run(self):
+        out = io.StringIO()
+        call_command("purge_tokens", "--dry-run", stdout=out)
+        self.assertIn("users_refreshtoken: истекло 5", out.getvalue())
+        self.assertEqual(RefreshToken.objects.count(), 6)
+
+        out = io.StringIO()
+        call_command("purge_tokens", "--batch-size=3", "--sleep=0", stdout=out)
+        self.assertIn("users_revokedaccesstoken", out.getvalue())
+        self.assertIn("Удалено строк: 10", out.getvalue())
+        self.assertEqual(self.remaining(), ({"live"}, {"leeway"}))
@@ -4,16 +4,22 @@ from datetime import datetime, timedelta, timezone
 import jwt
 from django.conf import settings
 
+# Допуск на расхождение часов при проверке exp/iat
+TOKEN_LEEWAY_SEC = 5
+
 
 def _now():
     return datetime.now(timezone.utc)
 
 
-def create_token(user_id: uuid.UUID, token_type: str, exp_delta: timedelta) -> str:
+def create_token(
+    user_id: uuid.UUID, token_type: str, exp_delta: timedelta, version: int = 0
+) -> str:
     now = _now()
     payload = {
         "sub": str(user_id),
         "type": token_type,
+        "ver": version,
         "iat": int(now.timestamp()),
         "exp": int((now + exp_delta).timestamp()),
         "jti": str(uuid.uuid4()),
@@ -21,15 +27,15 @@ def create_token(user_id: uuid.UUID, token_type: str, exp_delta: timedelta) -> s
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 
-def generate_access_token(user_id: uuid.UUID) -> str:
+def generate_access_token(user_id: uuid.UUID, version: int = 0) -> str:
     return create_token(
-        user_id, "access", timedelta(minutes=settings.JWT_ACCESS_TTL_MIN)
+        user_id, "access", timedelta(minutes=settings.JWT_ACCESS_TTL_MIN), version
     )
 
 
-def generate_refresh_token(user_id: uuid.UUID) -> str:
+def generate_refresh_token(user_id: uuid.UUID, version: int = 0) -> str:
     return create_token(
-        user_id, "refresh", timedelta(days=settings.JWT_REFRESH_TTL_DAYS)
+        user_id, "refresh", timedelta(days=settings.JWT_REFRESH_TTL_DAYS), version
     )
 
 
@@ -39,7 +45,7 @@ def decode_token(token: str, expected_type: str) -> dict:
         settings.SECRET_KEY,
         algorithms=[settings.JWT_ALGORITHM],
         options={"require": ["sub", "iat", "exp"]},
-        leeway=5,
+        leeway=TOKEN_LEEWAY_SEC,
     )
     if payload.get("type") != expected_type:
         raise jwt.InvalidTokenError("Invalid token type")
@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from . import views
+from . import async_views, views
 
 router = DefaultRouter()
 router.register(r"rbac/roles", views.RoleViewSet, basename="role")
@@ -9,11 +10,28 @@ router.register(r"rbac/elements", views.BusinessElementViewSet, basename="elemen
 router.register(r"rbac/access-rules", views.AccessRuleViewSet, basename="access-rule")
 router.register(r"items", views.ItemViewSet, basename="item")
 
+# Под ASGI можно включить нативные async-версии эндпоинтов аутентификации
+if settings.ASYNC_AUTH_VIEWS:
+    login_view = async_views.AsyncLoginView
+    logout_view = async_views.AsyncLogoutView
+    me_view = async_views.AsyncMeView
+    refresh_view = async_views.AsyncRefreshView
+else:
+    login_view = views.LoginView
+    logout_view = views.LogoutView
+    me_view = views.MeView
+    refresh_view = views.RefreshView
+
 urlpatterns = [
     path("auth/register/", views.RegisterView.as_view(), name="auth-register"),
-    path("auth/login/", views.LoginView.as_view(), name="auth-login"),
-    path("auth/logout/", views.LogoutView.as_view(), name="auth-logout"),
-    path("auth/me/", views.MeView.as_view(), name="auth-me"),
-    path("auth/refresh/", views.RefreshView.as_view(), name="auth-refresh"),
+    path("auth/login/", login_view.as_view(), name="auth-login"),
+    path("auth/logout/", logout_view.as_view(), name="auth-logout"),
+    path("auth/me/", me_view.as_view(), name="auth-me"),
+    path("auth/refresh/", refresh_view.as_view(), name="auth-refresh"),
+    path(
+        "diagnostics/db/",
+        views.DatabaseDiagnosticsView.as_view(),
+        name="diagnostics-db",
+    ),
     path("", include(router.urls)),
 ]
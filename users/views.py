@@ -1,22 +1,41 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 import jwt
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
+from django.utils import timezone as django_timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .authentication import get_active_user, token_version_is_current
+from .conditional import conditional_response, make_etag, set_validators, user_etag
+from .diagnostics import database_diagnostics
+from .export import csv_stream, ndjson_stream
+from .filters import ItemFilter
 from .models import (
     AccessRoleRule,
     BusinessElement,
     Item,
+    ItemChange,
     RefreshToken,
     RevokedAccessToken,
     Role,
 )
-from .permissions import HasAccessPermission, IsAdminRole, get_effective_rule
+from .permissions import HasAccessPermission, IsAdminRole, get_request_rule
+from .replicas import ReplicaReadsMixin
+from .revocation import revoked_access_tokens
 from .schemas import (
     SCHEMA_ACCESS_RULE_VIEWSET,
+    SCHEMA_DB_DIAGNOSTICS,
     SCHEMA_ELEMENT_VIEWSET,
     SCHEMA_ITEM_VIEWSET,
     SCHEMA_LOGIN,
@@ -31,6 +50,8 @@ from .schemas import (
 from .serializers import (
     AccessRoleRuleSerializer,
     BusinessElementSerializer,
+    ItemBulkDeleteSerializer,
+    ItemBulkUpdateSerializer,
     ItemSerializer,
     LoginSerializer,
     MeUpdateSerializer,
@@ -68,8 +89,8 @@ class LoginView(APIView):
         user = serializer.validated_data["user"]
         data = {
             "user": UserOutSerializer(user).data,
-            "access": generate_access_token(user.id),
-            "refresh": generate_refresh_token(user.id),
+            "access": generate_access_token(user.id, user.token_version),
+            "refresh": generate_refresh_token(user.id, user.token_version),
         }
         try:
             payload = decode_token(data["refresh"], expected_type="refresh")
@@ -88,6 +109,47 @@ class LoginView(APIView):
         return Response(data)
 
 
+def rotate_refresh_token(user, jti: str):
+    """Атомарно заменяет refresh-токен новым (None - токен уже недействителен).
+
+    Старая строка отзывается условным UPDATE ... WHERE revoked = false:
+    блокируется только она, поэтому параллельные refresh разных сессий
+    не мешают друг другу, а из гонок за один токен выигрывает ровно один.
+    """
+    new_token = generate_refresh_token(user.id, user.token_version)
+    new_payload = decode_token(new_token, expected_type="refresh")
+    with transaction.atomic():
+        swapped = RefreshToken.objects.filter(jti=jti, revoked=False).update(
+            revoked=True, replaced_by=new_payload["jti"]
+        )
+        if swapped:
+            RefreshToken.objects.create(
+                jti=new_payload["jti"],
+                user_id=user.id,
+                expires_at=datetime.fromtimestamp(
+                    new_payload["exp"], tz=timezone.utc
+                ),
+            )
+            return new_token
+
+    replaced_by = (
+        RefreshToken.objects.filter(jti=jti, user_id=user.id)
+        .values_list("replaced_by", flat=True)
+        .first()
+    )
+    if replaced_by:
+        # Повторное использование уже замененного токена: вероятна
+        # утечка, отзываем все сессии. Дубли запроса клиента в пределах
+        # grace-окна считаем гонкой, а не атакой.
+        grace = timedelta(seconds=settings.JWT_REFRESH_REUSE_GRACE_SEC)
+        rotated_recently = RefreshToken.objects.filter(
+            jti=replaced_by, created_at__gte=datetime.now(timezone.utc) - grace
+        ).exists()
+        if not rotated_recently:
+            user.revoke_all_tokens()
+    return None
+
+
 @SCHEMA_REFRESH
 class RefreshView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -103,59 +165,50 @@ class RefreshView(APIView):
             return Response({"detail": "invalid refresh token"}, status=401)
 
         jti = payload.get("jti")
-        if not jti or RefreshToken.objects.filter(jti=jti, revoked=True).exists():
+        if not jti:
+            return Response({"detail": "invalid refresh token"}, status=401)
+        rotate = settings.JWT_ROTATE_REFRESH_TOKENS
+        if not rotate and RefreshToken.objects.filter(jti=jti, revoked=True).exists():
             return Response({"detail": "invalid refresh token"}, status=401)
 
-        user_id = payload.get("sub")
         try:
-            User.objects.get(pk=user_id, is_active=True)
+            user = get_active_user(payload.get("sub"))
         except User.DoesNotExist:
             return Response({"detail": "user inactive or not found"}, status=401)
-        return Response({"access": generate_access_token(user_id)})
+        if not token_version_is_current(payload, user):
+            return Response({"detail": "invalid refresh token"}, status=401)
+
+        data = {"access": generate_access_token(user.id, user.token_version)}
+        if rotate:
+            data["refresh"] = rotate_refresh_token(user, jti)
+            if data["refresh"] is None:
+                return Response({"detail": "invalid refresh token"}, status=401)
+        return Response(data)
 
 
-class MeView(APIView):
+class MeView(ReplicaReadsMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     @SCHEMA_ME_GET
     def get(self, request):
-        return Response(UserOutSerializer(request.user).data)
+        etag = user_etag(request.user)
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(UserOutSerializer(request.user).data), etag)
 
     @SCHEMA_ME_PATCH
     def patch(self, request):
         serializer = MeUpdateSerializer(request.user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(UserOutSerializer(request.user).data)
+        response = Response(UserOutSerializer(request.user).data)
+        return set_validators(response, user_etag(request.user))
 
     @SCHEMA_ME_DELETE
     def delete(self, request):
-        auth = request.META.get("HTTP_AUTHORIZATION", "")
-        parts = auth.split()
-        if len(parts) == 2 and parts[0].lower() == "bearer":
-            access_token = parts[1]
-            try:
-                access_payload = decode_token(access_token, expected_type="access")
-                jti = access_payload.get("jti")
-                exp = access_payload.get("exp")
-                if jti and exp:
-                    RevokedAccessToken.objects.get_or_create(
-                        jti=jti,
-                        defaults={
-                            "user": request.user,
-                            "expires_at": datetime.fromtimestamp(exp, tz=timezone.utc),
-                        },
-                    )
-            except jwt.PyJWTError:
-                pass
-
-        RefreshToken.objects.filter(user=request.user, revoked=False).update(
-            revoked=True
-        )
-
-        user = request.user
-        user.is_active = False
-        user.save(update_fields=["is_active"])
+        # Смена поколения отзывает все access/refresh токены пользователя
+        request.user.revoke_all_tokens(deactivate=True)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -164,6 +217,13 @@ class LogoutView(APIView):
 
     @SCHEMA_LOGOUT_POST
     def post(self, request):
+        token = request.data.get("refresh")
+        if not token:
+            # Без refresh - выход со всех устройств: смена поколения
+            # отзывает и текущий access, и все refresh пользователя
+            request.user.revoke_all_tokens()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
         auth = request.META.get("HTTP_AUTHORIZATION", "")
         parts = auth.split()
         if len(parts) == 2 and parts[0].lower() == "bearer":
@@ -173,37 +233,30 @@ class LogoutView(APIView):
                 jti = access_payload.get("jti")
                 exp = access_payload.get("exp")
                 if jti and exp:
+                    expires_at = datetime.fromtimestamp(exp, tz=timezone.utc)
                     RevokedAccessToken.objects.get_or_create(
                         jti=jti,
-                        defaults={
-                            "user": request.user,
-                            "expires_at": datetime.fromtimestamp(exp, tz=timezone.utc),
-                        },
+                        defaults={"user": request.user, "expires_at": expires_at},
                     )
+                    revoked_access_tokens.add(jti, expires_at)
             except jwt.PyJWTError:
                 pass
 
-        token = request.data.get("refresh")
-        if token:
-            try:
-                payload = decode_token(token, expected_type="refresh")
-                jti = payload.get("jti")
-                if jti:
-                    RefreshToken.objects.filter(
-                        jti=jti, user=request.user, revoked=False
-                    ).update(revoked=True)
-            except jwt.PyJWTError:
-                pass
-        else:
-            RefreshToken.objects.filter(user=request.user, revoked=False).update(
-                revoked=True
-            )
+        try:
+            payload = decode_token(token, expected_type="refresh")
+            jti = payload.get("jti")
+            if jti:
+                RefreshToken.objects.filter(
+                    jti=jti, user=request.user, revoked=False
+                ).update(revoked=True)
+        except jwt.PyJWTError:
+            pass
 
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 @SCHEMA_ROLE_VIEWSET
-class RoleViewSet(viewsets.ModelViewSet):
+class RoleViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminRole]
@@ -211,7 +264,7 @@ class RoleViewSet(viewsets.ModelViewSet):
 
 
 @SCHEMA_ELEMENT_VIEWSET
-class BusinessElementViewSet(viewsets.ModelViewSet):
+class BusinessElementViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = BusinessElement.objects.all()
     serializer_class = BusinessElementSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminRole]
@@ -219,7 +272,7 @@ class BusinessElementViewSet(viewsets.ModelViewSet):
 
 
 @SCHEMA_ACCESS_RULE_VIEWSET
-class AccessRuleViewSet(viewsets.ModelViewSet):
+class AccessRuleViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = AccessRoleRule.objects.select_related("role", "element").all()
     serializer_class = AccessRoleRuleSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminRole]
@@ -227,16 +280,23 @@ class AccessRuleViewSet(viewsets.ModelViewSet):
 
 
 @SCHEMA_ITEM_VIEWSET
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = Item.objects.select_related("owner").all()
     serializer_class = ItemSerializer
     permission_classes = [HasAccessPermission]
     http_method_names = ["get", "post", "patch", "delete"]
     element_code = "items"
+    filterset_class = ItemFilter
+    # Источники полей списка для values(): JSON тот же, что у ItemSerializer
+    list_field_sources = {"id": "id", "title": "title", "owner_email": "owner__email"}
+    export_formats = {
+        "ndjson": (ndjson_stream, "application/x-ndjson; charset=utf-8"),
+        "csv": (csv_stream, "text/csv; charset=utf-8"),
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        rule = get_effective_rule(self.request.user, self.element_code)
+        rule = get_request_rule(self.request, self.element_code)
         if not rule:
             return queryset.none()
         if rule.get("read_all"):
@@ -245,5 +305,347 @@ class ItemViewSet(viewsets.ModelViewSet):
             return queryset.filter(owner=self.request.user)
         return queryset.none()
 
+    @classmethod
+    def values_for_fields(cls, queryset, fields):
+        plain = [f for f in fields if cls.list_field_sources[f] == f]
+        expressions = {
+            f: F(cls.list_field_sources[f])
+            for f in fields
+            if cls.list_field_sources[f] != f
+        }
+        return queryset.values(*plain, **expressions)
+
+    def get_list_fields(self) -> list[str]:
+        """Поля из ?fields=id,title (по умолчанию все поля сериализатора)."""
+        param = self.request.query_params.get("fields")
+        if not param:
+            return list(self.list_field_sources)
+        fields = list(dict.fromkeys(f.strip() for f in param.split(",") if f.strip()))
+        if not fields:
+            raise ValidationError({"fields": ["At least one field is required"]})
+        unknown = [f for f in fields if f not in self.list_field_sources]
+        if unknown:
+            raise ValidationError({"fields": [f"Unknown fields: {', '.join(unknown)}"]})
+        return fields
+
+    def list(self, request, *args, **kwargs):
+        # Только чтение: строки берутся через values() без создания моделей и
+        # сериализаторов; без owner_email не выполняется JOIN с пользователями
+        fields = self.get_list_fields()
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # id нужен курсору пагинации, даже если клиент его не запросил
+        rows = self.values_for_fields(queryset, {"id", *fields})
+        page = self.paginate_queryset(rows)
+        results = page if page is not None else list(rows)
+        data = [{field: row[field] for field in fields} for row in results]
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+
+        etag = self.get_list_etag(response.data)
+        not_modified = conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(response, etag)
+
+    def get_list_etag(self, data):
+        """Слабый ETag страницы по ее содержимому (строки и ссылки курсора).
+
+        Считается по уже выбранной странице, без агрегатов по всей области
+        RBAC: стоимость не зависит от числа items и глубины курсора. 304
+        экономит сериализацию в JSON и передачу тела. Last-Modified список не
+        отдает: удаление item не сдвигает max(updated_at) страницы.
+        """
+        return make_etag("items", data, weak=True)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = make_etag("item", instance.pk, instance.updated_at.isoformat())
+        not_modified = conditional_response(request, etag, instance.updated_at)
+        if not_modified is not None:
+            return not_modified
+        response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, instance.updated_at)
+
+    @action(detail=False, methods=["get"], url_path="export", pagination_class=None)
+    def export(self, request):
+        """Потоковая выгрузка всех доступных items в NDJSON или CSV.
+
+        Строки читаются iterator(chunk_size) (на Postgres - серверным
+        курсором), поэтому память не зависит от числа строк. Если клиент
+        принимает gzip, поток сжимается на лету.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in self.export_formats:
+            raise ValidationError(
+                {"output": [f"Expected one of: {', '.join(self.export_formats)}"]}
+            )
+        stream, content_type = self.export_formats[output]
+        fields = self.get_list_fields()
+        rows = self.values_for_fields(
+            self.filter_queryset(self.get_queryset()), fields
+        ).order_by("id")
+        # Поток читается после выхода из представления: база (реплика)
+        # фиксируется сейчас, пока действует маршрутизация запроса
+        rows = rows.using(rows.db)
+        chunks = stream(
+            rows.iterator(chunk_size=settings.ITEMS_EXPORT_CHUNK_SIZE), fields
+        )
+
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        accepts_gzip = re_accepts_gzip.search(accept_encoding)
+        if accepts_gzip:
+            chunks = compress_sequence(chunks)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        if accepts_gzip:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        response["Content-Disposition"] = f'attachment; filename="items.{output}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=["post", "patch", "delete"],
+        url_path="bulk",
+        pagination_class=None,
+    )
+    def bulk(self, request):
+        """Пакетные create/update/delete с результатом по каждой записи.
+
+        Права проверяются один раз на пакет (HasAccessPermission по методу),
+        ограничение по владельцу попадает в WHERE запросов, а записи пишутся
+        bulk_create/bulk_update/одним DELETE.
+        """
+        handlers = {
+            "POST": self.bulk_create_items,
+            "PATCH": self.bulk_update_items,
+            "DELETE": self.bulk_delete_items,
+        }
+        return handlers[request.method](request)
+
+    def get_bulk_entries(self, request):
+        entries = request.data
+        if not isinstance(entries, list) or not entries:
+            raise ValidationError({"detail": ["Expected a non-empty list"]})
+        self.check_bulk_size(len(entries))
+        return entries
+
+    def check_bulk_size(self, size: int) -> None:
+        if size > settings.ITEMS_BULK_MAX_SIZE:
+            limit = settings.ITEMS_BULK_MAX_SIZE
+            raise ValidationError({"detail": [f"At most {limit} items per request"]})
+
+    def get_bulk_targets(self, ids, all_flag: str) -> tuple:
+        """Разбивает id на разрешенные и отклоненные одним запросом.
+
+        Невидимые по read/read_all id - not_found (как 404 у одиночных
+        запросов), видимые, но чужие без флага *_all - forbidden. Вызывается
+        внутри транзакции записи: строки блокируются (FOR UPDATE), чтобы
+        параллельное удаление не произошло между проверкой и записью.
+        """
+        rule = get_request_rule(self.request, self.element_code)
+        owners = dict(
+            self.get_queryset()
+            .filter(id__in=ids)
+            .select_for_update(of=("self",))
+            .values_list("id", "owner_id")
+        )
+        # allowed: id -> owner_id (нужен записям журнала изменений),
+        # rejected: id -> статус
+        allowed, rejected = {}, {}
+        for item_id in ids:
+            if item_id not in owners:
+                rejected[item_id] = "not_found"
+            elif rule[all_flag] or owners[item_id] == self.request.user.id:
+                allowed[item_id] = owners[item_id]
+            else:
+                rejected[item_id] = "forbidden"
+        return allowed, rejected
+
+    def get_bulk_write_queryset(self, all_flag: str):
+        queryset = Item.objects.all()
+        if not get_request_rule(self.request, self.element_code)[all_flag]:
+            queryset = queryset.filter(owner=self.request.user)
+        return queryset
+
+    def bulk_create_items(self, request):
+        results, items = [], []
+        for index, entry in enumerate(self.get_bulk_entries(request)):
+            serializer = ItemSerializer(data=entry)
+            if serializer.is_valid():
+                item = Item(owner=request.user, **serializer.validated_data)
+                items.append((index, item))
+            else:
+                results.append(
+                    {"index": index, "status": "invalid", "errors": serializer.errors}
+                )
+        created = [item for _, item in items]
+        with transaction.atomic(savepoint=False):
+            Item.objects.bulk_create(created, batch_size=settings.ITEMS_BULK_BATCH_SIZE)
+            self.record_changes(created, ItemChange.OP_UPSERT)
+        results.extend(
+            {"index": index, "status": "created", "item": ItemSerializer(item).data}
+            for index, item in items
+        )
+        results.sort(key=lambda result: result["index"])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    def bulk_update_items(self, request):
+        changes, indexes, results = {}, [], []
+        for index, entry in enumerate(self.get_bulk_entries(request)):
+            serializer = ItemBulkUpdateSerializer(data=entry)
+            if serializer.is_valid():
+                # Повтор id в пакете - побеждает последнее значение
+                changes[serializer.validated_data["id"]] = serializer.validated_data
+                indexes.append((index, serializer.validated_data["id"]))
+            else:
+                results.append(
+                    {"index": index, "status": "invalid", "errors": serializer.errors}
+                )
+
+        # bulk_update не применяет auto_now, поэтому updated_at задается явно
+        now = django_timezone.now()
+        with transaction.atomic(savepoint=False):
+            allowed, rejected = self.get_bulk_targets(list(changes), "update_all")
+            items = [
+                Item(
+                    id=item_id,
+                    owner_id=owner_id,
+                    title=changes[item_id]["title"],
+                    updated_at=now,
+                )
+                for item_id, owner_id in allowed.items()
+            ]
+            self.get_bulk_write_queryset("update_all").bulk_update(
+                items,
+                ["title", "updated_at"],
+                batch_size=settings.ITEMS_BULK_BATCH_SIZE,
+            )
+            self.record_changes(items, ItemChange.OP_UPSERT)
+        results.extend(
+            {"index": index, "id": item_id, "status": rejected.get(item_id, "updated")}
+            for index, item_id in indexes
+        )
+        results.sort(key=lambda result: result["index"])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    def bulk_delete_items(self, request):
+        serializer = ItemBulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = serializer.validated_data["ids"]
+        ids = list(dict.fromkeys(requested))
+        self.check_bulk_size(len(ids))
+
+        rule = get_request_rule(request, self.element_code)
+        with transaction.atomic(savepoint=False):
+            allowed, rejected = self.get_bulk_targets(ids, "delete_all")
+            # У Item есть post_delete-обработчик, и QuerySet.delete() читал бы
+            # строки и писал tombstone по одной; delete_ids - DELETE на пачку
+            deleted_ids = Item.objects.delete_ids(
+                allowed,
+                owner_id=None if rule["delete_all"] else request.user.pk,
+                batch_size=settings.ITEMS_BULK_BATCH_SIZE,
+            )
+            deleted = [Item(id=pk, owner_id=allowed[pk]) for pk in deleted_ids]
+            self.record_changes(deleted, ItemChange.OP_DELETE)
+        # Строку успели удалить параллельно - tombstone уже записан тем
+        # удалением, здесь она not_found
+        deleted_ids = set(deleted_ids)
+        results = [
+            {
+                "index": index,
+                "id": item_id,
+                "status": "deleted"
+                if item_id in deleted_ids
+                else rejected.get(item_id, "not_found"),
+            }
+            for index, item_id in enumerate(requested)
+        ]
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="changes", pagination_class=None)
+    def changes(self, request):
+        """Изменения items с номером больше ?since= в порядке возрастания.
+
+        Удаления приходят tombstone-записями (op=delete). Потребитель хранит
+        ``next`` и передает его в следующем запросе; ``has_more`` - есть ли
+        еще изменения сразу после этой порции.
+        """
+        since, limit = self.get_changes_window()
+        queryset = ItemChange.objects.filter(id__gt=since)
+        if not get_request_rule(request, self.element_code)["read_all"]:
+            queryset = queryset.filter(owner=request.user)
+        settle = settings.ITEMS_CHANGES_SETTLE_SEC
+        if settle > 0:
+            # Номер выдается при INSERT, а видимость - при COMMIT: свежие
+            # записи ждут, пока закоммитятся транзакции с меньшими номерами.
+            # Транзакция, которая коммитит ItemChange позже settle после
+            # записи, оставит номер позади курсора - поэтому ItemChange
+            # пишется последним шагом коротких транзакций
+            settled_at = django_timezone.now() - timedelta(seconds=settle)
+            queryset = queryset.filter(changed_at__lte=settled_at)
+        rows = list(
+            queryset.order_by("id").values(
+                "id",
+                "op",
+                "item_id",
+                "title",
+                "changed_at",
+                owner_email=F("owner__email"),
+            )[: limit + 1]
+        )
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        results = [
+            {
+                "seq": row["id"],
+                "op": row["op"],
+                "id": row["item_id"],
+                "title": row["title"] if row["op"] == ItemChange.OP_UPSERT else None,
+                "owner_email": row["owner_email"],
+                "changed_at": row["changed_at"],
+            }
+            for row in rows
+        ]
+        next_since = rows[-1]["id"] if rows else since
+        return Response({"results": results, "next": next_since, "has_more": has_more})
+
+    def get_changes_window(self) -> tuple:
+        params = self.request.query_params
+        try:
+            since = int(params.get("since", 0))
+            limit = int(params.get("page_size", settings.REST_FRAMEWORK["PAGE_SIZE"]))
+        except ValueError:
+            raise ValidationError({"detail": ["since and page_size must be integers"]})
+        if since < 0 or limit < 1:
+            raise ValidationError({"detail": ["since must be >= 0, page_size >= 1"]})
+        return since, min(limit, settings.API_MAX_PAGE_SIZE)
+
+    def record_changes(self, items, op: str) -> None:
+        ItemChange.objects.bulk_create(
+            ItemChange.for_items(items, op), batch_size=settings.ITEMS_BULK_BATCH_SIZE
+        )
+
+    # Запись item и его ItemChange (сигнал) - в одной транзакции
+    @transaction.atomic(savepoint=False)
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
+
+    @transaction.atomic(savepoint=False)
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic(savepoint=False)
+    def perform_destroy(self, instance):
+        instance.delete()
+
+
+class DatabaseDiagnosticsView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+
+    @SCHEMA_DB_DIAGNOSTICS
+    def get(self, request):
+        return Response(database_diagnostics())